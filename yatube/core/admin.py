@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    '''Задачи фоновой очереди, прежде всего упавшие'''
+
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'attempts',
+        'run_after',
+        'created',
+    )
+    list_filter = ('status', 'name')
+    search_fields = ('key',)
+    readonly_fields = ('last_error',)
@@ -0,0 +1,210 @@
+import asyncio
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Тело запроса больше этого размера уходит из памяти во временный файл
+SPOOL_MAX_SIZE = 1024 * 1024
+# Сколько кусков ответа поток запроса может обогнать отправку клиенту
+RESPONSE_QUEUE_SIZE = 8
+
+_end = object()
+
+
+class AsgiBridge:
+    '''ASGI-приложение поверх WSGI-приложения Django.
+    Django 2.2 не умеет ни ASGI, ни асинхронных view, поэтому приём
+    тела запроса и отправка ответа идут в цикле событий, а сам запрос
+    целиком, вместе с потоковым телом ответа, выполняется в одном
+    потоке пула: соединения с базой в Django привязаны к потоку.
+    Медленный клиент держит только корутину, а не поток, но каждый
+    запрос, пока работает view, занимает поток: одновременных
+    запросов не больше, чем потоков в пуле.'''
+
+    def __init__(self, wsgi_application, threads):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix='asgi'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f'Неподдерживаемый тип: {scope["type"]}')
+        body = await self.read_body(receive)
+        try:
+            await self.respond(scope, body, send)
+        finally:
+            body.close()
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                break
+        body.seek(0)
+        return body
+
+    async def respond(self, scope, body, send):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(RESPONSE_QUEUE_SIZE)
+        disconnected = threading.Event()
+
+        def put(message):
+            if not disconnected.is_set():
+                asyncio.run_coroutine_threadsafe(
+                    queue.put(message), loop
+                ).result()
+
+        worker = loop.run_in_executor(
+            self.executor, self.run_request, scope, body, put, disconnected
+        )
+        try:
+            await self.forward(queue, send)
+        finally:
+            disconnected.set()
+            while not queue.empty():
+                queue.get_nowait()
+            await worker
+
+    def run_request(self, scope, body, put, disconnected):
+        try:
+            self.call_wsgi(environ(scope, body), put, disconnected)
+        except BaseException as error:
+            put(error)
+        else:
+            put(_end)
+
+    async def forward(self, queue, send):
+        '''Отправляет клиенту сообщения ответа из потока запроса'''
+        started = False
+        while True:
+            message = await queue.get()
+            if message is _end:
+                await send({'type': 'http.response.body', 'body': b''})
+                return
+            if isinstance(message, BaseException):
+                if started:
+                    raise message
+                for message in server_error():
+                    await send(message)
+                return
+            await send(message)
+            started = True
+
+    def call_wsgi(self, environ, put, disconnected):
+        response_start = []
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info is not None and response_start:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response_start[:] = [{
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [
+                    (name.lower().encode('latin1'), value.encode('latin1'))
+                    for name, value in headers
+                ],
+            }]
+
+        chunks = self.wsgi_application(environ, start_response)
+        try:
+            started = False
+            for chunk in chunks:
+                if disconnected.is_set():
+                    break
+                if not started:
+                    # Приложение-генератор вызывает start_response
+                    # только на первой итерации
+                    put(response_start[0])
+                    started = True
+                if chunk:
+                    put({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+            if not started:
+                put(response_start[0])
+        finally:
+            # close() шлёт request_finished и закрывает соединения
+            # с базой этого потока
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+
+def environ(scope, body):
+    '''WSGI environ по ASGI scope'''
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    result = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin1'),
+        'PATH_INFO': scope['path'].encode().decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin1').upper().replace('-', '_')
+        value = value.decode('latin1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        if name in result:
+            separator = '; ' if name == 'HTTP_COOKIE' else ','
+            value = f'{result[name]}{separator}{value}'
+        result[name] = value
+    return result
+
+
+def server_error():
+    return (
+        {
+            'type': 'http.response.start',
+            'status': 500,
+            'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+        },
+        {'type': 'http.response.body', 'body': b'Internal Server Error'},
+    )
+
+
+def get_asgi_application():
+    from django.conf import settings
+    from django.core.wsgi import get_wsgi_application
+
+    from .startup import warm_up_on_startup
+
+    wsgi_application = get_wsgi_application()
+    warm_up_on_startup()
+    return AsgiBridge(
+        wsgi_application,
+        threads=settings.ASGI_THREADS,
+    )
@@ -0,0 +1,525 @@
+import io
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from PIL import Image
+
+from about import urls as about_urls
+from posts import urls as posts_urls
+from posts.constants import FEED_ORDERING, LIMIT_COUNTS_POSTS
+from posts.models import Group, Post, User
+from posts.thumbnails import stored_thumbnail
+from .startup import warm_up
+from .tasks import run_pending
+from users import urls as users_urls
+
+BENCHMARK_URLCONFS = (posts_urls, users_urls, about_urls)
+ROLES = ('anonymous', 'authorized')
+PERCENTILES = (50, 95, 99)
+# Accept-Encoding клиента без сжатия и современного браузера
+TRANSFER_ENCODINGS = {'identity': 'identity', 'compressed': 'gzip, br'}
+# Запуск процесса без прогрева и с прогревом core.startup
+STARTUP_MODES = ('cold', 'warm')
+# Картинки постов в бенчмарке миниатюр: размер фотографии с телефона
+BENCHMARK_IMAGE_SIZE = (4000, 3000)
+
+
+def percentile(values, percent):
+    '''Перцентиль отсортированной выборки методом ближайшего ранга'''
+    if not values:
+        return None
+    rank = max(round(percent / 100 * len(values)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def sample_kwargs():
+    '''Аргументы для адресов с параметрами: самые наполненные
+    сообщество и автор и самый свежий пост этого автора'''
+    group = Group.objects.order_by('-posts_count').first()
+    author = User.objects.order_by('-posts_counter__posts_count').first()
+    post = Post.objects.filter(author=author).order_by(
+        '-pub_date', '-pk'
+    ).first()
+    kwargs = {}
+    if group is not None:
+        kwargs['slug'] = group.slug
+    if author is not None:
+        kwargs['username'] = author.username
+        kwargs['uidb64'] = urlsafe_base64_encode(force_bytes(author.pk))
+    if post is not None:
+        kwargs['post_id'] = post.pk
+    return author, kwargs
+
+
+def collect_routes(kwargs):
+    '''Имена и адреса всех маршрутов posts, users и about.
+    Маршруты, для которых в базе нет данных, пропускаются.'''
+    routes = []
+    for urlconf in BENCHMARK_URLCONFS:
+        for pattern in urlconf.urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            name = f'{urlconf.app_name}:{pattern.name}'
+            params = pattern.pattern.regex.groupindex
+            if any(param not in kwargs for param in params):
+                continue
+            routes.append((name, reverse(name, kwargs={
+                param: kwargs[param] for param in params
+            })))
+    return routes
+
+
+def measure(client, path, requests, warmup, login=None):
+    '''Задержки запросов к адресу и число запросов в базу.
+    Запросы в базу считаются отдельным прогоном, чтобы их
+    перехват не искажал задержки. Упавший маршрут не прерывает
+    прогон, а попадает в результаты с текстом ошибки.'''
+    latencies = []
+    statuses = set()
+    for number in range(warmup + requests):
+        if login is not None:
+            client.force_login(login)
+        started = time.perf_counter()
+        try:
+            response = client.get(path)
+        except Exception as error:
+            return {'path': path, 'error': repr(error)}
+        elapsed = time.perf_counter() - started
+        statuses.add(response.status_code)
+        if number >= warmup:
+            latencies.append(elapsed)
+    if login is not None:
+        client.force_login(login)
+    with CaptureQueriesContext(connection) as queries:
+        client.get(path)
+    latencies.sort()
+    total = sum(latencies)
+    result = {
+        'path': path,
+        'statuses': sorted(statuses),
+        'requests': requests,
+        'throughput_rps': round(requests / total, 1) if total else None,
+        'mean_ms': round(total / requests * 1000, 3),
+        'queries': len(queries),
+    }
+    for percent in PERCENTILES:
+        result[f'p{percent}_ms'] = round(
+            percentile(latencies, percent) * 1000, 3
+        )
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', 'HEAD'),
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(requests, warmup, roles=ROLES, only=None):
+    '''Прогоняет все маршруты от имени гостя и автора
+    и возвращает результаты в виде словаря для JSON'''
+    author, kwargs = sample_kwargs()
+    routes = collect_routes(kwargs)
+    if only:
+        routes = [route for route in routes if route[0] in only]
+    results = []
+    for role in roles:
+        login = author if role == 'authorized' else None
+        if login is None and role != 'anonymous':
+            continue
+        for name, path in routes:
+            client = Client()
+            result = measure(client, path, requests, warmup, login)
+            results.append({'route': name, 'role': role, **result})
+    return {
+        'meta': {
+            'created': timezone.now().isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'cache': settings.CACHES['default']['BACKEND'],
+            'dataset': {
+                'users': User.objects.count(),
+                'groups': Group.objects.count(),
+                'posts': Post.objects.count(),
+            },
+            'requests': requests,
+            'warmup': warmup,
+        },
+        'results': results,
+    }
+
+
+def compare_results(baseline, current, threshold):
+    '''Маршруты, у которых p95 вырос больше чем на threshold процентов'''
+    previous = {
+        (result['route'], result['role']): result
+        for result in baseline['results']
+    }
+    regressions = []
+    for result in current['results']:
+        before = previous.get((result['route'], result['role']))
+        if (
+            before is None or not before.get('p95_ms')
+            or 'p95_ms' not in result
+        ):
+            continue
+        change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms']
+        if change * 100 > threshold:
+            regressions.append({
+                'route': result['route'],
+                'role': result['role'],
+                'before_p95_ms': before['p95_ms'],
+                'after_p95_ms': result['p95_ms'],
+                'change_percent': round(change * 100, 1),
+            })
+    return regressions
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def summarize(samples, duration):
+    '''Пропускная способность и перцентили задержек потока запросов'''
+    latencies = sorted(latency for latency, _ in samples)
+    result = {
+        'requests': len(samples),
+        'errors': sum(1 for _, ok in samples if not ok),
+        'throughput_rps': round(len(samples) / duration, 1),
+    }
+    for percent in PERCENTILES:
+        value = percentile(latencies, percent)
+        result[f'p{percent}_ms'] = (
+            round(value * 1000, 3) if value is not None else None
+        )
+    return result
+
+
+def load_phase(author, read_paths, readers, writers, duration):
+    '''Читатели ходят по лентам и странице поста, писатели
+    публикуют посты через post_create. Все от имени автора,
+    чтобы чтения не отдавались из кэша страниц гостей.'''
+    stop = threading.Event()
+    reads, writes = [], []
+
+    def run(request, samples):
+        client = Client()
+        client.force_login(author)
+        try:
+            number = 0
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    ok = request(client, number)
+                except Exception:
+                    ok = False
+                samples.append((time.perf_counter() - started, ok))
+                number += 1
+        finally:
+            connections.close_all()
+
+    def read(client, number):
+        path = read_paths[number % len(read_paths)]
+        return client.get(path).status_code == 200
+
+    def write(client, number):
+        return client.post(reverse('posts:post_create'), data={
+            'text': f'Пост нагрузочного теста {number}',
+        }).status_code == 302
+
+    threads = [
+        threading.Thread(target=run, args=(read, reads))
+        for _ in range(readers)
+    ] + [
+        threading.Thread(target=run, args=(write, writes))
+        for _ in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return {
+        'reads': summarize(reads, duration),
+        'writes': summarize(writes, duration),
+    }
+
+
+def run_concurrency_benchmark(readers, writers, duration):
+    '''Пропускная способность чтений без записей и во время записей
+    при текущем профиле SQLite'''
+    author, kwargs = sample_kwargs()
+    if 'post_id' not in kwargs:
+        raise ValueError('В базе нет постов: сначала запустите seed_benchmark')
+    read_paths = [
+        reverse('posts:index'),
+        reverse('posts:profile', kwargs={'username': kwargs['username']}),
+        reverse('posts:post_detail', kwargs={'post_id': kwargs['post_id']}),
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        journal_mode = cursor.fetchone()[0]
+    return {
+        'meta': {
+            'created': timezone.now().isoformat(),
+            'commit': git_commit(),
+            'sqlite_profile': settings.SQLITE_PROFILE,
+            'journal_mode': journal_mode,
+            'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+            'readers': readers,
+            'writers': writers,
+            'duration': duration,
+        },
+        'reads_only': load_phase(author, read_paths, readers, 0, duration),
+        'reads_with_writes': load_phase(
+            author, read_paths, readers, writers, duration
+        ),
+    }
+
+
+def transfer_size(client, path, accept_encoding):
+    '''Размер тела ответа в байтах, как оно уходит по сети'''
+    response = client.get(path, HTTP_ACCEPT_ENCODING=accept_encoding)
+    if response.streaming:
+        body = b''.join(response.streaming_content)
+    else:
+        body = response.content
+    response.close()
+    return {
+        'status': response.status_code,
+        'bytes': len(body),
+        'encoding': response.get('Content-Encoding', 'identity'),
+        'cache_control': response.get('Cache-Control'),
+    }
+
+
+def static_links(content):
+    '''Адреса статики, на которые ссылается страница'''
+    pattern = r'(?:href|src)="({}[^"]+)"'.format(
+        re.escape(settings.STATIC_URL)
+    )
+    return sorted(set(re.findall(pattern, content)))
+
+
+def run_transfer_benchmark(path):
+    '''Байты по сети для страницы и её статики без сжатия
+    и со сжатием, как для гостя с пустым кэшем браузера'''
+    client = Client()
+    page = client.get(path)
+    results = []
+    for address in [path] + static_links(page.content.decode()):
+        results.append({'path': address, **{
+            name: transfer_size(client, address, accept_encoding)
+            for name, accept_encoding in TRANSFER_ENCODINGS.items()
+        }})
+    totals = {
+        name: sum(result[name]['bytes'] for result in results)
+        for name in TRANSFER_ENCODINGS
+    }
+    return {
+        'meta': {
+            'created': timezone.now().isoformat(),
+            'commit': git_commit(),
+            'static_storage': settings.STATICFILES_STORAGE,
+            'path': path,
+        },
+        'results': results,
+        'totals': {
+            **totals,
+            'saved_percent': round(
+                (1 - totals['compressed'] / totals['identity']) * 100, 1
+            ) if totals['identity'] else None,
+        },
+    }
+
+
+def template_time(response):
+    '''Время рендера шаблонов из заголовка Server-Timing, мс'''
+    match = re.search(r'tpl;dur=([\d.]+)', response.get('Server-Timing', ''))
+    return float(match.group(1)) if match else None
+
+
+def first_requests(path, warm):
+    '''Задержки первого и второго запроса только что запущенного
+    процесса. Разные параметры адреса не дают второму запросу
+    попасть в кэш страниц первого.'''
+    result = {}
+    if warm:
+        started = time.perf_counter()
+        warm_up()
+        result['warm_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    client = Client()
+    # WSGI-приложение загружает middleware при запуске, а тестовый
+    # клиент - на первом запросе
+    client.handler.load_middleware()
+    separator = '&' if '?' in path else '?'
+    for name in ('first', 'second'):
+        started = time.perf_counter()
+        response = client.get(f'{path}{separator}startup={name}')
+        result[f'{name}_ms'] = round(
+            (time.perf_counter() - started) * 1000, 3
+        )
+        result[f'{name}_template_ms'] = template_time(response)
+        result['status'] = response.status_code
+    return result
+
+
+def run_startup_benchmark(path, runs):
+    '''Медианы задержки первого запроса по runs свежим процессам
+    без отладки, то есть с кэширующим загрузчиком шаблонов,
+    без прогрева шаблонов и с прогревом'''
+    command = (
+        sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'),
+        'benchmark_startup', '--path', path, '--child',
+    )
+    environment = {**os.environ, 'YATUBE_DEBUG': '0'}
+    results = {}
+    for mode in STARTUP_MODES:
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            output = subprocess.run(
+                command + (mode,),
+                env=environment,
+                capture_output=True,
+                check=True,
+                text=True,
+            ).stdout
+            sample = json.loads(output)
+            sample['process_ms'] = round(
+                (time.perf_counter() - started) * 1000, 3
+            )
+            samples.append(sample)
+        results[mode] = {
+            key: round(statistics.median(
+                sample[key] for sample in samples
+            ), 3)
+            for key, value in samples[0].items()
+            if key != 'status' and value is not None
+        }
+        results[mode]['statuses'] = sorted({
+            sample['status'] for sample in samples
+        })
+    return {
+        'meta': {
+            'created': timezone.now().isoformat(),
+            'commit': git_commit(),
+            'path': path,
+            'runs': runs,
+        },
+        'results': results,
+    }
+
+
+def benchmark_image(number):
+    '''Картинка поста для бенчмарка, у каждого поста своего цвета'''
+    buffer = io.BytesIO()
+    color = (number * 37 % 256, number * 91 % 256, number * 53 % 256)
+    Image.new('RGB', BENCHMARK_IMAGE_SIZE, color).save(buffer, 'JPEG')
+    return ContentFile(buffer.getvalue(), name=f'benchmark_{number}.jpg')
+
+
+def cold_render(client, path, requests):
+    '''Медиана задержки страницы при пустом кэше, то есть с рендером
+    всех карточек и поиском их миниатюр, мс'''
+    latencies = []
+    for _ in range(requests):
+        cache.clear()
+        started = time.perf_counter()
+        client.get(path)
+        latencies.append(time.perf_counter() - started)
+    return round(statistics.median(latencies) * 1000, 3)
+
+
+def run_thumbnail_benchmark(steps, requests):
+    '''Время рендера главной ленты с пустым кэшем по мере того, как
+    у постов первой страницы появляются картинки: сразу после
+    сохранения постов, пока задачи миниатюр ждут в очереди, и после
+    того, как очередь выполнена. Картинки потом удаляются вместе
+    с миниатюрами.'''
+    if settings.TASK_QUEUE_EAGER:
+        raise ValueError(
+            'Миниатюры создаются сразу при сохранении поста: '
+            'запустите бенчмарк с YATUBE_TASKS=queue'
+        )
+    posts = list(Post.objects.filter(image='').order_by(
+        *FEED_ORDERING
+    )[:LIMIT_COUNTS_POSTS])
+    if len(posts) < LIMIT_COUNTS_POSTS:
+        raise ValueError(
+            'В базе мало постов: сначала запустите seed_benchmark'
+        )
+    path = reverse('posts:index')
+    client = Client()
+    client.handler.load_middleware()
+    results = [{
+        'images': 0,
+        'pending_ms': cold_render(client, path, requests),
+    }]
+    with_images = []
+    try:
+        for step in range(1, steps + 1):
+            for post in posts[len(with_images):len(posts) * step // steps]:
+                post.image = benchmark_image(post.pk)
+                post.save()
+                with_images.append(post)
+            result = {
+                'images': len(with_images),
+                'pending_ms': cold_render(client, path, requests),
+            }
+            started = time.perf_counter()
+            run_pending()
+            result['tasks_ms'] = round(
+                (time.perf_counter() - started) * 1000, 3
+            )
+            result['ready_ms'] = cold_render(client, path, requests)
+            result['thumbnails_ready'] = sum(
+                stored_thumbnail(post.image, 'card') is not None
+                for post in with_images
+            )
+            results.append(result)
+    finally:
+        # Последняя ссылка на картинку удаляет её вместе с миниатюрами
+        for post in with_images:
+            post.image = ''
+            post.save()
+        run_pending()
+    return {
+        'meta': {
+            'created': timezone.now().isoformat(),
+            'commit': git_commit(),
+            'path': path,
+            'image_size': BENCHMARK_IMAGE_SIZE,
+            'requests': requests,
+        },
+        'results': results,
+    }
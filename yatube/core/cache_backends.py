@@ -0,0 +1,61 @@
+from contextlib import contextmanager
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from .metrics import record_cache
+
+_missing = object()
+
+
+class InstrumentedCacheMixin:
+    '''Считает попадания и промахи get и get_many в замерах запроса.
+    Служебные get внутри get_many, incr и decr не считаются.'''
+
+    _uncounted_depth = 0
+
+    @contextmanager
+    def _uncounted(self):
+        self._uncounted_depth += 1
+        try:
+            yield
+        finally:
+            self._uncounted_depth -= 1
+
+    def get(self, key, default=None, version=None, **kwargs):
+        value = super().get(key, _missing, version, **kwargs)
+        if not self._uncounted_depth:
+            record_cache(int(value is not _missing), int(value is _missing))
+        return default if value is _missing else value
+
+    def get_many(self, keys, version=None, **kwargs):
+        keys = list(keys)
+        with self._uncounted():
+            values = super().get_many(keys, version, **kwargs)
+        record_cache(len(values), len(keys) - len(values))
+        return values
+
+    def incr(self, *args, **kwargs):
+        with self._uncounted():
+            return super().incr(*args, **kwargs)
+
+    def decr(self, *args, **kwargs):
+        with self._uncounted():
+            return super().decr(*args, **kwargs)
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+class InstrumentedFileBasedCache(InstrumentedCacheMixin, FileBasedCache):
+    pass
+
+
+try:
+    from django_redis.cache import RedisCache
+except ImportError:
+    pass
+else:
+    class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+        pass
@@ -0,0 +1,16 @@
+from django.core.checks import Error, Tags, register
+
+from .template_backends import compile_templates
+
+
+@register(Tags.templates, deploy=True)
+def check_templates_compile(app_configs, **kwargs):
+    '''manage.py check --deploy падает, если шаблон не разбирается'''
+    _, errors = compile_templates()
+    return [
+        Error(
+            f'Шаблон {name} не разбирается: {error}',
+            id='core.E001',
+        )
+        for name, error in sorted(errors.items())
+    ]
@@ -0,0 +1,48 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+_state = threading.local()
+
+
+def replica_reads_enabled():
+    return getattr(_state, 'replica_reads', False)
+
+
+def set_replica_reads(enabled):
+    _state.replica_reads = enabled
+
+
+@contextmanager
+def primary_reads():
+    '''Чтения внутри блока идут в основную базу, даже если
+    запрос обслуживается репликами'''
+    previous = replica_reads_enabled()
+    set_replica_reads(False)
+    try:
+        yield
+    finally:
+        set_replica_reads(previous)
+
+
+class ReplicaRouter:
+    '''Чтения в view из REPLICA_READ_VIEWS идут в случайную реплику
+    из READ_REPLICAS, все записи и остальные чтения - в основную базу.
+    Реплики копируют основную базу целиком, поэтому миграции на них
+    не выполняются.'''
+
+    def db_for_read(self, model, **hints):
+        if settings.READ_REPLICAS and replica_reads_enabled():
+            return random.choice(settings.READ_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.READ_REPLICAS
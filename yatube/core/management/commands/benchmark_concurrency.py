@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import run_concurrency_benchmark
+
+
+class Command(BaseCommand):
+    '''Замеряет чтения под конкурентной записью постов'''
+
+    help = (
+        'Замеряет пропускную способность и задержки чтения лент сначала '
+        'без записей, затем пока писатели публикуют посты через '
+        'post_create. Сравните запуски с YATUBE_SQLITE_PROFILE=default '
+        'и production.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=1)
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Длительность каждой фазы в секундах',
+        )
+        parser.add_argument(
+            '--output', help='Файл результатов, по умолчанию stdout',
+        )
+
+    def handle(self, *args, **options):
+        if options['readers'] < 1 or options['writers'] < 0:
+            raise CommandError('Нужен хотя бы один читатель')
+        try:
+            results = run_concurrency_benchmark(
+                options['readers'], options['writers'], options['duration']
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        content = json.dumps(results, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(content + '\n')
+        else:
+            self.stdout.write(content)
@@ -0,0 +1,48 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import (
+    STARTUP_MODES, first_requests, run_startup_benchmark,
+)
+
+
+class Command(BaseCommand):
+    '''Замеряет задержку первого запроса после запуска процесса'''
+
+    help = (
+        'Запускает свежие процессы без отладки и замеряет в каждом '
+        'первый и второй запрос к адресу: без прогрева шаблонов и после '
+        'разбора всех шаблонов в кэш загрузчика, как при запуске WSGI '
+        'и ASGI приложений. В JSON пишутся медианы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default='/', help='Адрес страницы, по умолчанию главная',
+        )
+        parser.add_argument(
+            '--runs', type=int, default=5,
+            help='Сколько процессов запускать на каждый режим',
+        )
+        parser.add_argument(
+            '--output', help='Файл результатов, по умолчанию stdout',
+        )
+        # Режим дочернего процесса, которые запускает сама команда
+        parser.add_argument('--child', choices=STARTUP_MODES)
+
+    def handle(self, *args, **options):
+        if options['child']:
+            self.stdout.write(json.dumps(first_requests(
+                options['path'], warm=options['child'] == 'warm'
+            )))
+            return
+        if options['runs'] < 1:
+            raise CommandError('Нужен хотя бы один запуск')
+        results = run_startup_benchmark(options['path'], options['runs'])
+        content = json.dumps(results, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(content + '\n')
+        else:
+            self.stdout.write(content)
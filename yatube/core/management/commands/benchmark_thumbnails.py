@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import run_thumbnail_benchmark
+
+
+class Command(BaseCommand):
+    '''Замеряет рендер ленты по мере появления картинок у постов'''
+
+    help = (
+        'Добавляет картинки постам первой страницы главной ленты в steps '
+        'шагов и на каждом шаге замеряет рендер ленты с пустым кэшем: '
+        'пока задачи миниатюр ждут в очереди и когда очередь выполнена. '
+        'После замера картинки и миниатюры удаляются. Нужна база '
+        'с постами, см. seed_benchmark, и YATUBE_TASKS=queue.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--steps', type=int, default=5)
+        parser.add_argument(
+            '--requests', type=int, default=20,
+            help='Сколько запросов замерять на каждом шаге',
+        )
+        parser.add_argument(
+            '--output', help='Файл результатов, по умолчанию stdout',
+        )
+
+    def handle(self, *args, **options):
+        if options['steps'] < 1 or options['requests'] < 1:
+            raise CommandError('Нужен хотя бы один шаг и один запрос')
+        try:
+            results = run_thumbnail_benchmark(
+                options['steps'], options['requests']
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        content = json.dumps(results, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(content + '\n')
+        else:
+            self.stdout.write(content)
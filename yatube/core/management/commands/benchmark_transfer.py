@@ -0,0 +1,33 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import run_transfer_benchmark
+
+
+class Command(BaseCommand):
+    '''Замеряет байты по сети для страницы и её статики'''
+
+    help = (
+        'Запрашивает страницу и всю статику, на которую она ссылается, '
+        'без сжатия и со сжатием и пишет в JSON размеры ответов. Статику '
+        'отдаёт core.views.static из STATIC_ROOT, поэтому сначала '
+        'соберите её: YATUBE_STATIC=manifest manage.py collectstatic.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default='/', help='Адрес страницы, по умолчанию главная',
+        )
+        parser.add_argument(
+            '--output', help='Файл результатов, по умолчанию stdout',
+        )
+
+    def handle(self, *args, **options):
+        results = run_transfer_benchmark(options['path'])
+        content = json.dumps(results, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(content + '\n')
+        else:
+            self.stdout.write(content)
@@ -0,0 +1,74 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import (
+    ROLES, compare_results, load_results, run_benchmark,
+)
+
+
+class Command(BaseCommand):
+    '''Замеряет задержки и запросы в базу для всех маршрутов сайта'''
+
+    help = (
+        'Прогоняет маршруты posts, users и about на текущей базе и пишет '
+        'в JSON пропускную способность, p50/p95/p99 задержки и число '
+        'запросов в базу. Базу для замеров наполняет seed_benchmark.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Сколько замеряемых запросов на маршрут',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Сколько прогревочных запросов на маршрут',
+        )
+        parser.add_argument(
+            '--role', action='append', choices=ROLES,
+            help='От чьего имени ходить, по умолчанию гость и автор',
+        )
+        parser.add_argument(
+            '--route', action='append',
+            help='Замерять только этот маршрут, например posts:index',
+        )
+        parser.add_argument(
+            '--output', help='Файл результатов, по умолчанию stdout',
+        )
+        parser.add_argument(
+            '--compare', help='Прошлые результаты для сравнения p95',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=10,
+            help='Допустимый рост p95 в процентах при сравнении',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['warmup'] < 0:
+            raise CommandError('Число запросов должно быть положительным')
+        results = run_benchmark(
+            options['requests'],
+            options['warmup'],
+            roles=options['role'] or ROLES,
+            only=options['route'],
+        )
+        if options['compare']:
+            results['regressions'] = compare_results(
+                load_results(options['compare']),
+                results,
+                options['threshold'],
+            )
+        content = json.dumps(results, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(content + '\n')
+        else:
+            self.stdout.write(content)
+        if results.get('regressions'):
+            raise CommandError(
+                'p95 вырос больше допустимого у маршрутов: ' + ', '.join(
+                    f'{item["route"]} ({item["role"]})'
+                    for item in results['regressions']
+                )
+            )
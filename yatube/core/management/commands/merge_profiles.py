@@ -0,0 +1,80 @@
+import os
+import pstats
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+MERGED_DIR = 'merged'
+
+
+def merge_collapsed(paths):
+    '''Суммирует счётчики одинаковых стеков collapsed-файлов'''
+    stacks = Counter()
+    for path in paths:
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                if stack and count.isdigit():
+                    stacks[stack] += int(count)
+    return stacks
+
+
+class Command(BaseCommand):
+    '''Сводит профили запросов по view'''
+
+    help = (
+        'Сводит профили из PROFILE_DIR по view: collapsed-стеки '
+        'суммируются в <view>.collapsed для flamegraph.pl или speedscope, '
+        'файлы cProfile объединяются в <view>.prof для pstats и snakeviz.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--view', action='append',
+            help='Свести только эту view, например posts:index',
+        )
+        parser.add_argument(
+            '--output',
+            help='Каталог результатов, по умолчанию PROFILE_DIR/merged',
+        )
+
+    def handle(self, *args, **options):
+        source = settings.PROFILE_DIR
+        if not os.path.isdir(source):
+            raise CommandError(f'Профилей нет: {source} не существует')
+        output = options['output'] or os.path.join(source, MERGED_DIR)
+        os.makedirs(output, exist_ok=True)
+        views = sorted(
+            name for name in os.listdir(source)
+            if name != MERGED_DIR
+            and os.path.isdir(os.path.join(source, name))
+        )
+        if options['view']:
+            wanted = {view.replace(':', '.') for view in options['view']}
+            views = [view for view in views if view in wanted]
+        for view in views:
+            directory = os.path.join(source, view)
+            files = sorted(os.listdir(directory))
+            collapsed = [
+                os.path.join(directory, name) for name in files
+                if name.endswith('.collapsed')
+            ]
+            profiles = [
+                os.path.join(directory, name) for name in files
+                if name.endswith('.prof')
+            ]
+            if collapsed:
+                stacks = merge_collapsed(collapsed)
+                path = os.path.join(output, f'{view}.collapsed')
+                with open(path, 'w', encoding='utf-8') as file:
+                    for stack, count in stacks.most_common():
+                        file.write(f'{stack} {count}\n')
+            if profiles:
+                stats = pstats.Stats(*profiles)
+                stats.dump_stats(os.path.join(output, f'{view}.prof'))
+            self.stdout.write(
+                f'{view}: стековых профилей {len(collapsed)}, '
+                f'профилей cProfile {len(profiles)}'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Результаты в {output}'))
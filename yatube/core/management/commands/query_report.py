@@ -0,0 +1,65 @@
+import os
+import shutil
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.query_log import load_stats
+
+SORT_KEYS = {
+    'total': 'total_ms',
+    'max': 'max_ms',
+    'count': 'count',
+    'repeats': 'max_per_request',
+}
+
+
+class Command(BaseCommand):
+    '''Сводка статистики запросов в базу по отпечаткам'''
+
+    help = (
+        'Выводит самые тяжёлые запросы в базу по отпечаткам и view, '
+        'собирая статистику всех процессов из QUERY_STATS_DIR. Колонка '
+        '"повторов" - максимум повторов отпечатка за один запрос, '
+        'большие значения указывают на N+1.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sort', choices=tuple(SORT_KEYS), default='total',
+            help='Порядок: суммарное или максимальное время, '
+                 'число запросов или повторы за запрос',
+        )
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument(
+            '--view', help='Только запросы этой view, например posts:index'
+        )
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Удалить накопленную статистику после вывода',
+        )
+
+    def handle(self, *args, **options):
+        directory = settings.QUERY_STATS_DIR
+        items = load_stats(directory)
+        if options['view']:
+            items = [
+                item for item in items if item['view'] == options['view']
+            ]
+        items.sort(key=lambda item: item[SORT_KEYS[options['sort']]])
+        items.reverse()
+        if not items:
+            self.stdout.write('Статистики запросов пока нет')
+        for item in items[:options['limit']]:
+            self.stdout.write(
+                f'[{item["fingerprint"]}] {item["view"]}: '
+                f'{item["count"]} запросов, '
+                f'всего {item["total_ms"]:.1f} мс, '
+                f'в среднем {item["total_ms"] / item["count"]:.2f} мс, '
+                f'максимум {item["max_ms"]:.1f} мс, '
+                f'повторов за запрос до {item["max_per_request"]}'
+            )
+            self.stdout.write(f'    {item["sql"]}')
+        if options['reset'] and os.path.isdir(directory):
+            shutil.rmtree(directory)
+            self.stdout.write(self.style.SUCCESS('Статистика удалена'))
@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import autodiscover_modules
+
+from core.tasks import queue_stats, run_pending
+from core.workers import run_workers
+
+
+class Command(BaseCommand):
+    '''Выполняет задачи фоновой очереди'''
+
+    help = (
+        'Запускает пул процессов-воркеров, которые выполняют задачи '
+        'очереди core.tasks из базы проекта, пока команду не остановят '
+        'SIGINT или SIGTERM. Воркеры доделывают текущие задачи и выходят. '
+        'Задачи ставятся в очередь с YATUBE_TASKS=queue.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=2,
+            help='Сколько процессов-воркеров запустить',
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выполнить готовые задачи в этом процессе и выйти',
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Вывести глубину очереди в JSON и выйти',
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(
+                json.dumps(queue_stats(), ensure_ascii=False, indent=2)
+            )
+            return
+        autodiscover_modules('tasks')
+        if options['burst']:
+            self.stdout.write(f'Выполнено задач: {run_pending()}')
+            return
+        if options['processes'] < 1:
+            raise CommandError('Нужен хотя бы один процесс')
+        run_workers(options['processes'])
@@ -0,0 +1,97 @@
+import json
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from faker import Faker
+from mixer.backend.django import mixer
+
+from posts.models import Group, User
+
+BENCHMARK_USER = 'bench_user_{0}'
+BENCHMARK_GROUP = 'bench-group-{0}'
+# Даты постов отсчитываются назад от этой даты плюс --seed дней,
+# а не от текущего времени: один и тот же --seed даёт одни и те же
+# данные, когда бы их ни создавали
+BENCHMARK_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class Command(BaseCommand):
+    '''Наполняет базу синтетическими данными для бенчмарков'''
+
+    help = (
+        'Создаёт пользователей и сообщества через mixer, как фикстуры '
+        'тестов, и загружает сгенерированные Faker посты командой '
+        'import_posts. С одинаковым --seed данные воспроизводимы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10 ** 4)
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределить даты постов',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь')
+        random.seed(options['seed'])
+        Faker.seed(options['seed'])
+        fake = Faker('ru_RU')
+        existing = set(User.objects.filter(
+            username__startswith=BENCHMARK_USER.format('')
+        ).values_list('username', flat=True))
+        usernames = [
+            BENCHMARK_USER.format(number)
+            for number in range(options['users'])
+            if BENCHMARK_USER.format(number) not in existing
+        ]
+        mixer.cycle(len(usernames)).blend(
+            User, username=(username for username in usernames)
+        )
+        existing = set(Group.objects.values_list('slug', flat=True))
+        slugs = [
+            BENCHMARK_GROUP.format(number)
+            for number in range(options['groups'])
+            if BENCHMARK_GROUP.format(number) not in existing
+        ]
+        mixer.cycle(len(slugs)).blend(
+            Group, slug=(slug for slug in slugs), posts_count=0
+        )
+        authors = [
+            BENCHMARK_USER.format(number) for number in range(options['users'])
+        ]
+        groups = [None] + [
+            BENCHMARK_GROUP.format(number)
+            for number in range(options['groups'])
+        ]
+        epoch = BENCHMARK_EPOCH + timedelta(days=options['seed'])
+        period = timedelta(days=options['days']).total_seconds()
+        file = tempfile.NamedTemporaryFile(
+            'w', suffix='.jsonl', encoding='utf-8', delete=False
+        )
+        try:
+            with file:
+                for _ in range(options['posts']):
+                    file.write(json.dumps({
+                        'text': fake.paragraph(nb_sentences=3),
+                        'author': random.choice(authors),
+                        'group': random.choice(groups),
+                        'pub_date': (epoch - timedelta(
+                            seconds=random.uniform(0, period)
+                        )).isoformat(),
+                    }, ensure_ascii=False) + '\n')
+            call_command(
+                'import_posts', file.name,
+                stdout=self.stdout, stderr=self.stderr,
+                verbosity=options['verbosity'],
+            )
+        finally:
+            os.remove(file.name)
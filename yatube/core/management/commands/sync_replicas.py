@@ -0,0 +1,54 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    '''Копирует основную базу SQLite в файлы реплик'''
+
+    help = (
+        'Копирует основную базу SQLite в реплики из YATUBE_REPLICAS '
+        'или в переданные файлы через backup API SQLite. С --interval '
+        'повторяет копирование, изображая отставание реплик.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Файлы реплик, по умолчанию из настроек',
+        )
+        parser.add_argument(
+            '--interval', type=float,
+            help='Копировать раз в столько секунд до остановки',
+        )
+
+    def handle(self, *args, **options):
+        source = connections['default']
+        if source.vendor != 'sqlite':
+            raise CommandError('Синхронизация реплик есть только для SQLite')
+        paths = options['paths'] or [
+            settings.DATABASES[alias]['NAME']
+            for alias in settings.READ_REPLICAS
+        ]
+        if not paths:
+            raise CommandError('Реплики не настроены: задайте YATUBE_REPLICAS')
+        if source.in_atomic_block:
+            # backup API ждёт, пока основная база не выйдет из транзакции
+            raise CommandError('Нельзя копировать базу внутри транзакции')
+        while True:
+            source.ensure_connection()
+            for path in paths:
+                target = sqlite3.connect(path)
+                try:
+                    source.connection.backup(target)
+                finally:
+                    target.close()
+            self.stdout.write(
+                f'Реплик синхронизировано: {len(paths)}', self.style.SUCCESS
+            )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
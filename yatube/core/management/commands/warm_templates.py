@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.template_backends import compile_templates
+
+
+class Command(BaseCommand):
+    '''Разбирает все шаблоны проекта и падает на первой же ошибке'''
+
+    help = (
+        'Разбирает все шаблоны из каталога templates и сообщает, '
+        'сколько это заняло. Завершается с ошибкой, если хотя бы один '
+        'шаблон не разбирается, поэтому годится для проверки при '
+        'выкладке наравне с check --deploy.'
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count, errors = compile_templates()
+        elapsed = (time.perf_counter() - started) * 1000
+        if errors:
+            raise CommandError('\n'.join(
+                f'Шаблон {name} не разбирается: {error}'
+                for name, error in sorted(errors.items())
+            ))
+        self.stdout.write(f'Разобрано шаблонов: {count} за {elapsed:.1f} мс')
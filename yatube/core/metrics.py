@@ -0,0 +1,166 @@
+import bisect
+import threading
+import time
+from collections import Counter
+
+# Верхние границы корзин гистограмм в миллисекундах,
+# последняя корзина - всё, что дольше
+HISTOGRAM_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+TIMINGS = ('total', 'db', 'template')
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    '''Замеры одного запроса: время, запросы в базу, рендер шаблонов
+    и обращения к кэшу'''
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_name = '<unresolved>'
+        self.fingerprints = Counter()
+        self.total = 0.0
+        self.db = 0.0
+        self.queries = 0
+        self.template = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def server_timing(self):
+        '''Значение заголовка Server-Timing'''
+        return ', '.join((
+            f'total;dur={self.total * 1000:.1f}',
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template * 1000:.1f}',
+            'cache;desc="hits={} misses={}"'.format(
+                self.cache_hits, self.cache_misses
+            ),
+        ))
+
+
+def start_request():
+    _local.metrics = RequestMetrics()
+    return _local.metrics
+
+
+def finish_request():
+    metrics = getattr(_local, 'metrics', None)
+    _local.metrics = None
+    if metrics is not None:
+        metrics.finish()
+    return metrics
+
+
+def current():
+    '''Замеры текущего запроса или None вне запроса'''
+    return getattr(_local, 'metrics', None)
+
+
+def record_cache(hits, misses):
+    metrics = current()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+class Histogram:
+    '''Гистограмма значений в миллисекундах по HISTOGRAM_BUCKETS'''
+
+    def __init__(self):
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def add(self, value):
+        self.buckets[bisect.bisect_left(HISTOGRAM_BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def percentile(self, percent):
+        '''Верхняя граница корзины, в которую попал перцентиль,
+        '+Inf' для последней корзины'''
+        if not self.count:
+            return None
+        rank = percent / 100 * self.count
+        seen = 0
+        for bound, count in zip(HISTOGRAM_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return '+Inf'
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'mean': round(self.sum / self.count, 3) if self.count else None,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'buckets': dict(zip(
+                [str(bound) for bound in HISTOGRAM_BUCKETS] + ['+Inf'],
+                self.buckets,
+            )),
+        }
+
+
+class ViewMetrics:
+    '''Накопленные замеры одной view-функции'''
+
+    def __init__(self):
+        self.histograms = {name: Histogram() for name in TIMINGS}
+        self.queries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def add(self, metrics):
+        self.histograms['total'].add(metrics.total * 1000)
+        self.histograms['db'].add(metrics.db * 1000)
+        self.histograms['template'].add(metrics.template * 1000)
+        self.queries += metrics.queries
+        self.cache_hits += metrics.cache_hits
+        self.cache_misses += metrics.cache_misses
+
+    def as_dict(self):
+        requests = self.histograms['total'].count
+        return {
+            'requests': requests,
+            'queries_per_request': round(self.queries / requests, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            **{
+                f'{name}_ms': histogram.as_dict()
+                for name, histogram in self.histograms.items()
+            },
+        }
+
+
+class MetricsRegistry:
+    '''Гистограммы замеров по именам view в памяти процесса'''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def add(self, view_name, metrics):
+        with self._lock:
+            if view_name not in self._views:
+                self._views[view_name] = ViewMetrics()
+            self._views[view_name].add(metrics)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view_name: view.as_dict()
+                for view_name, view in sorted(self._views.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,169 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+
+from . import metrics
+from .db_routers import set_replica_reads
+from .profiling import PROFILE_MODES, make_profiler, save_profile
+from .query_log import query_stats
+
+
+class RequestMetricsMiddleware:
+    '''Замеряет время запроса, запросы в базу, рендер шаблонов
+    и обращения к кэшу. Отдаёт замеры в заголовке Server-Timing
+    и копит гистограммы по имени view, например posts:index.
+    Запросы в базу попадают в статистику по отпечаткам query_log.'''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics = metrics.start_request()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(
+                        self.count_query(request_metrics)
+                    ))
+                response = self.get_response(request)
+        finally:
+            metrics.finish_request()
+            query_stats.finish_request(
+                request_metrics.fingerprints, request_metrics.view_name
+            )
+        response['Server-Timing'] = request_metrics.server_timing()
+        metrics.registry.add(request_metrics.view_name, request_metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request_metrics = metrics.current()
+        if request_metrics is not None:
+            request_metrics.view_name = request.resolver_match.view_name
+
+    @staticmethod
+    def count_query(request_metrics):
+        def wrapper(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                duration = time.perf_counter() - started
+                request_metrics.db += duration
+                request_metrics.queries += 1
+                request_metrics.fingerprints[query_stats.record(
+                    sql, duration, request_metrics.view_name
+                )] += 1
+
+        return wrapper
+
+
+class ProfilingMiddleware:
+    '''Профилирует запрос по требованию: персоналу с параметром
+    ?profile=cprofile или ?profile=sampling и доле PROFILE_SAMPLE_RATE
+    всех запросов в режиме PROFILE_MODE. Профиль view и рендера
+    шаблонов сохраняется в PROFILE_DIR, путь к нему персонал видит
+    в заголовке X-Profile.'''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def profile_mode(self, request):
+        mode = request.GET.get('profile')
+        if mode in PROFILE_MODES and request.user.is_staff:
+            return mode
+        if random.random() < settings.PROFILE_SAMPLE_RATE:
+            return settings.PROFILE_MODE
+        return None
+
+    def __call__(self, request):
+        mode = self.profile_mode(request)
+        if mode is None:
+            return self.get_response(request)
+        profiler = make_profiler(mode)
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        match = getattr(request, 'resolver_match', None)
+        path = save_profile(
+            profiler,
+            mode,
+            match.view_name if match is not None else '<unresolved>',
+        )
+        if request.user.is_staff:
+            response['X-Profile'] = path
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    '''Включает чтение из реплик для безопасных запросов к view
+    из REPLICA_READ_VIEWS. После успешного изменяющего запроса
+    пользователь REPLICA_STICKY_SECONDS секунд читает из основной
+    базы и видит свои записи, даже если реплики отстают.'''
+
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            set_replica_reads(False)
+        if (
+            settings.READ_REPLICAS
+            and request.method not in self.safe_methods
+            and response.status_code < 400
+        ):
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE,
+                str(time.time() + settings.REPLICA_STICKY_SECONDS),
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def is_sticky(self, request):
+        try:
+            until = float(request.COOKIES[settings.REPLICA_STICKY_COOKIE])
+        except (KeyError, ValueError):
+            return False
+        return until > time.time()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.replica_reads = (
+            bool(settings.READ_REPLICAS)
+            and request.method in self.safe_methods
+            and request.resolver_match.view_name
+            in settings.REPLICA_READ_VIEWS
+            and not self.is_sticky(request)
+        )
+        set_replica_reads(request.replica_reads)
+
+
+class TextGZipMiddleware(GZipMiddleware):
+    '''Сжимает gzip только текстовые ответы: HTML, JSON и выгрузки.
+    Картинки уже сжаты, а статика приходит со сжатой при сборке
+    копией и заголовком Content-Encoding.'''
+
+    compressible_types = (
+        'text/',
+        'application/json',
+        'application/x-ndjson',
+        'application/javascript',
+        'image/svg+xml',
+    )
+
+    def process_response(self, request, response):
+        if not response.get('Content-Type', '').startswith(
+            self.compressible_types
+        ):
+            return response
+        return super().process_response(request, response)
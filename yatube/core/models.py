@@ -0,0 +1,83 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    '''Задача фоновой очереди core.tasks. Выполненные задачи
+    удаляются, в таблице остаются ждущие, выполняемые и упавшие
+    после всех попыток.'''
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Упала'),
+    )
+
+    name = models.CharField(
+        verbose_name='Задача',
+        max_length=200,
+    )
+    args = models.TextField(
+        verbose_name='Аргументы, JSON',
+        default='[]',
+    )
+    key = models.CharField(
+        verbose_name='Ключ идемпотентности',
+        max_length=200,
+        blank=True,
+        null=True,
+    )
+    status = models.CharField(
+        verbose_name='Состояние',
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='Попыток',
+        default=0,
+    )
+    max_attempts = models.PositiveIntegerField(
+        verbose_name='Наибольшее число попыток',
+    )
+    run_after = models.DateTimeField(
+        verbose_name='Выполнить не раньше',
+        default=timezone.now,
+    )
+    locked_until = models.DateTimeField(
+        verbose_name='Занята воркером до',
+        blank=True,
+        null=True,
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True,
+    )
+    created = models.DateTimeField(
+        verbose_name='Поставлена',
+        auto_now_add=True,
+    )
+
+    class Meta:
+
+        constraints = (
+            # Ждущая задача с ключом одна: повторная постановка
+            # ничего не добавляет, задача и так прочтёт свежие данные
+            models.UniqueConstraint(
+                fields=('key',),
+                condition=models.Q(status='queued'),
+                name='unique_queued_task_key',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('status', 'run_after'),
+                name='task_status_run_after_idx',
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.name} [{self.status}]'
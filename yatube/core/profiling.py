@@ -0,0 +1,80 @@
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+PROFILE_MODES = ('cprofile', 'sampling')
+PROFILE_SUFFIXES = {'cprofile': '.prof', 'sampling': '.collapsed'}
+
+
+class StackSampler:
+    '''Статистический профилировщик: фоновый поток раз в interval
+    секунд снимает стек профилируемого потока и считает стеки
+    в формате collapsed (кадры через ";"), понятном flamegraph.pl
+    и speedscope.'''
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append('{} ({}:{})'.format(
+                    code.co_name,
+                    os.path.basename(code.co_filename),
+                    code.co_firstlineno,
+                ))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def enable(self):
+        self._thread.start()
+
+    def disable(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump_stats(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f'{stack} {count}\n')
+
+
+def make_profiler(mode):
+    if mode == 'cprofile':
+        return cProfile.Profile()
+    return StackSampler(settings.PROFILE_SAMPLE_INTERVAL)
+
+
+def view_directory(view_name):
+    '''Каталог профилей view: posts:index -> PROFILE_DIR/posts.index'''
+    return os.path.join(
+        settings.PROFILE_DIR, re.sub(r'[^\w.-]', '.', view_name)
+    )
+
+
+def save_profile(profiler, mode, view_name):
+    '''Сохраняет профиль запроса с временем и pid в имени файла'''
+    directory = view_directory(view_name)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, '{}-{}{}'.format(
+        time.strftime('%Y%m%dT%H%M%S'), os.getpid(), PROFILE_SUFFIXES[mode]
+    ))
+    if os.path.exists(path):
+        root, suffix = os.path.splitext(path)
+        path = f'{root}-{time.perf_counter_ns()}{suffix}'
+    profiler.dump_stats(path)
+    return path
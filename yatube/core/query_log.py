@@ -0,0 +1,171 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import traceback
+
+from django.conf import settings
+
+logger = logging.getLogger('yatube.slow_queries')
+
+_literals = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def normalize(sql):
+    '''SQL без литералов и параметров: запросы, отличающиеся только
+    значениями и длиной списков IN (...), дают одну строку'''
+    for pattern, replacement in _literals:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(sql):
+    '''Отпечаток запроса и его нормализованный текст'''
+    normalized = normalize(sql)
+    return hashlib.md5(normalized.encode()).hexdigest()[:12], normalized
+
+
+def query_origin():
+    '''Ближайший к запросу кадр стека из кода проекта'''
+    skip = (__file__, os.path.join(settings.BASE_DIR, 'core', 'middleware'))
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        if (
+            frame.filename.startswith(settings.BASE_DIR)
+            and not frame.filename.startswith(skip)
+        ):
+            return f'{frame.filename}:{frame.lineno} in {frame.name}'
+    return None
+
+
+class QueryStats:
+    '''Число, суммарное и максимальное время запросов по отпечатку
+    и view. Накапливаются в памяти процесса и раз в
+    QUERY_STATS_FLUSH_INTERVAL секунд сбрасываются в свой файл
+    процесса в QUERY_STATS_DIR, откуда их собирает query_report.'''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Отдельный замок для записи файла: запросы других потоков
+        # не ждут диска, а два сброса не пишут файл одновременно
+        self._flush_lock = threading.Lock()
+        self._stats = {}
+        self._flushed = time.monotonic()
+
+    def record(self, sql, duration, view_name):
+        key, normalized = fingerprint(sql)
+        duration_ms = duration * 1000
+        with self._lock:
+            item = self._stats.get((key, view_name))
+            if item is None:
+                item = self._stats[key, view_name] = {
+                    'fingerprint': key,
+                    'view': view_name,
+                    'sql': normalized,
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'max_per_request': 0,
+                }
+            item['count'] += 1
+            item['total_ms'] += duration_ms
+            item['max_ms'] = max(item['max_ms'], duration_ms)
+        if duration_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+            logger.warning(
+                'Медленный запрос %.1f мс [%s] во view %s из %s: %s',
+                duration_ms, key, view_name, query_origin(), sql,
+            )
+        return key
+
+    def finish_request(self, fingerprints, view_name):
+        '''Запоминает, сколько раз отпечаток повторился за запрос:
+        большое число повторов - признак N+1'''
+        with self._lock:
+            for key, count in fingerprints.items():
+                item = self._stats.get((key, view_name))
+                if item is not None:
+                    item['max_per_request'] = max(
+                        item['max_per_request'], count
+                    )
+        if (
+            time.monotonic() - self._flushed
+            >= settings.QUERY_STATS_FLUSH_INTERVAL
+        ):
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return [dict(item) for item in self._stats.values()]
+
+    def flush(self):
+        '''Перезаписывает файл статистики процесса целиком. Сброс
+        идёт в конце запроса, поэтому ошибка диска только пишется
+        в лог и не превращает ответ в 500.'''
+        self._flushed = time.monotonic()
+        directory = settings.QUERY_STATS_DIR
+        if not directory:
+            return
+        with self._flush_lock:
+            try:
+                self._write(directory)
+            except OSError:
+                logger.exception(
+                    'Не удалось сохранить статистику запросов в %s',
+                    directory,
+                )
+
+    def _write(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        pid = os.getpid()
+        descriptor, temporary = tempfile.mkstemp(
+            prefix=f'{pid}.', suffix='.json.tmp', dir=directory
+        )
+        try:
+            with open(descriptor, 'w', encoding='utf-8') as file:
+                json.dump(self.snapshot(), file, ensure_ascii=False)
+            os.replace(temporary, os.path.join(directory, f'{pid}.json'))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+def load_stats(directory):
+    '''Сводит статистику всех процессов из файлов QUERY_STATS_DIR'''
+    merged = {}
+    if not os.path.isdir(directory):
+        return []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.json'):
+            continue
+        with open(os.path.join(directory, name), encoding='utf-8') as file:
+            items = json.load(file)
+        for item in items:
+            key = item['fingerprint'], item['view']
+            if key not in merged:
+                merged[key] = item
+                continue
+            total = merged[key]
+            total['count'] += item['count']
+            total['total_ms'] += item['total_ms']
+            total['max_ms'] = max(total['max_ms'], item['max_ms'])
+            total['max_per_request'] = max(
+                total['max_per_request'], item['max_per_request']
+            )
+    return list(merged.values())
+
+
+query_stats = QueryStats()
@@ -0,0 +1,20 @@
+'''Версия выкладки для ETag страниц. Модуль импортируют настройки,
+поэтому он не зависит от Django.'''
+import hashlib
+import os
+
+
+def templates_release(*directories):
+    '''Версия по содержимому шаблонов: одинакова во всех процессах
+    и после перезапуска и меняется вместе с шаблонами'''
+    digest = hashlib.sha256()
+    for directory in directories:
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, directory)
+                digest.update(relative.encode() + b'\0')
+                with open(path, 'rb') as template:
+                    digest.update(template.read())
+    return digest.hexdigest()[:12]
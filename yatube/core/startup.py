@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import get_resolver
+from django.utils import translation
+
+from .template_backends import compile_templates
+
+
+def populate_resolvers(resolver):
+    '''Строит таблицы reverse для resolver и вложенных пространств
+    имён, например posts: - по ним работает тег url'''
+    resolver.reverse_dict
+    for _, namespace_resolver in resolver.namespace_dict.values():
+        populate_resolvers(namespace_resolver)
+
+
+def warm_up():
+    '''Делает до первого запроса то, что иначе делает первый
+    запрос: разбирает шаблоны в кэш загрузчика, импортирует
+    контекстные процессоры и URLconf со всеми view и строит
+    таблицы reverse для языка сайта. Возвращает ошибки разбора
+    шаблонов.'''
+    _, errors = compile_templates()
+    for backend in engines.all():
+        if isinstance(backend, DjangoTemplates):
+            backend.engine.template_context_processors
+    # Запрос берёт резолвер по явному ROOT_URLCONF, а get_resolver()
+    # без аргумента в Django 2.2 кэширует отдельный экземпляр
+    with translation.override(settings.LANGUAGE_CODE):
+        populate_resolvers(get_resolver(settings.ROOT_URLCONF))
+    return errors
+
+
+def warm_up_on_startup():
+    '''Прогрев при запуске WSGI и ASGI приложений, если включено
+    WARM_ON_STARTUP. Ошибки разбора шаблонов ловит check --deploy.'''
+    if settings.WARM_ON_STARTUP:
+        warm_up()
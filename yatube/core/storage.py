@@ -0,0 +1,128 @@
+import gzip
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Файлы, которые стоит сжимать: картинки PNG и JPEG уже сжаты
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.ico', '.txt', '.json', '.xml', '.html',
+)
+# Сжатая копия сохраняется, только если она заметно меньше исходника
+MAX_COMPRESSED_RATIO = 0.95
+# Кодировки в порядке предпочтения и суффиксы сжатых копий
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+# Кусок, которым загрузка пишется на диск и хэшируется
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Права файлов медиа, если FILE_UPLOAD_PERMISSIONS не задан:
+# временный файл создаётся с правами 0o600
+MEDIA_FILE_PERMISSIONS = 0o644
+CONTENT_ADDRESSED_NAME = re.compile(r'(?:.+/)?[0-9a-f]{2}/[0-9a-f]{64}\.\w+')
+
+
+def available_encodings():
+    '''Кодировки, которые умеет текущее окружение: brotli нужен
+    одноимённый пакет, gzip есть в стандартной библиотеке'''
+    return tuple(
+        (encoding, suffix) for encoding, suffix in ENCODINGS
+        if encoding != 'br' or brotli is not None
+    )
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content)
+    # mtime=0: одинаковый файл даёт одинаковый архив при каждой сборке
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def is_compressible(name):
+    return os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    '''Хранилище статики для collectstatic: к имени файла добавляется
+    хэш содержимого, а рядом с текстовыми файлами с хэшем кладутся
+    сжатые копии .gz и .br. Сжатие идёт один раз при сборке,
+    core.views.static только выбирает подходящую копию.'''
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in paths:
+            hashed_name = self.hashed_files.get(
+                self.hash_key(self.clean_name(name))
+            )
+            if hashed_name is not None and is_compressible(hashed_name):
+                self.compress_file(hashed_name)
+
+    def compress_file(self, name):
+        with self.open(name) as file:
+            content = file.read()
+        for encoding, suffix in available_encodings():
+            compressed = compress(content, encoding)
+            if len(compressed) > len(content) * MAX_COMPRESSED_RATIO:
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+
+def is_content_addressed(name):
+    '''Имя файла медиа, выведенное из его содержимого'''
+    return CONTENT_ADDRESSED_NAME.fullmatch(name) is not None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    '''Хранилище медиа, которое называет файлы по SHA-256 содержимого:
+    <каталог upload_to>/<первые два знака хэша>/<хэш><расширение>.
+    Одинаковые загрузки попадают в один файл, а файл под таким именем
+    никогда не меняется. Загрузка пишется во временный файл кусками
+    и хэшируется по пути, целиком в памяти она не держится.'''
+
+    def get_available_name(self, name, max_length=None):
+        # Занятое имя не мешает: _save всё равно заменит его хэшем
+        return name
+
+    def _save(self, name, content):
+        directory = posixpath.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        os.makedirs(self.location, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=self.location, prefix='.upload-'
+        )
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(descriptor, 'wb') as file:
+                for chunk in content.chunks(UPLOAD_CHUNK_SIZE):
+                    digest.update(chunk)
+                    file.write(chunk)
+            hexdigest = digest.hexdigest()
+            name = posixpath.join(
+                directory, hexdigest[:2], hexdigest + extension
+            )
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.remove(temp_path)
+                return name
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            os.chmod(
+                temp_path, self.file_permissions_mode or MEDIA_FILE_PERMISSIONS
+            )
+            os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
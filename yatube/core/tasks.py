@@ -0,0 +1,211 @@
+import json
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import (
+    DatabaseError, IntegrityError, close_old_connections, transaction,
+)
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Task
+
+logger = logging.getLogger('yatube.tasks')
+
+_registry = {}
+
+
+def task(func=None, *, max_attempts=None):
+    '''Регистрирует функцию как задачу очереди под именем
+    <модуль>.<функция>. Задачи приложений лежат в их модулях
+    tasks, воркеры находят их сами.'''
+
+    def register(func):
+        func.task_name = f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts
+        _registry[func.task_name] = func
+        return func
+
+    return register if func is None else register(func)
+
+
+def get_task(name):
+    if name not in _registry:
+        autodiscover_modules('tasks')
+    return _registry[name]
+
+
+def call_task(func, args):
+    '''Выполняет задачу в транзакции: упавшая задача не оставляет
+    половины изменений'''
+    with transaction.atomic():
+        func(*json.loads(args))
+
+
+def enqueue(func, *args, key=None, delay=0):
+    '''Ставит задачу в очередь в текущей транзакции: если транзакция
+    откатится, задачи не будет. Пока в очереди ждёт задача с тем же
+    key, новая не ставится. С TASK_QUEUE_EAGER задача выполняется
+    сразу так же, как у воркера: аргументы проходят через JSON,
+    а ошибка задачи пишется в лог, но не доходит до view.'''
+    payload = json.dumps(args)
+    if settings.TASK_QUEUE_EAGER:
+        try:
+            call_task(func, payload)
+        except Exception:
+            logger.exception('Задача %s упала', func.task_name)
+        return None
+    try:
+        with transaction.atomic():
+            return Task.objects.create(
+                name=func.task_name,
+                args=payload,
+                key=key,
+                max_attempts=func.max_attempts or settings.TASK_MAX_ATTEMPTS,
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+    except IntegrityError:
+        return None
+
+
+def claimable(now):
+    '''Готовые к выполнению задачи и задачи, брошенные воркером,
+    который не уложился в TASK_LEASE_SECONDS'''
+    return Task.objects.filter(
+        Q(status=Task.QUEUED, run_after__lte=now)
+        | Q(status=Task.RUNNING, locked_until__lt=now)
+    )
+
+
+def claim_task():
+    '''Забирает одну задачу. Задача достаётся тому воркеру, чей
+    UPDATE с тем же условием изменил строку, поэтому несколько
+    процессов не выполнят её дважды.'''
+    now = timezone.now()
+    candidates = claimable(now).order_by('run_after', 'pk').values_list(
+        'pk', flat=True
+    )[:settings.TASK_CLAIM_BATCH]
+    for pk in candidates:
+        claimed = claimable(now).filter(pk=pk).update(
+            status=Task.RUNNING,
+            attempts=F('attempts') + 1,
+            locked_until=now + timedelta(seconds=settings.TASK_LEASE_SECONDS),
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def retry_delay(attempts):
+    '''Пауза перед повтором в секундах: удваивается с каждой
+    попыткой, плюс разброс, чтобы повторы не шли одной волной'''
+    delay = min(
+        settings.TASK_RETRY_BACKOFF * 2 ** (attempts - 1),
+        settings.TASK_RETRY_BACKOFF_MAX,
+    )
+    return delay + random.uniform(0, delay / 10)
+
+
+def fail_task(task, error):
+    '''Откладывает упавшую задачу на повтор или, если попытки
+    кончились, оставляет её в очереди упавшей'''
+    tasks = Task.objects.filter(pk=task.pk)
+    if task.attempts >= task.max_attempts:
+        logger.error(
+            'Задача %s (%s) упала после %s попыток',
+            task.name, task.pk, task.attempts,
+        )
+        tasks.update(status=Task.FAILED, locked_until=None, last_error=error)
+        return
+    logger.warning('Задача %s (%s) упала, будет повтор', task.name, task.pk)
+    try:
+        with transaction.atomic():
+            tasks.update(
+                status=Task.QUEUED,
+                locked_until=None,
+                last_error=error,
+                run_after=timezone.now() + timedelta(
+                    seconds=retry_delay(task.attempts)
+                ),
+            )
+    except IntegrityError:
+        # Пока задача выполнялась, её поставили заново с тем же
+        # ключом, новая задача и сделает работу
+        tasks.delete()
+
+
+def run_task(task):
+    '''Выполняет взятую задачу. Возвращает, удалось ли выполнить.'''
+    try:
+        call_task(get_task(task.name), task.args)
+    except Exception:
+        fail_task(task, traceback.format_exc())
+        return False
+    Task.objects.filter(pk=task.pk).delete()
+    return True
+
+
+def run_pending(limit=None):
+    '''Выполняет готовые задачи, пока они есть, но не больше limit.
+    Возвращает число взятых задач.'''
+    count = 0
+    while limit is None or count < limit:
+        task = claim_task()
+        if task is None:
+            break
+        run_task(task)
+        count += 1
+    return count
+
+
+def worker_loop(stop):
+    '''Цикл воркера: выполняет задачи, а когда очередь пуста, ждёт
+    TASK_POLL_INTERVAL секунд или сигнала остановки. Ошибка базы,
+    например блокировка SQLite другим воркером, не останавливает
+    воркер: он ждёт всё дольше и пробует снова. Задача, которую
+    воркер взял, но не успел отметить, вернётся в очередь, когда
+    истечёт TASK_LEASE_SECONDS.'''
+    errors = 0
+    while not stop.is_set():
+        close_old_connections()
+        try:
+            done = run_pending(limit=settings.TASK_CLAIM_BATCH)
+        except DatabaseError:
+            errors += 1
+            logger.exception('Ошибка базы в воркере, попытка %s', errors)
+            stop.wait(min(
+                settings.TASK_POLL_INTERVAL * 2 ** errors,
+                settings.TASK_RETRY_BACKOFF_MAX,
+            ))
+            continue
+        errors = 0
+        if not done:
+            stop.wait(settings.TASK_POLL_INTERVAL)
+
+
+def queue_stats():
+    '''Глубина очереди: число задач по состояниям и именам
+    и сколько ждёт самая старая из готовых к выполнению'''
+    now = timezone.now()
+    by_status = dict.fromkeys(dict(Task.STATUSES), 0)
+    by_name = {}
+    for name, status, count in Task.objects.order_by().values_list(
+        'name', 'status'
+    ).annotate(Count('pk')):
+        by_status[status] += count
+        by_name.setdefault(name, {})[status] = count
+    ready = Task.objects.filter(
+        status=Task.QUEUED, run_after__lte=now
+    ).aggregate(count=Count('pk'), oldest=Min('run_after'))
+    return {
+        **by_status,
+        'ready': ready['count'],
+        'oldest_ready_seconds': round(
+            (now - ready['oldest']).total_seconds(), 3
+        ) if ready['oldest'] else 0,
+        'by_name': by_name,
+    }
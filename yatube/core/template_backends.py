@@ -0,0 +1,73 @@
+import os
+import time
+
+from django.template import (
+    TemplateDoesNotExist, TemplateSyntaxError, engines,
+)
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from . import metrics
+
+
+class InstrumentedTemplate(Template):
+    '''Шаблон, время рендера которого попадает в замеры запроса.
+    Вложенные рендеры, например карточек постов внутри страницы,
+    входят во время внешнего и отдельно не считаются.'''
+
+    def render(self, context=None, request=None):
+        request_metrics = metrics.current()
+        if request_metrics is None:
+            return super().render(context, request)
+        request_metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            request_metrics.template_depth -= 1
+            if not request_metrics.template_depth:
+                request_metrics.template += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    '''Стандартный бэкенд шаблонов Django с замером времени рендера'''
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(
+            self.engine.from_string(template_code), self
+        )
+
+    def get_template(self, template_name):
+        try:
+            return InstrumentedTemplate(
+                self.engine.get_template(template_name), self
+            )
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def project_template_names(backend):
+    '''Имена шаблонов из каталогов DIRS движка, например posts/index.html'''
+    for directory in backend.engine.dirs:
+        for root, _, files in os.walk(directory):
+            for file in sorted(files):
+                yield os.path.relpath(
+                    os.path.join(root, file), directory
+                ).replace(os.sep, '/')
+
+
+def compile_templates():
+    '''Разбирает все шаблоны проекта. С кэширующим загрузчиком
+    разобранные шаблоны остаются в его кэше, и первый запрос
+    их уже не читает и не разбирает. Возвращает число шаблонов
+    и ошибки разбора по именам шаблонов.'''
+    count, errors = 0, {}
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for name in project_template_names(backend):
+            count += 1
+            try:
+                backend.engine.get_template(name)
+            except (TemplateSyntaxError, UnicodeDecodeError) as error:
+                errors[name] = error
+    return count, errors
@@ -0,0 +1,15 @@
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def page_query(context, **params):
+    '''Строка запроса для ссылки пагинатора: параметры текущей страницы
+    (например, поисковый запрос) сохраняются, навигация заменяется.'''
+    query = context['request'].GET.copy()
+    for key in ('page', 'cursor'):
+        query.pop(key, None)
+    for key, value in params.items():
+        query[key] = value
+    return f'?{query.urlencode()}'
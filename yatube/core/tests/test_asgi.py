@@ -0,0 +1,118 @@
+import asyncio
+
+from django.core.wsgi import get_wsgi_application
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from ..asgi import AsgiBridge, environ
+
+
+def run_app(application, scope, body=b''):
+    '''Выполняет ASGI-приложение и собирает отправленные сообщения'''
+    messages = []
+    incoming = [{'type': 'http.request', 'body': body}]
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return messages
+
+
+def http_scope(path, method='GET', headers=()):
+    return {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': b'',
+        'headers': list(headers),
+    }
+
+
+class AsgiBridgeTests(SimpleTestCase):
+    '''Класс для тестирования ASGI-входа поверх WSGI-приложения'''
+
+    def setUp(self):
+        self.bridge = AsgiBridge(get_wsgi_application(), threads=2)
+        self.addCleanup(self.bridge.executor.shutdown)
+
+    def test_django_page(self):
+        '''страница Django отдаётся через ASGI'''
+        messages = run_app(self.bridge, http_scope(reverse('about:tech')))
+        self.assertEqual(messages[0]['type'], 'http.response.start')
+        self.assertEqual(messages[0]['status'], 200)
+        body = b''.join(message.get('body', b'') for message in messages)
+        self.assertIn(b'<html', body.lower())
+        self.assertFalse(messages[-1].get('more_body', False))
+
+    def test_streaming_response(self):
+        '''куски потокового ответа уходят клиенту по мере готовности'''
+        def application(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            yield b'first'
+            yield environ['wsgi.input'].read()
+
+        messages = run_app(
+            AsgiBridge(application, threads=1),
+            http_scope('/', method='POST'),
+            body=b'second',
+        )
+        self.assertEqual(
+            [message.get('body') for message in messages[1:]],
+            [b'first', b'second', b''],
+        )
+
+    def test_error_before_response(self):
+        '''ошибка до начала ответа превращается в 500'''
+        def application(environ, start_response):
+            raise RuntimeError('сбой')
+
+        messages = run_app(
+            AsgiBridge(application, threads=1), http_scope('/')
+        )
+        self.assertEqual(messages[0]['status'], 500)
+
+    def test_environ(self):
+        '''scope переводится в WSGI environ'''
+        result = environ({
+            'type': 'http',
+            'method': 'POST',
+            'path': '/поиск/',
+            'query_string': b'q=1',
+            'headers': [
+                (b'content-type', b'text/plain'),
+                (b'cookie', b'a=1'),
+                (b'cookie', b'b=2'),
+                (b'x-forwarded-for', b'10.0.0.1'),
+            ],
+        }, body=None)
+        self.assertEqual(result['REQUEST_METHOD'], 'POST')
+        self.assertEqual(
+            result['PATH_INFO'].encode('latin1').decode(), '/поиск/'
+        )
+        self.assertEqual(result['QUERY_STRING'], 'q=1')
+        self.assertEqual(result['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(result['HTTP_COOKIE'], 'a=1; b=2')
+        self.assertEqual(result['HTTP_X_FORWARDED_FOR'], '10.0.0.1')
+
+    def test_lifespan(self):
+        '''сервер получает подтверждение запуска и остановки'''
+        incoming = [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}
+        ]
+        messages = []
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(message):
+            messages.append(message['type'])
+
+        asyncio.run(self.bridge({'type': 'lifespan'}, receive, send))
+        self.assertEqual(
+            messages,
+            ['lifespan.startup.complete', 'lifespan.shutdown.complete'],
+        )
@@ -0,0 +1,99 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Group, Post, User
+from ..benchmarks import (
+    compare_results, percentile, run_benchmark, summarize,
+)
+
+
+class BenchmarkTests(TestCase):
+    '''Класс для тестирования бенчмарков маршрутов'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command(
+            'seed_benchmark', users=3, groups=2, posts=30, stdout=StringIO()
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def dataset(self):
+        return {
+            'users': list(User.objects.order_by('username').values_list(
+                'username', 'first_name', 'last_name'
+            )),
+            'groups': list(Group.objects.order_by('slug').values_list(
+                'slug', 'title', 'description'
+            )),
+            'posts': list(Post.objects.order_by('pk').values_list(
+                'text', 'author__username', 'group__slug', 'pub_date'
+            )),
+        }
+
+    def test_seed_is_idempotent(self):
+        '''повторный запуск не дублирует пользователей и сообщества'''
+        call_command(
+            'seed_benchmark', users=3, groups=2, posts=0, stdout=StringIO()
+        )
+        self.assertEqual(User.objects.count(), 3)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 30)
+
+    def test_seed_is_reproducible(self):
+        '''тот же --seed в чистой базе даёт те же данные'''
+        first = self.dataset()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        call_command(
+            'seed_benchmark', users=3, groups=2, posts=30, stdout=StringIO()
+        )
+        self.assertEqual(self.dataset(), first)
+
+    def test_results_cover_routes(self):
+        '''результаты содержат перцентили и число запросов в базу'''
+        results = run_benchmark(
+            2, 0, only=('posts:index', 'posts:profile', 'about:tech')
+        )
+        self.assertEqual(results['meta']['dataset']['posts'], 30)
+        self.assertEqual(len(results['results']), 6)
+        for result in results['results']:
+            with self.subTest(route=result['route'], role=result['role']):
+                self.assertEqual(result['statuses'], [200])
+                for key in ('p50_ms', 'p95_ms', 'p99_ms', 'queries'):
+                    self.assertIn(key, result)
+
+    def test_compare_results(self):
+        '''сравнение находит маршруты с выросшим p95'''
+        baseline = {'results': [
+            {'route': 'posts:index', 'role': 'anonymous', 'p95_ms': 10},
+            {'route': 'about:tech', 'role': 'anonymous', 'p95_ms': 10},
+        ]}
+        current = {'results': [
+            {'route': 'posts:index', 'role': 'anonymous', 'p95_ms': 15},
+            {'route': 'about:tech', 'role': 'anonymous', 'p95_ms': 10.5},
+        ]}
+        regressions = compare_results(baseline, current, 10)
+        self.assertEqual(
+            [item['route'] for item in regressions], ['posts:index']
+        )
+
+    def test_percentile(self):
+        '''перцентиль берётся методом ближайшего ранга'''
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+
+    def test_summarize(self):
+        '''сводка нагрузки считает ошибки и пропускную способность'''
+        summary = summarize([(0.01, True), (0.02, False)], duration=2)
+        self.assertEqual(summary['requests'], 2)
+        self.assertEqual(summary['errors'], 1)
+        self.assertEqual(summary['throughput_rps'], 1)
+        self.assertEqual(summary['p95_ms'], 20)
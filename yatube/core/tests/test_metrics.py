@@ -0,0 +1,71 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from ..metrics import Histogram, registry
+
+
+class RequestMetricsTests(TestCase):
+    '''Класс для тестирования замеров запросов'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='metrics_author')
+        cls.staff = User.objects.create_user(
+            username='metrics_staff', is_staff=True
+        )
+        Post.objects.create(author=cls.user, text='Замеряемый пост')
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+
+    def server_timing(self, response):
+        return dict(
+            item.strip().split(';', 1)
+            for item in response['Server-Timing'].split(',')
+        )
+
+    def test_server_timing_header(self):
+        '''ответ содержит время, запросы в базу, рендер и кэш'''
+        response = self.client.get(reverse('posts:index'))
+        timing = self.server_timing(response)
+        self.assertEqual(set(timing), {'total', 'db', 'tpl', 'cache'})
+        self.assertNotIn('desc="0 queries"', timing['db'])
+        self.assertIn('misses=', timing['cache'])
+
+    @override_settings(FEED_CACHE_SHARED=True)
+    def test_cached_page_counts_cache_hits(self):
+        '''повторный запрос гостя попадает в кэш без запросов в базу'''
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('posts:index'))
+        timing = self.server_timing(response)
+        self.assertIn('desc="0 queries"', timing['db'])
+        self.assertNotIn('hits=0', timing['cache'])
+
+    def test_metrics_are_aggregated_per_view(self):
+        '''замеры копятся по имени view и доступны только персоналу'''
+        for _ in range(3):
+            self.client.get(reverse('posts:index'))
+        self.client.get(reverse('about:tech'))
+        client = Client()
+        client.force_login(self.user)
+        self.assertEqual(
+            client.get(reverse('core:metrics')).status_code, 302
+        )
+        client.force_login(self.staff)
+        snapshot = client.get(reverse('core:metrics')).json()
+        self.assertEqual(snapshot['posts:index']['requests'], 3)
+        self.assertEqual(snapshot['about:tech']['requests'], 1)
+        self.assertEqual(snapshot['posts:index']['total_ms']['count'], 3)
+
+    def test_histogram_percentile(self):
+        '''перцентиль гистограммы - верхняя граница корзины'''
+        histogram = Histogram()
+        for value in (0.5, 3, 3, 40, 7000):
+            histogram.add(value)
+        self.assertEqual(histogram.percentile(50), 5)
+        self.assertEqual(histogram.percentile(80), 50)
+        self.assertEqual(histogram.percentile(99), '+Inf')
@@ -0,0 +1,93 @@
+import os
+import pstats
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+
+class ProfilingTests(TestCase):
+    '''Класс для тестирования профилирования запросов'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='profiled_author')
+        cls.staff = User.objects.create_user(
+            username='profiling_staff', is_staff=True
+        )
+        Post.objects.create(author=cls.user, text='Профилируемый пост')
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.profile_dir = directory.name
+        settings = override_settings(PROFILE_DIR=self.profile_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        self.user_client = Client()
+        self.user_client.force_login(self.user)
+
+    def profiles(self, view='posts.index'):
+        directory = os.path.join(self.profile_dir, view)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(os.listdir(directory))
+
+    def test_staff_gets_cprofile(self):
+        '''персонал получает профиль cProfile по параметру запроса'''
+        response = self.staff_client.get(
+            reverse('posts:index'), {'profile': 'cprofile'}
+        )
+        self.assertTrue(response['X-Profile'].endswith('.prof'))
+        stats = pstats.Stats(response['X-Profile'])
+        self.assertTrue(any(
+            function == 'index' for _, _, function in stats.stats
+        ))
+
+    def test_profile_param_is_ignored_for_users(self):
+        '''обычный пользователь не включает профилирование'''
+        response = self.user_client.get(
+            reverse('posts:index'), {'profile': 'cprofile'}
+        )
+        self.assertFalse(response.has_header('X-Profile'))
+        self.assertEqual(self.profiles(), [])
+
+    @override_settings(PROFILE_SAMPLE_RATE=1, PROFILE_MODE='sampling')
+    def test_sampled_requests_are_profiled(self):
+        '''доля запросов профилируется без участия персонала'''
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('about:tech'))
+        self.assertEqual(len(self.profiles()), 1)
+        self.assertTrue(self.profiles()[0].endswith('.collapsed'))
+        self.assertEqual(len(self.profiles('about.tech')), 1)
+
+    def test_merge_profiles(self):
+        '''профили одной view сводятся в один файл каждого формата'''
+        directory = os.path.join(self.profile_dir, 'posts.index')
+        os.makedirs(directory)
+        for name, lines in (
+            ('1.collapsed', 'main;index 2\nmain;render 1\n'),
+            ('2.collapsed', 'main;index 3\n'),
+        ):
+            with open(os.path.join(directory, name), 'w') as file:
+                file.write(lines)
+        for _ in range(2):
+            self.staff_client.get(
+                reverse('posts:index'), {'profile': 'cprofile'}
+            )
+        call_command('merge_profiles', stdout=StringIO())
+        merged = os.path.join(self.profile_dir, 'merged')
+        with open(os.path.join(merged, 'posts.index.collapsed')) as file:
+            self.assertEqual(
+                file.read(), 'main;index 5\nmain;render 1\n'
+            )
+        pstats.Stats(os.path.join(merged, 'posts.index.prof'))
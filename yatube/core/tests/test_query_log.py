@@ -0,0 +1,90 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from ..query_log import fingerprint, query_stats
+
+
+class QueryLogTests(TestCase):
+    '''Класс для тестирования статистики запросов по отпечаткам'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='query_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='query-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(author=cls.user, text='Пост', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        query_stats.reset()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.stats_dir = os.path.join(directory.name, 'query_stats')
+
+    def test_fingerprint_ignores_values(self):
+        '''запросы, отличающиеся значениями, дают один отпечаток'''
+        first, normalized = fingerprint(
+            "SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'a'"
+        )
+        second, _ = fingerprint(
+            "SELECT * FROM t WHERE id IN (%s)  AND name = 'it''s'"
+        )
+        self.assertEqual(first, second)
+        self.assertEqual(
+            normalized, 'SELECT * FROM t WHERE id IN (...) AND name = ?'
+        )
+
+    def test_queries_are_grouped_by_view(self):
+        '''статистика копится по отпечатку и view'''
+        self.client.get(reverse('posts:index'))
+        self.client.get(
+            reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        )
+        views = {item['view'] for item in query_stats.snapshot()}
+        self.assertIn('posts:index', views)
+        self.assertIn('posts:group_list', views)
+
+    def test_slow_queries_are_logged(self):
+        '''запросы дольше порога пишутся в лог с местом вызова'''
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=0):
+            with self.assertLogs('yatube.slow_queries', 'WARNING') as logs:
+                self.client.get(reverse('posts:index'))
+        self.assertIn('posts:index', logs.output[0])
+
+    def test_query_report(self):
+        '''query_report сводит файлы статистики процессов'''
+        with override_settings(
+            QUERY_STATS_DIR=self.stats_dir, QUERY_STATS_FLUSH_INTERVAL=0
+        ):
+            self.client.get(reverse('posts:index'))
+            stdout = StringIO()
+            call_command(
+                'query_report', view='posts:index', reset=True,
+                stdout=stdout,
+            )
+        self.assertIn('posts:index', stdout.getvalue())
+        self.assertIn('SELECT', stdout.getvalue())
+        self.assertFalse(os.path.exists(self.stats_dir))
+
+    def test_flush_error_is_logged(self):
+        '''ошибка записи статистики пишется в лог, а ответ уходит'''
+        with open(self.stats_dir, 'w'):
+            pass
+        with override_settings(
+            QUERY_STATS_DIR=self.stats_dir, QUERY_STATS_FLUSH_INTERVAL=0
+        ):
+            with self.assertLogs('yatube.slow_queries', 'ERROR') as logs:
+                response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.stats_dir, logs.output[0])
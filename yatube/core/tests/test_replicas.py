@@ -0,0 +1,106 @@
+import os
+import sqlite3
+import tempfile
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import (
+    Client, RequestFactory, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import resolve, reverse
+
+from posts.models import Post, User
+from ..db_routers import ReplicaRouter, primary_reads, set_replica_reads
+from ..middleware import ReplicaRoutingMiddleware
+
+REPLICAS = ('replica_1', 'replica_2')
+
+
+@override_settings(READ_REPLICAS=REPLICAS)
+class ReplicaRoutingTests(TestCase):
+    '''Класс для тестирования маршрутизации чтений в реплики'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='replica_author')
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.middleware = ReplicaRoutingMiddleware(lambda request: None)
+        self.addCleanup(set_replica_reads, False)
+
+    def route(self, address, method='get', **cookies):
+        request = getattr(RequestFactory(), method)(address)
+        request.COOKIES.update(cookies)
+        request.resolver_match = resolve(address)
+        self.middleware.process_view(request, None, (), {})
+        return self.router.db_for_read(Post)
+
+    def test_read_views_use_replicas(self):
+        '''чтения в лентах и на странице поста идут в реплики'''
+        for address in (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('about:tech'),
+        ):
+            with self.subTest(address=address):
+                self.assertIn(self.route(address), REPLICAS)
+
+    def test_writes_and_other_views_use_primary(self):
+        '''записи и остальные view работают с основной базой'''
+        self.assertEqual(self.route(reverse('posts:post_create')), 'default')
+        self.assertEqual(
+            self.route(reverse('posts:index'), method='post'), 'default'
+        )
+        self.route(reverse('posts:index'))
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        with primary_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertFalse(self.router.allow_migrate('replica_1', 'posts'))
+
+    def test_user_reads_own_writes(self):
+        '''после записи пользователь какое-то время читает из основной
+        базы'''
+        client = Client()
+        client.force_login(self.user)
+        response = client.post(
+            reverse('posts:post_create'), data={'text': 'Новый пост'}
+        )
+        cookie = response.cookies[settings.REPLICA_STICKY_COOKIE].value
+        self.assertGreater(float(cookie), time.time())
+        self.assertEqual(
+            self.route(reverse('posts:index'), **{
+                settings.REPLICA_STICKY_COOKIE: cookie
+            }),
+            'default',
+        )
+        self.assertIn(
+            self.route(reverse('posts:index'), **{
+                settings.REPLICA_STICKY_COOKIE: str(time.time() - 1)
+            }),
+            REPLICAS,
+        )
+
+
+class SyncReplicasTests(TransactionTestCase):
+    '''Класс для тестирования копирования базы в реплики'''
+
+    def test_sync_replicas(self):
+        '''sync_replicas копирует основную базу в файлы реплик'''
+        Post.objects.create(
+            author=User.objects.create_user(username='replica_author'),
+            text='Реплицируемый пост',
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'replica.sqlite3')
+        call_command('sync_replicas', path, stdout=StringIO())
+        replica = sqlite3.connect(path)
+        self.addCleanup(replica.close)
+        self.assertEqual(
+            replica.execute('SELECT text FROM posts_post').fetchall(),
+            [('Реплицируемый пост',)],
+        )
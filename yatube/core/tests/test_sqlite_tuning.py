@@ -0,0 +1,19 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from ..signals import tune_sqlite_connection
+
+
+class SqliteTuningTests(TestCase):
+    '''Класс для тестирования настройки соединений SQLite'''
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -1234})
+    def test_pragmas_are_applied(self):
+        '''PRAGMA из профиля применяются к соединению'''
+        tune_sqlite_connection(sender=None, connection=connection)
+        self.assertEqual(self.pragma('cache_size'), -1234)
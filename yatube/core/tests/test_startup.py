@@ -0,0 +1,90 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.checks import Tags, run_checks
+from django.core.management import CommandError, call_command
+from django.template import engines
+from django.test import TestCase, override_settings
+
+from core.benchmarks import first_requests
+from core.startup import warm_up
+from core.template_backends import compile_templates
+
+
+def templates_settings(directory, cached=False):
+    loaders = ['django.template.loaders.filesystem.Loader']
+    if cached:
+        loaders = [('django.template.loaders.cached.Loader', loaders)]
+    return [{
+        **settings.TEMPLATES[0],
+        'DIRS': [directory],
+        'OPTIONS': {**settings.TEMPLATES[0]['OPTIONS'], 'loaders': loaders},
+    }]
+
+
+class StartupTests(TestCase):
+    '''Класс для тестирования прогрева шаблонов и проверки при выкладке'''
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write_template(self, name, content):
+        path = os.path.join(self.directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+
+    def test_project_templates_compile(self):
+        '''все шаблоны проекта разбираются'''
+        count, errors = compile_templates()
+        self.assertGreater(count, 0)
+        self.assertEqual(errors, {})
+
+    def test_broken_template_fails_deploy_check(self):
+        '''check --deploy и warm_templates падают на сломанном шаблоне'''
+        self.write_template('ok.html', '{{ value }}')
+        self.write_template('broken/page.html', '{% if %}')
+        with override_settings(TEMPLATES=templates_settings(self.directory)):
+            errors = run_checks(
+                tags=[Tags.templates], include_deployment_checks=True
+            )
+            self.assertEqual(
+                [error.id for error in errors], ['core.E001']
+            )
+            self.assertIn('broken/page.html', errors[0].msg)
+            with self.assertRaises(CommandError):
+                call_command('warm_templates', stdout=StringIO())
+
+    def test_deploy_check_passes(self):
+        '''на шаблонах проекта проверка при выкладке молчит'''
+        errors = run_checks(
+            tags=[Tags.templates], include_deployment_checks=True
+        )
+        self.assertEqual(
+            [error for error in errors if error.id == 'core.E001'], []
+        )
+
+    def test_warm_up_fills_cached_loader(self):
+        '''прогрев кладёт разобранные шаблоны в кэш загрузчика'''
+        self.write_template('posts/page.html', '{{ value }}')
+        with override_settings(
+            TEMPLATES=templates_settings(self.directory, cached=True)
+        ):
+            self.assertEqual(warm_up(), {})
+            loader = engines.all()[0].engine.template_loaders[0]
+            self.assertEqual(
+                [template.origin.template_name
+                 for template in loader.get_template_cache.values()],
+                ['posts/page.html'],
+            )
+
+    def test_first_requests(self):
+        '''замер первых запросов процесса'''
+        result = first_requests('/', warm=True)
+        self.assertEqual(result['status'], 200)
+        for key in ('warm_ms', 'first_ms', 'second_ms'):
+            self.assertIn(key, result)
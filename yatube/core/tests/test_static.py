@@ -0,0 +1,117 @@
+import gzip
+import os
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.benchmarks import run_transfer_benchmark
+from core.views import accepted_encodings
+
+
+class StaticPipelineTests(TestCase):
+    '''Класс для тестирования сборки и отдачи статики и сжатия ответов'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.settings = override_settings(
+            STATIC_ROOT=cls.directory.name,
+            STATICFILES_STORAGE=(
+                'core.storage.CompressedManifestStaticFilesStorage'
+            ),
+        )
+        cls.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.css_url = staticfiles_storage.url('css/bootstrap.min.css')
+        cls.png_url = staticfiles_storage.url('img/logo.png')
+        with open(
+            os.path.join(settings.BASE_DIR, 'static/css/bootstrap.min.css'),
+            'rb',
+        ) as file:
+            cls.css = file.read()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_collectstatic_compresses_text(self):
+        '''сборка кладёт сжатые копии только рядом с текстовыми файлами'''
+        css = staticfiles_storage.stored_name('css/bootstrap.min.css')
+        png = staticfiles_storage.stored_name('img/logo.png')
+        self.assertNotEqual(css, 'css/bootstrap.min.css')
+        with staticfiles_storage.open(f'{css}.gz') as file:
+            self.assertEqual(gzip.decompress(file.read()), self.css)
+        self.assertFalse(staticfiles_storage.exists(f'{png}.gz'))
+
+    def test_compressed_copy_served(self):
+        '''клиент с gzip получает сжатую копию с вечным кэшем'''
+        response = self.client.get(
+            self.css_url, HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = b''.join(response.streaming_content)
+        response.close()
+        self.assertEqual(gzip.decompress(body), self.css)
+
+    def test_identity_served(self):
+        '''клиент без сжатия получает исходный файл'''
+        response = self.client.get(self.css_url)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), self.css)
+        response.close()
+
+    def test_images_not_compressed(self):
+        '''картинки отдаются как есть'''
+        response = self.client.get(
+            self.png_url, HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('immutable', response['Cache-Control'])
+        response.close()
+
+    def test_missing_file(self):
+        '''несуществующий файл и выход из каталога статики'''
+        response = self.client.get(f'{settings.STATIC_URL}missing.css')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.client.get(f'{settings.STATIC_URL}../manage.py')
+        self.assertNotEqual(response.status_code, HTTPStatus.OK)
+
+    def test_html_gzipped(self):
+        '''страницы сжимаются для клиентов с gzip и ссылаются
+        на статику с хэшем'''
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(self.css_url, gzip.decompress(response.content).decode())
+
+    def test_accepted_encodings(self):
+        '''q=0 запрещает кодировку'''
+        self.assertEqual(
+            accepted_encodings('gzip;q=0, br;q=0.5, Deflate'),
+            {'br', 'deflate'},
+        )
+
+    def test_transfer_benchmark(self):
+        '''сжатие уменьшает байты по сети для главной и её статики'''
+        results = run_transfer_benchmark(reverse('posts:index'))
+        paths = [result['path'] for result in results['results']]
+        self.assertIn(self.css_url, paths)
+        self.assertLess(
+            results['totals']['compressed'], results['totals']['identity']
+        )
@@ -0,0 +1,204 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Post, TimelineEntry, User
+from posts.search import search_posts
+from ..models import Task
+from ..tasks import (
+    enqueue, queue_stats, run_pending, task, worker_loop,
+)
+
+CALLS = []
+STOP = threading.Event()
+
+
+@task
+def record(value):
+    CALLS.append(value)
+
+
+@task(max_attempts=2)
+def broken():
+    raise ValueError('Сломанная задача')
+
+
+@task
+def stop_worker():
+    STOP.set()
+
+
+@override_settings(TASK_QUEUE_EAGER=False)
+class TaskQueueTests(TestCase):
+    '''Класс для тестирования фоновой очереди задач'''
+
+    def setUp(self):
+        CALLS.clear()
+
+    def make_ready(self, **filters):
+        Task.objects.filter(**filters).update(
+            run_after=timezone.now() - timedelta(seconds=1)
+        )
+
+    def test_enqueue_and_run(self):
+        '''задача ждёт воркера, выполняется и удаляется'''
+        enqueue(record, 'значение')
+        self.assertEqual(CALLS, [])
+        self.assertEqual(Task.objects.get().name, record.task_name)
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(CALLS, ['значение'])
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASK_QUEUE_EAGER=True)
+    def test_eager_mode(self):
+        '''без очереди задача выполняется сразу'''
+        enqueue(record, 1)
+        self.assertEqual(CALLS, [1])
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASK_QUEUE_EAGER=True)
+    def test_eager_failure_is_logged(self):
+        '''ошибка задачи без очереди пишется в лог и не доходит
+        до того, кто её поставил'''
+        with self.assertLogs('yatube.tasks', 'ERROR'):
+            enqueue(broken)
+        self.assertFalse(Task.objects.exists())
+
+    def test_idempotency_key(self):
+        '''ждущая задача с тем же ключом не дублируется, а взятая
+        воркером не мешает поставить новую'''
+        enqueue(record, 1, key='record')
+        enqueue(record, 2, key='record')
+        self.assertEqual(Task.objects.count(), 1)
+        Task.objects.update(status=Task.RUNNING)
+        enqueue(record, 3, key='record')
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_rolled_back_transaction_drops_task(self):
+        '''задача ставится в транзакции записи и откатывается с ней'''
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                enqueue(record, 1)
+                raise RuntimeError
+        self.assertFalse(Task.objects.exists())
+
+    def test_retry_with_backoff(self):
+        '''упавшая задача откладывается с растущей паузой,
+        а после всех попыток остаётся упавшей'''
+        enqueue(broken)
+        started = timezone.now()
+        with self.assertLogs('yatube.tasks', 'WARNING'):
+            run_pending()
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, Task.QUEUED)
+        self.assertEqual(failed.attempts, 1)
+        self.assertIn('Сломанная задача', failed.last_error)
+        self.assertGreaterEqual(
+            failed.run_after,
+            started + timedelta(seconds=settings.TASK_RETRY_BACKOFF),
+        )
+        self.assertEqual(run_pending(), 0)
+        self.make_ready()
+        with self.assertLogs('yatube.tasks', 'ERROR'):
+            run_pending()
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, Task.FAILED)
+        self.assertEqual(failed.attempts, 2)
+
+    def test_abandoned_task_reclaimed(self):
+        '''задачу воркера, который пропал, забирает другой'''
+        enqueue(record, 1)
+        Task.objects.update(
+            status=Task.RUNNING,
+            locked_until=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(CALLS, [1])
+
+    def test_queue_stats(self):
+        '''глубина очереди по состояниям, именам и возрасту'''
+        enqueue(record, 1)
+        enqueue(record, 2, delay=60)
+        enqueue(broken)
+        Task.objects.filter(name=broken.task_name).update(
+            status=Task.FAILED
+        )
+        stats = queue_stats()
+        self.assertEqual(stats['queued'], 2)
+        self.assertEqual(stats['failed'], 1)
+        self.assertEqual(stats['ready'], 1)
+        self.assertEqual(stats['by_name'][record.task_name], {'queued': 2})
+        self.assertGreaterEqual(stats['oldest_ready_seconds'], 0)
+        staff = User.objects.create_user(username='tasks_staff', is_staff=True)
+        client = Client()
+        client.force_login(staff)
+        response = client.get(reverse('core:task_metrics'))
+        self.assertEqual(response.json()['queued'], 2)
+
+    def test_run_workers_burst(self):
+        '''run_workers --burst выполняет готовые задачи и выходит'''
+        enqueue(record, 1)
+        enqueue(record, 2)
+        out = StringIO()
+        call_command('run_workers', '--burst', stdout=out)
+        self.assertEqual(sorted(CALLS), [1, 2])
+        self.assertIn('2', out.getvalue())
+
+    def test_post_create_enqueues_side_effects(self):
+        '''публикация поста ставит индексацию и раскладку по лентам
+        в очередь, и они происходят только у воркера'''
+        author = User.objects.create_user(username='tasks_author')
+        follower = User.objects.create_user(username='tasks_follower')
+        follower_client = Client()
+        follower_client.force_login(follower)
+        follower_client.post(reverse(
+            'posts:profile_follow', kwargs={'username': author.username}
+        ))
+        client = Client()
+        client.force_login(author)
+        client.post(reverse('posts:post_create'), data={
+            'text': 'Отложенная индексация',
+        })
+        post = Post.objects.get()
+        self.assertEqual(search_posts('отложенная'), [])
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(Task.objects.count(), 2)
+        run_pending()
+        self.assertEqual(search_posts('отложенная'), [post.pk])
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=follower, post=post).exists()
+        )
+
+
+@override_settings(TASK_QUEUE_EAGER=False, TASK_POLL_INTERVAL=0)
+class WorkerLoopTests(TransactionTestCase):
+    '''Класс для тестирования цикла воркера'''
+
+    def setUp(self):
+        STOP.clear()
+
+    def test_database_error_does_not_stop_worker(self):
+        '''блокировка базы другим воркером не останавливает воркер'''
+        failures = []
+
+        def lock_first_claim(execute, sql, params, many, context):
+            if sql.startswith('UPDATE "core_task"') and not failures:
+                failures.append(sql)
+                raise OperationalError('database is locked')
+            return execute(sql, params, many, context)
+
+        enqueue(stop_worker)
+        with connection.execute_wrapper(lock_first_claim):
+            with self.assertLogs('yatube.tasks', 'ERROR'):
+                worker_loop(STOP)
+        self.assertEqual(len(failures), 1)
+        self.assertFalse(Task.objects.exists())
@@ -0,0 +1,48 @@
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults, settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+
+class StoredThumbnailBackend(ThumbnailBackend):
+    '''Бэкенд sorl-thumbnail, который умеет только найти готовую
+    миниатюру, не создавая её. Страницы берут миниатюры так,
+    а создаёт их задача очереди через обычный get_thumbnail.'''
+
+    def get_stored_thumbnail(self, file_, geometry_string, **options):
+        '''Готовая миниатюра из хранилища ключ-значение или None.
+        Параметры дополняются так же, как в get_thumbnail, чтобы
+        имя файла миниатюры совпало с созданным задачей.'''
+        source = ImageFile(file_)
+        if settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(settings, attr)
+            if value != getattr(defaults, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+class HitCachingKVStore(cached_db_kvstore.KVStore):
+    '''Хранилище ключ-значение sorl-thumbnail в базе с кэшем, который
+    помнит только найденные миниатюры. Стандартное запоминает и промах
+    на THUMBNAIL_CACHE_TIMEOUT: страница, открытая до задачи очереди,
+    навсегда оставила бы процесс без миниатюры, ведь воркер обновляет
+    только свой кэш. Найденная миниатюра не меняется: её имя выведено
+    из имени картинки, которое выведено из содержимого.'''
+
+    def _get_raw(self, key):
+        value = self.cache.get(key)
+        if value is None or value == cached_db_kvstore.EMPTY_VALUE:
+            value = KVStoreModel.objects.filter(key=key).values_list(
+                'value', flat=True
+            ).first()
+            if value is None:
+                return None
+            self.cache.set(key, value, settings.THUMBNAIL_CACHE_TIMEOUT)
+        return value
@@ -0,0 +1,23 @@
+import re
+
+from django.conf import settings
+from django.urls import path, re_path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('metrics/', views.metrics, name='metrics'),
+    path('metrics/tasks/', views.task_metrics, name='task_metrics'),
+    re_path(
+        r'^{}(?P<path>.+)$'.format(re.escape(settings.STATIC_URL.lstrip('/'))),
+        views.static,
+        name='static',
+    ),
+    re_path(
+        r'^{}(?P<path>.+)$'.format(re.escape(settings.MEDIA_URL.lstrip('/'))),
+        views.media,
+        name='media',
+    ),
+]
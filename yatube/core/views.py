@@ -0,0 +1,149 @@
+import mimetypes
+import os
+import posixpath
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import (
+    FileResponse, Http404, HttpResponseNotModified, JsonResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+from sorl.thumbnail.conf import settings as thumbnail_settings
+
+from .metrics import registry
+from .storage import (
+    available_encodings, is_compressible, is_content_addressed,
+)
+from .tasks import queue_stats
+
+
+@staff_member_required
+def metrics(request):
+    '''Гистограммы замеров запросов по view этого процесса'''
+    return JsonResponse(
+        registry.snapshot(), json_dumps_params={'ensure_ascii': False}
+    )
+
+
+@staff_member_required
+def task_metrics(request):
+    '''Глубина фоновой очереди задач'''
+    return JsonResponse(
+        queue_stats(), json_dumps_params={'ensure_ascii': False}
+    )
+
+
+def accepted_encodings(header):
+    '''Кодировки из Accept-Encoding, кроме запрещённых через q=0'''
+    encodings = set()
+    for item in header.split(','):
+        encoding, _, params = item.partition(';')
+        quality = params.strip().replace(' ', '')
+        if quality in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        encodings.add(encoding.strip().lower())
+    return encodings
+
+
+def is_hashed(name):
+    '''Имя файла с хэшем содержимого из манифеста collectstatic'''
+    hashed_files = getattr(staticfiles_storage, 'hashed_files', {})
+    return name in hashed_files.values()
+
+
+def choose_encoding(request, name, full_path):
+    '''Кодировка и суффикс сжатой копии файла для клиента'''
+    if is_compressible(name):
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        for encoding, suffix in available_encodings():
+            if encoding in accepted and os.path.isfile(full_path + suffix):
+                return encoding, suffix
+    return None, ''
+
+
+@require_safe
+def static(request, path):
+    '''Отдаёт собранную collectstatic статику из STATIC_ROOT.
+    Сжатая при сборке копия уходит клиенту, который её принимает,
+    а файлы с хэшем в имени браузеры кэшируют на STATIC_MAX_AGE.'''
+    name = posixpath.normpath(path).lstrip('/')
+    full_path = safe_join(settings.STATIC_ROOT, name)
+    if not os.path.isfile(full_path):
+        raise Http404(f'Файл {name} не найден')
+    stat = os.stat(full_path)
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'),
+        stat.st_mtime,
+        stat.st_size,
+    ):
+        return HttpResponseNotModified()
+    encoding, suffix = choose_encoding(request, name, full_path)
+    content_type, _ = mimetypes.guess_type(full_path)
+    response = FileResponse(
+        open(full_path + suffix, 'rb'),
+        content_type=content_type or 'application/octet-stream',
+    )
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if encoding is not None:
+        response['Content-Encoding'] = encoding
+    if is_compressible(name):
+        patch_vary_headers(response, ('Accept-Encoding',))
+    if is_hashed(name):
+        patch_cache_control(
+            response, public=True, max_age=settings.STATIC_MAX_AGE,
+            immutable=True,
+        )
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.STATIC_FALLBACK_MAX_AGE,
+        )
+    return response
+
+
+def is_immutable_media(name):
+    '''Файл медиа, который не меняется под своим именем: картинка
+    с хэшем содержимого в имени или миниатюра, имя которой выводится
+    из имени картинки и параметров миниатюры'''
+    return is_content_addressed(name) or name.startswith(
+        thumbnail_settings.THUMBNAIL_PREFIX
+    )
+
+
+@require_safe
+def media(request, path):
+    '''Отдаёт загруженные файлы из MEDIA_ROOT. Неизменяемые
+    файлы браузеры кэшируют на STATIC_MAX_AGE.'''
+    name = posixpath.normpath(path).lstrip('/')
+    full_path = safe_join(settings.MEDIA_ROOT, name)
+    if not os.path.isfile(full_path):
+        raise Http404(f'Файл {name} не найден')
+    stat = os.stat(full_path)
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'),
+        stat.st_mtime,
+        stat.st_size,
+    ):
+        return HttpResponseNotModified()
+    content_type, _ = mimetypes.guess_type(full_path)
+    response = FileResponse(
+        open(full_path, 'rb'),
+        content_type=content_type or 'application/octet-stream',
+    )
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if is_immutable_media(name):
+        patch_cache_control(
+            response, public=True, max_age=settings.STATIC_MAX_AGE,
+            immutable=True,
+        )
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.STATIC_FALLBACK_MAX_AGE,
+        )
+    return response
@@ -0,0 +1,54 @@
+'''Процессы воркеров очереди. Модуль не импортирует модели, чтобы
+процесс, запущенный через spawn, успел настроить Django до них.'''
+import multiprocessing
+import signal
+
+import django
+
+
+def worker_process(stop):
+    '''Точка входа процесса воркера. SIGINT от Ctrl+C получает вся
+    группа процессов, его обрабатывает родитель, а SIGTERM дочерний
+    процесс доводит до конца текущей задачи.'''
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    django.setup()
+    from django.db import connections
+    from django.utils.module_loading import autodiscover_modules
+
+    from .tasks import worker_loop
+
+    autodiscover_modules('tasks')
+    try:
+        worker_loop(stop)
+    finally:
+        connections.close_all()
+
+
+def run_workers(processes):
+    '''Запускает processes воркеров и ждёт их. SIGINT и SIGTERM
+    родителю останавливают воркеры после их текущих задач.'''
+    from django.db import connections
+
+    # Дочерние процессы не должны делить соединения родителя
+    connections.close_all()
+    stop = multiprocessing.Event()
+    workers = [
+        multiprocessing.Process(
+            target=worker_process, args=(stop,), name=f'worker-{number}'
+        )
+        for number in range(processes)
+    ]
+    previous = {
+        signum: signal.signal(signum, lambda signum, frame: stop.set())
+        for signum in (signal.SIGINT, signal.SIGTERM)
+    }
+    try:
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        stop.set()
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Post, Group
+from .models import Follow, MediaBlob, Post, Group
+from .search import filter_posts
 
 
 @admin.register(Post)
@@ -19,5 +20,39 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        '''Поиск в админке идёт по полнотекстовому индексу,
+        а не через LIKE по всей таблице постов. В отличие от поиска
+        на сайте, находятся все подходящие посты, а не первые
+        SEARCH_RESULTS_LIMIT самых релевантных.'''
+        if not search_term:
+            return queryset, False
+        return filter_posts(queryset, search_term), False
+
 
 admin.site.register(Group)
+
+
+@admin.register(Follow)
+class FollowAdmin(admin.ModelAdmin):
+    '''Подписки пользователей на авторов'''
+
+    list_display = (
+        'pk',
+        'user',
+        'author',
+    )
+    search_fields = ('user__username', 'author__username')
+
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    '''Файлы картинок постов и ссылки на них'''
+
+    list_display = (
+        'name',
+        'size',
+        'refs_count',
+    )
+    search_fields = ('name',)
+    readonly_fields = ('name', 'size', 'refs_count')
@@ -5,3 +5,6 @@ class PostsConfig(AppConfig):
     '''Класс, конфигурирующий приложение'''
 
     name = 'posts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,114 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response, patch_vary_headers,
+)
+
+FEED_VERSION_KEY = 'feed-version:{}'
+FEED_PAGE_KEY = 'feed-response:{}:{}:{}'
+
+
+def index_feed(**kwargs):
+    return 'index'
+
+
+def group_feed(slug):
+    return f'group:{slug}'
+
+
+def profile_feed(username):
+    return f'profile:{username}'
+
+
+def feed_version_key(feed):
+    '''Ключ версии ленты. В имени ленты - адрес сообщества или логин
+    в любом алфавите, memcached таких ключей не принимает.'''
+    return FEED_VERSION_KEY.format(hashlib.md5(feed.encode()).hexdigest())
+
+
+def get_feed_version(feed):
+    '''Текущая версия ленты. Версия меняется при каждой записи,
+    затронувшей ленту, и входит в ключи её закэшированных страниц.'''
+    key = feed_version_key(feed)
+    version = cache.get(key)
+    if version is None:
+        # Версия от времени не совпадёт со старыми ключами,
+        # даже если кэш успел вытеснить прежнюю версию
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key, 0)
+    return version
+
+
+def bump_feeds(*feeds):
+    '''Сбрасывает все закэшированные страницы перечисленных лент'''
+    for feed in set(feeds):
+        try:
+            cache.incr(feed_version_key(feed))
+        except ValueError:
+            # Версии нет - значит, и страниц с ней в кэше нет
+            pass
+
+
+def feed_page_key(feed, request):
+    name = hashlib.md5(feed.encode()).hexdigest()
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return FEED_PAGE_KEY.format(name, get_feed_version(feed), path)
+
+
+def feed_cache_timeout(request):
+    '''Страница, прочитанная из реплики, могла отстать от основной
+    базы, поэтому живёт в кэше не дольше окна чтения своих записей'''
+    if getattr(request, 'replica_reads', False):
+        return min(
+            settings.FEED_CACHE_TIMEOUT, settings.REPLICA_STICKY_SECONDS
+        )
+    return settings.FEED_CACHE_TIMEOUT
+
+
+def cache_feed(feed_name):
+    '''Кэширует страницы ленты для анонимных пользователей.
+    feed_name получает именованные аргументы view-функции
+    и возвращает имя ленты, по которому страницы сбрасываются.
+    Вместе со страницей хранится её ETag, поэтому на повторный
+    условный запрос закэшированной страницы ответ 304 уходит
+    без запросов в базу. Без общего кэша ничего не кэширует,
+    см. FEED_CACHE_SHARED.'''
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                not settings.FEED_CACHE_SHARED
+                or request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated
+            ):
+                return view(request, *args, **kwargs)
+            key = feed_page_key(feed_name(**kwargs), request)
+            cached = cache.get(key)
+            if cached is not None:
+                content, etag = cached
+                response = HttpResponse(content)
+                if etag is not None:
+                    response['ETag'] = etag
+                    response = get_conditional_response(
+                        request, etag=etag, response=response
+                    )
+            else:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    cache.set(
+                        key,
+                        (response.content, response.get('ETag')),
+                        feed_cache_timeout(request),
+                    )
+            patch_vary_headers(response, ('Cookie',))
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,98 @@
+import hashlib
+
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .cache import get_feed_version, group_feed, profile_feed
+from .models import Follow, Group, Post, User
+
+
+def make_etag(request, *parts):
+    '''ETag страницы по её данным. Кроме данных в него входят
+    выкладка (шаблоны могли измениться), пользователь (шапка
+    и кнопки зависят от него) и год в подвале страницы.'''
+    parts = (
+        settings.RELEASE,
+        request.user.pk,
+        timezone.localdate().year,
+    ) + parts
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def last_updated(**filters):
+    '''Время последнего изменения постов, берётся одной строкой
+    индекса по автору или сообществу и времени изменения'''
+    return Subquery(
+        Post.objects.filter(**filters).order_by('-updated').values(
+            'updated'
+        )[:1]
+    )
+
+
+def post_etag(request, post_id):
+    '''ETag страницы поста: пост, его автор с числом постов
+    и сообщество - всё, что показывает страница'''
+    row = Post.objects.filter(pk=post_id).values_list(
+        'updated',
+        'author__username',
+        'author__first_name',
+        'author__last_name',
+        'author__posts_counter__posts_count',
+        'group__slug',
+        'group__title',
+    ).first()
+    if row is None:
+        return None
+    return make_etag(request, post_id, *row)
+
+
+def group_etag(request, slug):
+    '''ETag страницы сообщества. Удаление поста меняет счётчик,
+    создание и правка - время последнего изменения, а переименование
+    авторов и сообществ в карточках учитывает версия ленты. Версии
+    без общего кэша не видят записей других процессов, и страница
+    отдаётся без ETag.'''
+    if not settings.FEED_CACHE_SHARED:
+        return None
+    row = Group.objects.filter(slug=slug).annotate(
+        last_updated=last_updated(group=OuterRef('pk'))
+    ).values_list(
+        'pk', 'title', 'description', 'posts_count', 'last_updated'
+    ).first()
+    if row is None:
+        return None
+    return make_etag(request, get_feed_version(group_feed(slug)), *row)
+
+
+def profile_etag(request, username):
+    '''ETag страницы профиля, устроен как ETag страницы сообщества.
+    Пользователю страница показывает ещё и его подписку на автора
+    в форме с CSRF-токеном. Токен меняется при входе, и ответ 304
+    оставил бы в форме прежний - подписка упала бы с 403.'''
+    if not settings.FEED_CACHE_SHARED:
+        return None
+    row = User.objects.filter(username=username).annotate(
+        last_updated=last_updated(author=OuterRef('pk'))
+    ).values_list(
+        'pk',
+        'first_name',
+        'last_name',
+        'posts_counter__posts_count',
+        'last_updated',
+    ).first()
+    if row is None:
+        return None
+    following = csrf_cookie = None
+    if request.user.is_authenticated:
+        following = Follow.objects.filter(
+            user=request.user, author_id=row[0]
+        ).exists()
+        csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+    return make_etag(
+        request,
+        get_feed_version(profile_feed(username)),
+        following,
+        csrf_cookie,
+        *row,
+    )
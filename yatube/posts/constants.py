@@ -1,6 +1,39 @@
 '''Список констант проекта'''
 LIMIT_COUNTS_POSTS = 10
+# Сколько номеров страниц показывать по обе стороны от текущей
+PAGE_WINDOW = 2
+FEED_ORDERING = ('-pub_date', '-pk')
+HOME_FEED_SIZE = LIMIT_COUNTS_POSTS * 5
+# Сколько последних постов автора попадает в ленту нового подписчика
+FOLLOW_BACKFILL_LIMIT = 1000
+FEED_FIELDS = (
+    'text',
+    'pub_date',
+    'version',
+    'image',
+    'author',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group',
+    'group__title',
+    'group__slug',
+)
+# Поля автора, которыми подписаны его посты в лентах
+AUTHOR_LABEL_FIELDS = ('username', 'first_name', 'last_name')
+# Миниатюры картинок постов: геометрия и параметры sorl-thumbnail
+# для карточки в лентах и для страницы поста
+THUMBNAIL_SIZES = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+    'detail': ('960x540', {'upscale': False}),
+}
 STRING_LENGHT_LIMIT = 30
+SEARCH_RESULTS_LIMIT = 500
+SEARCH_RECENCY_DAYS = 365
+SEARCH_TERM_LENGTH_LIMIT = 64
+IMPORT_BATCH_SIZE = 1000
+IMPORT_BATCHES_PER_TRANSACTION = 10
+EXPORT_CHUNK_SIZE = 2000
 
 '''Константы для тестов'''
 COUNT_POSTS_LIMIT_1 = 10
@@ -0,0 +1,82 @@
+from django.db.models import Count, F
+
+from .models import AuthorPostsCounter, Follow, Group, Post
+
+
+def change_author_counter(author_id, field, delta):
+    '''Сдвигает поле field счётчика автора на delta. Строку счётчика
+    создаёт первое изменение, одновременное с ним второе увеличит
+    уже созданную строку.'''
+    counters = AuthorPostsCounter.objects.filter(author_id=author_id)
+    if delta < 0:
+        counters = counters.filter(**{f'{field}__gte': -delta})
+    if counters.update(**{field: F(field) + delta}) or delta < 0:
+        return
+    _, created = AuthorPostsCounter.objects.get_or_create(
+        author_id=author_id, defaults={field: delta}
+    )
+    if not created:
+        AuthorPostsCounter.objects.filter(author_id=author_id).update(
+            **{field: F(field) + delta}
+        )
+
+
+def change_author_count(author_id, delta):
+    '''Сдвигает счётчик постов автора на delta'''
+    change_author_counter(author_id, 'posts_count', delta)
+
+
+def change_followers_count(author_id, delta):
+    '''Сдвигает счётчик подписчиков автора на delta'''
+    change_author_counter(author_id, 'followers_count', delta)
+
+
+def change_group_count(group_id, delta):
+    '''Сдвигает счётчик постов сообщества на delta'''
+    if group_id is None:
+        return
+    groups = Group.objects.filter(pk=group_id)
+    if delta < 0:
+        groups = groups.filter(posts_count__gte=-delta)
+    groups.update(posts_count=F('posts_count') + delta)
+
+
+def get_author_posts_count(author):
+    '''Количество постов автора из хранимого счётчика.
+    Автор должен быть получен с select_related('posts_counter'),
+    иначе обращение к счётчику обойдётся в отдельный запрос.'''
+    counter = getattr(author, 'posts_counter', None)
+    return counter.posts_count if counter is not None else 0
+
+
+def recount_posts():
+    '''Пересчитывает все счётчики постов по таблице постов'''
+    authors = dict(
+        Post.objects.order_by().values_list('author').annotate(Count('pk'))
+    )
+    AuthorPostsCounter.objects.exclude(author_id__in=authors).update(
+        posts_count=0
+    )
+    for author_id, total in authors.items():
+        AuthorPostsCounter.objects.update_or_create(
+            author_id=author_id, defaults={'posts_count': total}
+        )
+    followers = dict(
+        Follow.objects.order_by().values_list('author').annotate(Count('pk'))
+    )
+    AuthorPostsCounter.objects.exclude(author_id__in=followers).update(
+        followers_count=0
+    )
+    for author_id, total in followers.items():
+        AuthorPostsCounter.objects.update_or_create(
+            author_id=author_id, defaults={'followers_count': total}
+        )
+    groups = dict(
+        Post.objects.filter(group__isnull=False).order_by().values_list(
+            'group'
+        ).annotate(Count('pk'))
+    )
+    Group.objects.exclude(pk__in=groups).update(posts_count=0)
+    for group_id, total in groups.items():
+        Group.objects.filter(pk=group_id).update(posts_count=total)
+    return len(authors), len(groups)
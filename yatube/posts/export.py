@@ -0,0 +1,105 @@
+import csv
+import json
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .constants import EXPORT_CHUNK_SIZE
+from .models import Group, Post, User
+
+EXPORT_FORMATS = ('jsonl', 'csv')
+
+# Что выгружается: queryset и пары (колонка, поле модели).
+# Колонки постов совпадают с форматом команды import_posts.
+EXPORT_KINDS = {
+    'posts': (
+        lambda: Post.objects.order_by('pk'),
+        (
+            ('text', 'text'),
+            ('author', 'author__username'),
+            ('group', 'group__slug'),
+            ('pub_date', 'pub_date'),
+        ),
+    ),
+    'groups': (
+        lambda: Group.objects.order_by('pk'),
+        (
+            ('title', 'title'),
+            ('slug', 'slug'),
+            ('description', 'description'),
+        ),
+    ),
+    'users': (
+        lambda: User.objects.order_by('pk'),
+        (
+            ('username', 'username'),
+            ('first_name', 'first_name'),
+            ('last_name', 'last_name'),
+            ('date_joined', 'date_joined'),
+        ),
+    ),
+}
+
+
+class EchoBuffer:
+    '''Псевдофайл для csv.writer: возвращает строку вместо записи'''
+
+    def write(self, value):
+        return value
+
+
+def export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def parse_export_date(value):
+    '''Дата или дата со временем в ISO 8601, для неверной - ValueError'''
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Некорректная дата: {value!r}')
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, timezone.utc)
+    return moment
+
+
+def export_queryset(kind='posts', group=None, author=None,
+                    since=None, until=None):
+    '''Строки выгрузки в виде кортежей значений полей.
+    Посты можно отфильтровать по сообществу, автору и дате
+    публикации: since включительно, until - не включая.'''
+    queryset, columns = EXPORT_KINDS[kind]
+    queryset = queryset()
+    filters = {
+        'group__slug': group,
+        'author__username': author,
+        'pub_date__gte': since,
+        'pub_date__lt': until,
+    }
+    filters = {key: value for key, value in filters.items() if value}
+    if filters:
+        if kind != 'posts':
+            raise ValueError('Фильтры применимы только к постам')
+        queryset = queryset.filter(**filters)
+    return queryset.values_list(*(field for _, field in columns))
+
+
+def export_lines(kind, rows, file_format):
+    '''Построчно выдаёт выгрузку в JSONL или CSV.
+    rows читаются из базы кусками, поэтому память не растёт
+    с размером таблицы.'''
+    header = [column for column, _ in EXPORT_KINDS[kind][1]]
+    rows = rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    if file_format == 'csv':
+        writer = csv.writer(EchoBuffer())
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(export_value(value) for value in row)
+        return
+    for row in rows:
+        yield json.dumps(
+            dict(zip(header, map(export_value, row))), ensure_ascii=False
+        ) + '\n'
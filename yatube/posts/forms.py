@@ -9,9 +9,14 @@ class PostForm(forms.ModelForm):
     class Meta:
 
         model = Post
-        fields = ('text', 'group')
-        labels = {'text': 'Текст поста', 'group': 'Группа поста'}
+        fields = ('text', 'group', 'image')
+        labels = {
+            'text': 'Текст поста',
+            'group': 'Группа поста',
+            'image': 'Картинка',
+        }
         help_texts = {
             'text': 'Текст создаваемого поста',
             'group': 'Выбор группы для поста',
+            'image': 'Картинка к посту',
         }
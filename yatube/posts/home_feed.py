@@ -0,0 +1,207 @@
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.db_routers import primary_reads
+
+from .constants import FEED_ORDERING, HOME_FEED_SIZE
+from .models import Post
+from .utils import CURSOR_NEXT, FeedPaginator, feed_posts
+
+HOME_FEED_KEY = 'home-feed'
+HOME_FEED_GENERATION_KEY = 'home-feed-generation'
+HOME_FEED_REBUILD_KEY = 'home-feed-rebuild:{}'
+
+
+def feed_key(post):
+    '''Ключ сортировки ленты: чем новее пост, тем больше ключ'''
+    return post.pub_date, post.pk
+
+
+class HomeFeed:
+    '''Материализованные последние HOME_FEED_SIZE постов главной ленты.
+    Общая копия лежит в кэше и меняется при записи постов, каждый
+    процесс держит свой кольцевой буфер и перечитывает общую копию,
+    только когда сменилось её поколение.
+
+    Поколение - счётчик в кэше, и каждая запись окна продвигает его
+    атомарным incr. Запись сохраняет окно, только если сдвинула
+    поколение ровно на единицу от прочитанного, то есть между чтением
+    и записью никто больше окно не менял. Иначе окно, сохранённое
+    под чужим поколением, устаревает и собирается заново из базы:
+    одновременные записи не теряют постов.'''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = None
+        self._posts = deque(maxlen=HOME_FEED_SIZE)
+        self._total = 0
+
+    @property
+    def enabled(self):
+        return settings.HOME_FEED_WINDOW
+
+    def _next_generation(self):
+        try:
+            return cache.incr(HOME_FEED_GENERATION_KEY)
+        except ValueError:
+            # Поколение от времени не совпадёт с поколением окна,
+            # сохранённого до того, как кэш вытеснил счётчик
+            cache.add(HOME_FEED_GENERATION_KEY, time.time_ns(), None)
+            return cache.incr(HOME_FEED_GENERATION_KEY)
+
+    def _store(self, generation, posts, total):
+        '''Сохраняет окно, прочитанное или собранное при поколении
+        generation. Возвращает состояние окна или None, если окно
+        за это время менял кто-то ещё.'''
+        new_generation = self._next_generation()
+        if generation is None or new_generation != generation + 1:
+            return None
+        state = (new_generation, posts, total)
+        cache.set(HOME_FEED_KEY, state, settings.FEED_CACHE_TIMEOUT)
+        return state
+
+    def _rebuild(self, generation):
+        if generation is None:
+            generation = self._next_generation()
+        # Окно живёт до следующей записи, поэтому не берётся
+        # из реплики, которая может отставать
+        with primary_reads():
+            posts = list(
+                feed_posts().order_by(*FEED_ORDERING)[:HOME_FEED_SIZE]
+            )
+            total = Post.objects.count()
+        # Сохраняет окно один из читателей, собравших его при этом
+        # поколении, иначе они сдвигали бы поколение друг другу
+        state = None
+        if cache.add(
+            HOME_FEED_REBUILD_KEY.format(generation), True,
+            settings.FEED_CACHE_TIMEOUT,
+        ):
+            state = self._store(generation, posts, total)
+        # Окно, которое не удалось сохранить, годится для этого
+        # запроса, но не запоминается процессом
+        return state or (None, posts, total)
+
+    def snapshot(self):
+        '''Окно последних постов и общее число постов'''
+        generation = cache.get(HOME_FEED_GENERATION_KEY)
+        with self._lock:
+            if generation is None or generation != self._generation:
+                state = cache.get(HOME_FEED_KEY)
+                if state is None or state[0] != generation:
+                    state = self._rebuild(generation)
+                generation, posts, total = state
+                self._generation = generation
+                self._posts = deque(posts, maxlen=HOME_FEED_SIZE)
+                self._total = total
+            return list(self._posts), self._total
+
+    def push(self, post_id):
+        '''Добавляет новый пост в начало окна'''
+        if not self.enabled:
+            return
+        post = feed_posts(pk=post_id).first()
+        if post is None:
+            return
+
+        def change(posts, total):
+            if posts and feed_key(post) < feed_key(posts[0]):
+                # Пост старше начала окна: проще собрать окно заново
+                return None
+            posts.appendleft(post)
+            return total + 1
+
+        self._apply(change)
+
+    def replace(self, post_id):
+        '''Обновляет изменённый пост внутри окна'''
+        if not self.enabled:
+            return
+        post = feed_posts(pk=post_id).first()
+        if post is None:
+            return
+
+        def change(posts, total):
+            for position, cached in enumerate(posts):
+                if cached.pk == post.pk:
+                    posts[position] = post
+            return total
+
+        self._apply(change)
+
+    def remove(self, post_id):
+        '''Убирает удалённый пост из окна'''
+        if not self.enabled:
+            return
+
+        def change(posts, total):
+            for cached in list(posts):
+                if cached.pk == post_id:
+                    posts.remove(cached)
+            total = max(total - 1, 0)
+            if len(posts) < min(total, HOME_FEED_SIZE // 2):
+                # Окно слишком похудело: проще собрать его заново
+                return None
+            return total
+
+        self._apply(change)
+
+    def _apply(self, change):
+        generation = cache.get(HOME_FEED_GENERATION_KEY)
+        state = cache.get(HOME_FEED_KEY)
+        if state is None or state[0] != generation:
+            # Окна нет или оно устарело. Сдвиг поколения не даст
+            # сохранить окно, которое сейчас собирается без этой записи.
+            self.reset()
+            return
+        posts = deque(state[1], maxlen=HOME_FEED_SIZE)
+        total = change(posts, state[2])
+        if total is None or self._store(
+            generation, list(posts), total
+        ) is None:
+            self.reset()
+
+    def reset(self):
+        '''Сбрасывает окно, оно соберётся из базы при следующем чтении'''
+        self._next_generation()
+
+
+home_feed = HomeFeed()
+
+
+class HomeFeedPaginator(FeedPaginator):
+    '''Пагинатор главной ленты: страницы внутри материализованного окна
+    отдаются из памяти, дальше окна - запросом в базу'''
+
+    def __init__(self, object_list, per_page, window, total, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.window = window
+        self.count = total
+
+    def _covers(self, stop):
+        return stop <= len(self.window) or len(self.window) >= self.count
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if not self._covers(top):
+            return super().page(number)
+        return self._get_page(self.window[bottom:top], number, self)
+
+    def keyset_posts(self, direction, pub_date, pk, limit):
+        key = (pub_date, pk)
+        if direction == CURSOR_NEXT:
+            older = [post for post in self.window if feed_key(post) < key]
+            start = len(self.window) - len(older)
+            if self._covers(start + limit):
+                return older[:limit]
+        else:
+            newer = [post for post in self.window if feed_key(post) > key]
+            if len(newer) < len(self.window):
+                return newer[::-1][:limit]
+        return super().keyset_posts(direction, pub_date, pk, limit)
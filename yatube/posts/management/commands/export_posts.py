@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import (
+    EXPORT_FORMATS, EXPORT_KINDS, export_lines, export_queryset,
+    parse_export_date,
+)
+
+
+class Command(BaseCommand):
+    '''Построчно выгружает посты, сообщества или пользователей'''
+
+    help = (
+        'Выгружает посты, сообщества или пользователей в JSONL или CSV, '
+        'не загружая таблицу в память. Выгрузку постов можно загрузить '
+        'обратно командой import_posts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            choices=tuple(EXPORT_KINDS),
+            default='posts',
+            help='Что выгружать',
+        )
+        parser.add_argument(
+            '--format',
+            choices=EXPORT_FORMATS,
+            default='jsonl',
+            help='Формат выгрузки',
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл выгрузки, по умолчанию стандартный вывод',
+        )
+        parser.add_argument('--group', help='Адрес сообщества постов')
+        parser.add_argument('--author', help='Имя пользователя автора')
+        parser.add_argument(
+            '--since', help='Посты, опубликованные с этой даты'
+        )
+        parser.add_argument(
+            '--until', help='Посты, опубликованные до этой даты'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            rows = export_queryset(
+                options['kind'],
+                group=options['group'],
+                author=options['author'],
+                since=options['since'] and parse_export_date(
+                    options['since']
+                ),
+                until=options['until'] and parse_export_date(
+                    options['until']
+                ),
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        lines = export_lines(options['kind'], rows, options['format'])
+        if options['output'] is None:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        try:
+            file = open(
+                options['output'], 'w', newline='', encoding='utf-8'
+            )
+        except OSError as error:
+            raise CommandError(
+                f'Не удалось открыть {options["output"]}: {error}'
+            )
+        with file:
+            file.writelines(lines)
@@ -0,0 +1,248 @@
+import csv
+import json
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.cache import bump_feeds, group_feed, index_feed, profile_feed
+from posts.constants import IMPORT_BATCH_SIZE, IMPORT_BATCHES_PER_TRANSACTION
+from posts.counters import change_author_count, change_group_count
+from posts.home_feed import home_feed
+from posts.models import Group, Post, User
+from posts.search import get_search_backend
+from posts.timeline import fan_out_posts
+
+FORMATS = ('jsonl', 'csv')
+
+
+class RecordError(ValueError):
+    '''Строка файла не может быть импортирована'''
+
+
+def read_records(file, file_format):
+    '''Построчно читает записи файла, не загружая его целиком'''
+    if file_format == 'csv':
+        # В строке 1 заголовок, записи начинаются со строки 2
+        yield from enumerate(csv.DictReader(file), start=2)
+        return
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            yield line_number, RecordError(f'некорректный JSON: {error}')
+            continue
+        yield line_number, record
+
+
+class Command(BaseCommand):
+    '''Массово импортирует посты из файла JSONL или CSV'''
+
+    help = (
+        'Импортирует посты из файла JSONL или CSV с полями text, author '
+        '(имя пользователя), group (адрес сообщества) и pub_date (ISO 8601)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу с постами')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Формат файла, по умолчанию определяется по расширению',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help='Сколько постов вставлять одним запросом',
+        )
+        parser.add_argument(
+            '--batches-per-transaction',
+            type=int,
+            default=IMPORT_BATCHES_PER_TRANSACTION,
+            help='Сколько пачек фиксировать одной транзакцией',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'jsonl'
+        )
+        if options['batch_size'] < 1 or options['batches_per_transaction'] < 1:
+            raise CommandError('Размеры пачки и транзакции должны быть > 0')
+        self.verbosity = options['verbosity']
+        self.batch_size = options['batch_size']
+        self.chunk_size = self.batch_size * options['batches_per_transaction']
+        self.authors = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.touched_authors = set()
+        self.touched_groups = set()
+        self.imported = self.skipped = 0
+        self.started = time.monotonic()
+        try:
+            file = open(path, newline='', encoding='utf-8')
+        except OSError as error:
+            raise CommandError(f'Не удалось открыть {path}: {error}')
+        with file:
+            chunk = []
+            for line_number, record in read_records(file, file_format):
+                try:
+                    chunk.append(self.build_post(record))
+                except RecordError as error:
+                    self.skipped += 1
+                    self.stderr.write(
+                        f'Строка {line_number} пропущена: {error}'
+                    )
+                    continue
+                if len(chunk) >= self.chunk_size:
+                    self.save_chunk(chunk)
+                    chunk = []
+            if chunk:
+                self.save_chunk(chunk)
+        self.purge_feeds()
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано постов: {self.imported}, '
+            f'пропущено строк: {self.skipped}, {self.rate()}'
+        ))
+
+    def build_post(self, record):
+        if isinstance(record, RecordError):
+            raise record
+        if not isinstance(record, dict):
+            raise RecordError('запись должна быть объектом')
+        text = self.string_field(record, 'text')
+        if not text:
+            raise RecordError('пустой текст')
+        username = self.string_field(record, 'author')
+        author_id = self.authors.get(username)
+        if author_id is None:
+            raise RecordError(f'неизвестный автор {username!r}')
+        slug = self.string_field(record, 'group') or None
+        group_id = None
+        if slug is not None:
+            group_id = self.groups.get(slug)
+            if group_id is None:
+                raise RecordError(f'неизвестное сообщество {slug!r}')
+        return Post(
+            text=text,
+            author_id=author_id,
+            group_id=group_id,
+            pub_date=self.parse_pub_date(
+                self.string_field(record, 'pub_date')
+            ),
+        )
+
+    def string_field(self, record, name):
+        '''Строковое поле записи или None. В JSON поле может
+        оказаться числом, списком или объектом.'''
+        value = record.get(name)
+        if value is not None and not isinstance(value, str):
+            raise RecordError(f'поле {name} должно быть строкой')
+        return value
+
+    def parse_pub_date(self, value):
+        if not value:
+            return timezone.now()
+        try:
+            pub_date = parse_datetime(value)
+        except ValueError:
+            pub_date = None
+        if pub_date is None:
+            raise RecordError(f'некорректная дата {value!r}')
+        if timezone.is_naive(pub_date):
+            pub_date = timezone.make_aware(pub_date, timezone.utc)
+        return pub_date
+
+    def save_chunk(self, posts):
+        '''Вставляет посты пачками в одной транзакции и обновляет
+        то, что при одиночном создании поддерживают сигналы'''
+        size = self.insert_size(posts)
+        # Вставка ставит полю с auto_now_add текущее время
+        pub_dates = [post.pub_date for post in posts]
+        with transaction.atomic():
+            post_ids = self.insert_posts(posts, size)
+            for start in range(0, len(posts), size):
+                batch_ids = post_ids[start:start + size]
+                self.keep_pub_dates(batch_ids, pub_dates[start:start + size])
+                get_search_backend().index_posts(batch_ids)
+                fan_out_posts(batch_ids)
+            authors = Counter(post.author_id for post in posts)
+            groups = Counter(
+                post.group_id for post in posts if post.group_id is not None
+            )
+            for author_id, delta in authors.items():
+                change_author_count(author_id, delta)
+            for group_id, delta in groups.items():
+                change_group_count(group_id, delta)
+        self.touched_authors.update(authors)
+        self.touched_groups.update(groups)
+        self.imported += len(posts)
+        if self.verbosity > 1:
+            self.stdout.write(
+                f'Импортировано постов: {self.imported}, {self.rate()}'
+            )
+
+    def insert_posts(self, posts, size):
+        '''Вставляет посты и возвращает их id в том же порядке'''
+        Post.objects.bulk_create(posts, batch_size=size)
+        if connection.features.can_return_ids_from_bulk_insert:
+            return [post.pk for post in posts]
+        # SQLite не возвращает id вставленных строк. До фиксации
+        # транзакции другие соединения писать не могут, поэтому
+        # её посты - последние по id, даже если сайт успел создать
+        # пост между началом транзакции и вставкой.
+        post_ids = list(Post.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        )[:len(posts)])
+        post_ids.reverse()
+        return post_ids
+
+    def keep_pub_dates(self, post_ids, pub_dates):
+        '''Возвращает постам даты исходной платформы отдельным
+        UPDATE: метаданные поля общие для всех потоков процесса,
+        поэтому auto_now_add не отключается.'''
+        Post.objects.filter(pk__in=post_ids).update(pub_date=Case(
+            *(
+                When(pk=post_id, then=Value(pub_date))
+                for post_id, pub_date in zip(post_ids, pub_dates)
+            ),
+            output_field=DateTimeField(),
+        ))
+
+    def insert_size(self, posts):
+        '''Размер пачки не больше, чем база принимает в одном INSERT:
+        Django 2.2 не урезает явно переданный batch_size сам'''
+        fields = [
+            field for field in Post._meta.concrete_fields
+            if not field.primary_key
+        ]
+        return min(
+            self.batch_size,
+            max(connection.ops.bulk_batch_size(fields, posts), 1),
+        )
+
+    def purge_feeds(self):
+        if not self.imported:
+            return
+        home_feed.reset()
+        bump_feeds(
+            index_feed(),
+            *(
+                profile_feed(username) for username, pk in self.authors.items()
+                if pk in self.touched_authors
+            ),
+            *(
+                group_feed(slug) for slug, pk in self.groups.items()
+                if pk in self.touched_groups
+            ),
+        )
+
+    def rate(self):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        return f'{self.imported / elapsed:.0f} строк/с'
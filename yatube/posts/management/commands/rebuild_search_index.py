@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.search import get_search_backend
+
+
+class Command(BaseCommand):
+    '''Перестраивает поисковый индекс постов'''
+
+    help = 'Перестраивает поисковый индекс по текстам постов'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        with transaction.atomic():
+            backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Поисковый индекс перестроен: {type(backend).__name__}'
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import recount_posts
+
+
+class Command(BaseCommand):
+    '''Пересчитывает хранимые счётчики постов авторов и сообществ'''
+
+    help = 'Пересчитывает счётчики постов авторов и сообществ'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            authors, groups = recount_posts()
+        self.stdout.write(self.style.SUCCESS(
+            f'Счётчики пересчитаны: авторов {authors}, сообществ {groups}'
+        ))
@@ -0,0 +1,95 @@
+import os
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from sorl.thumbnail import delete
+from sorl.thumbnail.images import ImageFile
+
+from core.tasks import enqueue
+
+from .models import MediaBlob, Post
+
+# Суффикс файла, на который не осталось ссылок: он ждёт удаления
+# MEDIA_RETIRE_SECONDS и возвращается на место, если его снова загрузят
+RETIRED_SUFFIX = '.retired'
+
+
+def image_storage():
+    return Post._meta.get_field('image').storage
+
+
+def retired_path(name):
+    return image_storage().path(name) + RETIRED_SUFFIX
+
+
+def relink_media(name):
+    '''Возвращает на место файл, который успели отложить на удаление,
+    пока его повторная загрузка ещё не добавила ссылку'''
+    path = image_storage().path(name)
+    if not os.path.exists(path):
+        try:
+            os.replace(retired_path(name), path)
+        except FileNotFoundError:
+            pass
+
+
+def acquire_media(name):
+    '''Добавляет ссылку поста на файл. Одновременные первые загрузки
+    одного файла не мешают друг другу: вторая увеличит счётчик
+    строки, которую создала первая.'''
+    relink_media(name)
+    storage = image_storage()
+    with transaction.atomic():
+        blob, created = MediaBlob.objects.get_or_create(name=name, defaults={
+            'size': storage.size(name) if storage.exists(name) else 0,
+            'refs_count': 1,
+        })
+        if not created:
+            MediaBlob.objects.filter(pk=blob.pk).update(
+                refs_count=F('refs_count') + 1
+            )
+
+
+def release_media(name):
+    '''Убирает ссылку поста на файл. Файл, на который больше
+    не ссылается ни один пост, откладывается на удаление после
+    фиксации транзакции.'''
+    MediaBlob.objects.filter(name=name, refs_count__gte=1).update(
+        refs_count=F('refs_count') - 1
+    )
+    deleted, _ = MediaBlob.objects.filter(name=name, refs_count=0).delete()
+    if deleted:
+        transaction.on_commit(lambda: retire_media(name))
+
+
+def retire_media(name):
+    '''Откладывает файл без ссылок на удаление. Загрузка того же
+    содержимого могла уже найти файл на месте и ещё не добавить
+    ссылку - acquire_media вернёт ей файл, пока его не удалили.'''
+    from .tasks import purge_retired_media
+
+    if MediaBlob.objects.filter(name=name).exists():
+        return
+    try:
+        os.replace(image_storage().path(name), retired_path(name))
+    except FileNotFoundError:
+        return
+    enqueue(
+        purge_retired_media, name,
+        key=f'purge-media:{name}', delay=settings.MEDIA_RETIRE_SECONDS,
+    )
+
+
+def purge_media(name):
+    '''Удаляет отложенный файл вместе с миниатюрами, если на него
+    так и не сослалась новая загрузка'''
+    if MediaBlob.objects.filter(name=name).exists():
+        relink_media(name)
+    else:
+        # Ключи миниатюр в sorl-thumbnail включают класс хранилища
+        delete(ImageFile(name, image_storage()), delete_file=False)
+    try:
+        os.remove(retired_path(name))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,48 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:23
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Group = apps.get_model('posts', 'Group')
+    AuthorPostsCounter = apps.get_model('posts', 'AuthorPostsCounter')
+    authors = Post.objects.order_by().values('author').annotate(
+        total=Count('pk')
+    )
+    AuthorPostsCounter.objects.bulk_create(
+        AuthorPostsCounter(author_id=row['author'], posts_count=row['total'])
+        for row in authors
+    )
+    groups = Post.objects.filter(group__isnull=False).order_by().values(
+        'group'
+    ).annotate(total=Count('pk'))
+    for row in groups:
+        Group.objects.filter(pk=row['group']).update(posts_count=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0004_auto_20220617_0009'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorPostsCounter',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='posts_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество постов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
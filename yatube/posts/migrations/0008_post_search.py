@@ -0,0 +1,52 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:28
+
+from django.db import migrations, models
+from django.db.utils import OperationalError
+import django.db.models.deletion
+
+
+def create_fts_table(apps, schema_editor):
+    '''Создаёт полнотекстовый индекс FTS5, если SQLite его поддерживает.
+    Без FTS5 поиск работает по таблице PostSearchTerm.'''
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                'CREATE VIRTUAL TABLE posts_post_fts USING fts5(text)'
+            )
+        except OperationalError:
+            return
+        cursor.execute(
+            'INSERT INTO posts_post_fts (rowid, text) '
+            'SELECT id, text FROM posts_post'
+        )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_post_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Терм')),
+                ('weight', models.PositiveIntegerField(verbose_name='Вес')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Post', verbose_name='Пост')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='postsearchterm',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='unique_search_term_post'),
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:08
+
+import core.storage
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_media_refs(apps, schema_editor):
+    '''Файлы картинок, загруженные до подсчёта ссылок'''
+    Post = apps.get_model('posts', 'Post')
+    MediaBlob = apps.get_model('posts', 'MediaBlob')
+    storage = Post._meta.get_field('image').storage
+    MediaBlob.objects.bulk_create(
+        MediaBlob(
+            name=name,
+            size=storage.size(name) if storage.exists(name) else 0,
+            refs_count=refs_count,
+        )
+        for name, refs_count in Post.objects.exclude(image='').order_by(
+        ).values_list('image').annotate(Count('pk'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Файл')),
+                ('size', models.PositiveIntegerField(default=0, verbose_name='Размер, байт')),
+                ('refs_count', models.PositiveIntegerField(default=0, verbose_name='Количество ссылок')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=core.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Картинка'),
+        ),
+        migrations.RunPython(count_media_refs, migrations.RunPython.noop),
+    ]
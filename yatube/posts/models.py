@@ -1,7 +1,9 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
-from .constants import STRING_LENGHT_LIMIT
+from core.storage import ContentAddressedStorage
+
+from .constants import SEARCH_TERM_LENGTH_LIMIT, STRING_LENGHT_LIMIT
 
 User = get_user_model()
 
@@ -17,6 +19,10 @@ class Post(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    updated = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
     author = models.ForeignKey(
         User,
         verbose_name='Автор публикации',
@@ -31,10 +37,43 @@ class Post(models.Model):
         null=True,
         related_name='posts',
     )
+    image = models.ImageField(
+        verbose_name='Картинка',
+        upload_to='posts/',
+        storage=ContentAddressedStorage(),
+        blank=True,
+    )
+    version = models.PositiveIntegerField(
+        verbose_name='Версия',
+        default=1,
+        editable=False,
+    )
 
     class Meta:
 
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='post_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', '-updated'),
+                name='post_author_updated_idx',
+            ),
+            models.Index(
+                fields=('group', '-updated'),
+                name='post_group_updated_idx',
+            ),
+        )
 
     def __str__(self) -> str:
         return self.text[:STRING_LENGHT_LIMIT]
@@ -55,6 +94,178 @@ class Group(models.Model):
     description = models.TextField(
         verbose_name='Описание',
     )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Количество постов',
+        default=0,
+        editable=False,
+    )
 
     def __str__(self) -> str:
         return self.title
+
+
+class AuthorPostsCounter(models.Model):
+    '''Хранимый счётчик постов автора, чтобы страницы профиля
+    и поста не считали COUNT(*) по всей таблице постов.
+    Здесь же хранится число подписчиков автора для рассылки
+    его постов по лентам подписчиков.'''
+
+    author = models.OneToOneField(
+        User,
+        verbose_name='Автор',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='posts_counter',
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Количество постов',
+        default=0,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков',
+        default=0,
+    )
+    fan_out_on_read = models.BooleanField(
+        verbose_name='Посты подмешиваются в ленты при чтении',
+        default=False,
+    )
+
+    def __str__(self) -> str:
+        return f'{self.author}: {self.posts_count}'
+
+
+class Follow(models.Model):
+    '''Подписка пользователя на автора'''
+
+    user = models.ForeignKey(
+        User,
+        verbose_name='Подписчик',
+        on_delete=models.CASCADE,
+        related_name='follower',
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор',
+        on_delete=models.CASCADE,
+        related_name='following',
+    )
+
+    class Meta:
+
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow',
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='follow_not_self',
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.user} -> {self.author}'
+
+
+class TimelineEntry(models.Model):
+    '''Запись ленты подписок: пост автора, на которого подписан
+    пользователь. Время публикации и автор поста хранятся в записи,
+    поэтому страница ленты читается одним проходом по индексу.'''
+
+    user = models.ForeignKey(
+        User,
+        verbose_name='Подписчик',
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    post = models.ForeignKey(
+        Post,
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор поста',
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='timeline_user_pub_date_idx',
+            ),
+            models.Index(
+                fields=('user', 'author'),
+                name='timeline_user_author_idx',
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.user}: {self.post_id}'
+
+
+class MediaBlob(models.Model):
+    '''Файл медиа и число постов, которые на него ссылаются.
+    Одинаковые картинки хранятся одним файлом, а файл удаляется,
+    когда на него перестаёт ссылаться последний пост.'''
+
+    name = models.CharField(
+        verbose_name='Файл',
+        max_length=255,
+        unique=True,
+    )
+    size = models.PositiveIntegerField(
+        verbose_name='Размер, байт',
+        default=0,
+    )
+    refs_count = models.PositiveIntegerField(
+        verbose_name='Количество ссылок',
+        default=0,
+    )
+
+    def __str__(self) -> str:
+        return f'{self.name}: {self.refs_count}'
+
+
+class PostSearchTerm(models.Model):
+    '''Запись обратного индекса поиска по текстам постов.
+    Используется, когда база не поддерживает SQLite FTS5.'''
+
+    term = models.CharField(
+        verbose_name='Терм',
+        max_length=SEARCH_TERM_LENGTH_LIMIT,
+    )
+    post = models.ForeignKey(
+        Post,
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+    )
+    weight = models.PositiveIntegerField(
+        verbose_name='Вес',
+    )
+
+    class Meta:
+
+        constraints = (
+            models.UniqueConstraint(
+                fields=('term', 'post'),
+                name='unique_search_term_post',
+            ),
+        )
+
+    def __str__(self) -> str:
+        return self.term
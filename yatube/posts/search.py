@@ -0,0 +1,182 @@
+import re
+from collections import Counter
+
+from django.db import connection
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from .constants import (
+    SEARCH_RECENCY_DAYS, SEARCH_RESULTS_LIMIT, SEARCH_TERM_LENGTH_LIMIT,
+)
+from .models import Post, PostSearchTerm
+
+FTS_TABLE = 'posts_post_fts'
+
+# Есть ли таблица FTS5 в базе: (псевдоним, имя базы) -> bool
+_fts_tables = {}
+
+
+def tokenize(text):
+    '''Разбивает текст на термы поиска в нижнем регистре'''
+    return [
+        term[:SEARCH_TERM_LENGTH_LIMIT]
+        for term in re.findall(r'\w+', text.lower())
+    ]
+
+
+class Fts5Search:
+    '''Поиск по виртуальной таблице SQLite FTS5.
+    Релевантность bm25 ослабевает с возрастом поста.'''
+
+    search_sql = (
+        f'SELECT {FTS_TABLE}.rowid FROM {FTS_TABLE} '
+        f'JOIN posts_post ON posts_post.id = {FTS_TABLE}.rowid '
+        f'WHERE {FTS_TABLE} MATCH %s '
+        f'ORDER BY bm25({FTS_TABLE}) / (1.0 + ('
+        f"julianday('now') - julianday(posts_post.pub_date)) / %s), "
+        'posts_post.pub_date DESC '
+        'LIMIT %s'
+    )
+
+    def index(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+                [post.pk, post.text],
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+    def index_posts(self, post_ids):
+        placeholders = ', '.join(['%s'] * len(post_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) '
+                'SELECT id, text FROM posts_post '
+                f'WHERE id IN ({placeholders})',
+                list(post_ids),
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) '
+                'SELECT id, text FROM posts_post'
+            )
+
+    def match(self, terms):
+        # Каждый терм в кавычках, чтобы ввод не читался как синтаксис FTS5
+        return ' '.join(
+            '"{}"'.format(term.replace('"', '""')) for term in terms
+        )
+
+    def search(self, terms, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                self.search_sql,
+                [self.match(terms), SEARCH_RECENCY_DAYS, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def filter(self, queryset, terms):
+        return queryset.extra(
+            where=[
+                f'posts_post.id IN (SELECT rowid FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s)'
+            ],
+            params=[self.match(terms)],
+        )
+
+
+class InvertedIndexSearch:
+    '''Обратный индекс в таблице PostSearchTerm.
+    Вес терма - число его вхождений в текст поста.'''
+
+    def index(self, post):
+        self.remove(post.pk)
+        PostSearchTerm.objects.bulk_create(
+            PostSearchTerm(term=term, post_id=post.pk, weight=weight)
+            for term, weight in Counter(tokenize(post.text)).items()
+        )
+
+    def remove(self, post_id):
+        PostSearchTerm.objects.filter(post_id=post_id).delete()
+
+    def index_posts(self, post_ids):
+        PostSearchTerm.objects.bulk_create(
+            PostSearchTerm(term=term, post_id=post.pk, weight=weight)
+            for post in Post.objects.filter(pk__in=post_ids).only(
+                'text'
+            ).iterator()
+            for term, weight in Counter(tokenize(post.text)).items()
+        )
+
+    def rebuild(self):
+        PostSearchTerm.objects.all().delete()
+        for post in Post.objects.only('text').iterator():
+            self.index(post)
+
+    def matches(self, terms):
+        return PostSearchTerm.objects.filter(term__in=terms).values(
+            'post_id'
+        ).annotate(matched=Count('term')).filter(
+            matched=len(terms)
+        ).order_by()
+
+    def search(self, terms, limit):
+        rows = self.matches(terms).annotate(
+            weight=Sum('weight'),
+            pub_date=Max('post__pub_date'),
+        )
+        now = timezone.now()
+
+        def score(row):
+            age = (now - row['pub_date']).total_seconds() / 86400
+            return row['weight'] / (1 + age / SEARCH_RECENCY_DAYS)
+
+        rows = sorted(
+            rows, key=lambda row: (score(row), row['pub_date']), reverse=True
+        )
+        return [row['post_id'] for row in rows[:limit]]
+
+    def filter(self, queryset, terms):
+        return queryset.filter(
+            pk__in=self.matches(terms).values('post_id')
+        )
+
+
+def get_search_backend():
+    '''FTS5, если его таблица создана миграцией, иначе обратный индекс'''
+    key = (connection.alias, connection.settings_dict['NAME'])
+    if key not in _fts_tables:
+        _fts_tables[key] = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return Fts5Search() if _fts_tables[key] else InvertedIndexSearch()
+
+
+def search_posts(query, limit=SEARCH_RESULTS_LIMIT):
+    '''id постов, подходящих под все слова запроса, по убыванию
+    релевантности с поправкой на давность публикации'''
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return []
+    return get_search_backend().search(terms, limit)
+
+
+def filter_posts(queryset, query):
+    '''Посты queryset, подходящие под все слова запроса, - все,
+    без ранжирования и без предела SEARCH_RESULTS_LIMIT'''
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return queryset.none()
+    return get_search_backend().filter(queryset, terms)
@@ -0,0 +1,254 @@
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+
+from core.tasks import enqueue
+
+from .cache import bump_feeds, group_feed, index_feed, profile_feed
+from .constants import AUTHOR_LABEL_FIELDS
+from .counters import (
+    change_author_count, change_followers_count, change_group_count,
+)
+from .home_feed import home_feed
+from .media import acquire_media, release_media
+from .models import Follow, Group, Post, User
+from .tasks import fan_out_post, make_post_thumbnails, sync_search_index
+from .timeline import backfill, remove_author
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_owners(sender, instance, **kwargs):
+    '''Запоминает прежних автора, сообщество и картинку поста
+    перед его изменением'''
+    instance._previous_owners = None
+    instance._previous_image = None
+    if instance.pk is not None:
+        row = Post.objects.filter(pk=instance.pk).values_list(
+            'author_id', 'group_id', 'image'
+        ).first()
+        if row is not None:
+            instance._previous_owners = row[:2]
+            instance._previous_image = row[2]
+
+
+@receiver(pre_save, sender=Post)
+def bump_post_version(sender, instance, raw, **kwargs):
+    '''Меняет версию поста при изменении, сбрасывая кэш его карточки'''
+    if not raw and instance.pk is not None:
+        instance.version += 1
+
+
+@receiver(post_save, sender=Post)
+def update_counters_on_save(sender, instance, created, raw, **kwargs):
+    '''Поддерживает счётчики постов при создании и изменении поста'''
+    if raw:
+        return
+    if created:
+        change_author_count(instance.author_id, 1)
+        change_group_count(instance.group_id, 1)
+        return
+    previous = getattr(instance, '_previous_owners', None)
+    if previous is None:
+        return
+    previous_author_id, previous_group_id = previous
+    if previous_author_id != instance.author_id:
+        change_author_count(previous_author_id, -1)
+        change_author_count(instance.author_id, 1)
+    if previous_group_id != instance.group_id:
+        change_group_count(previous_group_id, -1)
+        change_group_count(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def update_counters_on_delete(sender, instance, **kwargs):
+    '''Поддерживает счётчики постов при удалении поста'''
+    change_author_count(instance.author_id, -1)
+    change_group_count(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Post)
+def index_post_text(sender, instance, raw, **kwargs):
+    '''Ставит в очередь обновление записи поста в поисковом индексе'''
+    if not raw:
+        enqueue(sync_search_index, instance.pk, key=f'search:{instance.pk}')
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_from_index(sender, instance, **kwargs):
+    '''Ставит в очередь удаление поста из поискового индекса'''
+    enqueue(sync_search_index, instance.pk, key=f'search:{instance.pk}')
+
+
+def get_post_feeds(post):
+    '''Ленты, в которых показывается пост, в том числе прежние
+    ленты автора и сообщества, если пост был перенесён'''
+    feeds = [index_feed(), profile_feed(post.author.username)]
+    if post.group_id is not None:
+        feeds.append(group_feed(post.group.slug))
+    previous = getattr(post, '_previous_owners', None)
+    if previous is not None:
+        previous_author_id, previous_group_id = previous
+        if previous_author_id != post.author_id:
+            feeds.extend(
+                profile_feed(username) for username in User.objects.filter(
+                    pk=previous_author_id
+                ).values_list('username', flat=True)
+            )
+        if previous_group_id not in (None, post.group_id):
+            feeds.extend(
+                group_feed(slug) for slug in Group.objects.filter(
+                    pk=previous_group_id
+                ).values_list('slug', flat=True)
+            )
+    return feeds
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purge_post_feeds(sender, instance, raw=False, **kwargs):
+    '''Сбрасывает кэш страниц лент, в которые попадает пост'''
+    if not raw:
+        bump_feeds(*get_post_feeds(instance))
+
+
+@receiver(post_save, sender=Post)
+def update_home_feed_on_save(sender, instance, created, raw, **kwargs):
+    '''Добавляет новый пост в окно главной ленты или обновляет изменённый'''
+    if raw:
+        return
+    if created:
+        home_feed.push(instance.pk)
+    else:
+        home_feed.replace(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def update_home_feed_on_delete(sender, instance, **kwargs):
+    '''Убирает удалённый пост из окна главной ленты'''
+    home_feed.remove(instance.pk)
+
+
+@receiver(pre_save, sender=Group)
+def remember_previous_slug(sender, instance, **kwargs):
+    '''Запоминает прежний адрес сообщества перед его изменением'''
+    instance._previous_slug = None
+    if instance.pk is not None:
+        instance._previous_slug = Group.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def purge_group_feeds(sender, instance, raw=False, **kwargs):
+    '''Сбрасывает ленты, где показываются название и адрес сообщества.
+    При удалении срабатывает до того, как посты отвяжутся от сообщества.'''
+    if raw:
+        return
+    home_feed.reset()
+    feeds = [index_feed(), group_feed(instance.slug)]
+    previous_slug = getattr(instance, '_previous_slug', None)
+    if previous_slug is not None:
+        feeds.append(group_feed(previous_slug))
+    feeds.extend(
+        profile_feed(username) for username in User.objects.filter(
+            posts__group=instance
+        ).values_list('username', flat=True).distinct()
+    )
+    bump_feeds(*feeds)
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_labels(sender, instance, update_fields, **kwargs):
+    '''Запоминает прежние имя и логин пользователя перед изменением.
+    Вход на сайт сохраняет только last_login, его можно не смотреть.'''
+    instance._previous_labels = None
+    if update_fields is not None and not update_fields.intersection(
+        AUTHOR_LABEL_FIELDS
+    ):
+        return
+    if instance.pk is not None:
+        instance._previous_labels = User.objects.filter(
+            pk=instance.pk
+        ).values_list(*AUTHOR_LABEL_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def purge_author_feeds(sender, instance, created, raw, **kwargs):
+    '''Сбрасывает ленты, где подписаны посты автора, когда он
+    меняет имя или логин'''
+    previous = getattr(instance, '_previous_labels', None)
+    if created or raw or previous is None:
+        return
+    labels = tuple(getattr(instance, name) for name in AUTHOR_LABEL_FIELDS)
+    if labels == previous:
+        return
+    home_feed.reset()
+    feeds = [
+        index_feed(),
+        profile_feed(instance.username),
+        profile_feed(previous[0]),
+    ]
+    feeds.extend(
+        group_feed(slug) for slug in Group.objects.filter(
+            posts__author=instance
+        ).values_list('slug', flat=True).distinct()
+    )
+    bump_feeds(*feeds)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, raw, **kwargs):
+    '''Ставит в очередь раскладку нового поста по лентам подписчиков'''
+    if created and not raw:
+        enqueue(fan_out_post, instance.pk, key=f'fan-out:{instance.pk}')
+
+
+@receiver(post_save, sender=Post)
+def schedule_post_thumbnails(sender, instance, raw, **kwargs):
+    '''Ставит в очередь создание миниатюр новой картинки поста'''
+    if raw or not instance.image:
+        return
+    if instance.image.name != getattr(instance, '_previous_image', None):
+        enqueue(
+            make_post_thumbnails, instance.pk,
+            key=f'thumbnails:{instance.pk}',
+        )
+
+
+@receiver(post_save, sender=Post)
+def count_media_refs_on_save(sender, instance, raw, **kwargs):
+    '''Поддерживает число ссылок на файлы при смене картинки поста'''
+    if raw:
+        return
+    previous = getattr(instance, '_previous_image', None)
+    if instance.image.name == previous:
+        return
+    if instance.image:
+        acquire_media(instance.image.name)
+    if previous:
+        release_media(previous)
+
+
+@receiver(post_delete, sender=Post)
+def release_media_on_delete(sender, instance, **kwargs):
+    '''Освобождает картинку удалённого поста, в том числе при
+    каскадном удалении вместе с автором'''
+    if instance.image:
+        release_media(instance.image.name)
+
+
+@receiver(post_save, sender=Follow)
+def start_following(sender, instance, created, raw, **kwargs):
+    '''Считает подписчика и заполняет его ленту постами автора'''
+    if created and not raw:
+        change_followers_count(instance.author_id, 1)
+        backfill(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def stop_following(sender, instance, **kwargs):
+    '''Убирает подписчика из счётчика и посты автора из его ленты'''
+    change_followers_count(instance.author_id, -1)
+    remove_author(instance)
@@ -0,0 +1,40 @@
+from core.tasks import task
+
+from .media import purge_media
+from .models import Post
+from .search import get_search_backend
+from .thumbnails import make_thumbnails
+from .timeline import fan_out
+
+
+@task
+def sync_search_index(post_id):
+    '''Приводит запись поста в поисковом индексе к посту в базе:
+    существующий пост индексируется, удалённый убирается из индекса'''
+    post = Post.objects.filter(pk=post_id).only('text').first()
+    if post is None:
+        get_search_backend().remove(post_id)
+    else:
+        get_search_backend().index(post)
+
+
+@task
+def make_post_thumbnails(post_id):
+    '''Создаёт миниатюры картинки поста'''
+    make_thumbnails(post_id)
+
+
+@task
+def fan_out_post(post_id):
+    '''Раскладывает пост по лентам подписчиков автора'''
+    post = Post.objects.filter(pk=post_id).only(
+        'author_id', 'pub_date'
+    ).first()
+    if post is not None:
+        fan_out(post)
+
+
+@task
+def purge_retired_media(name):
+    '''Удаляет файл картинки, отложенный на удаление'''
+    purge_media(name)
@@ -0,0 +1,45 @@
+import hashlib
+
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+POST_CARD_KEY = 'post-card:{}:{}:{}:{}'
+POST_CARD_TEMPLATE = 'posts/includes/detailed_information.html'
+
+
+def post_card_key(post, show_group):
+    '''Ключ карточки: пост, его версия и подписи автора и сообщества,
+    которые выводятся в карточке и меняются без изменения поста'''
+    author = post.author
+    group = post.group
+    labels = [author.username, author.first_name, author.last_name]
+    if show_group and group is not None:
+        labels.extend([group.slug, group.title])
+    digest = hashlib.md5('\n'.join(labels).encode()).hexdigest()
+    return POST_CARD_KEY.format(post.pk, post.version, int(show_group), digest)
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts):
+    '''Отрендеренные карточки постов страницы.
+    Карточки общие для всех лент и достаются из кэша одним запросом,
+    рендерятся только отсутствующие в кэше.'''
+    show_group = not context.get('group')
+    posts = {post_card_key(post, show_group): post for post in posts}
+    cards = cache.get_many(posts)
+    missing = {
+        key: render_to_string(
+            POST_CARD_TEMPLATE, {'post': post, 'show_group': show_group}
+        )
+        for key, post in posts.items()
+        if key not in cards
+    }
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+        cards.update(missing)
+    return [mark_safe(cards[key]) for key in posts]
@@ -0,0 +1,12 @@
+from django import template
+
+from posts.thumbnails import stored_thumbnail
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(post, size):
+    '''Готовая миниатюра картинки поста или None. Пока пул
+    не создал миниатюру, картинка на странице не выводится.'''
+    return stored_thumbnail(post.image, size)
@@ -0,0 +1,175 @@
+from django.core.cache import cache
+from django.test import (
+    Client, RequestFactory, TestCase, override_settings,
+)
+from django.urls import reverse
+
+from ..cache import feed_page_key, feed_version_key, profile_feed
+from ..models import Group, Post, User
+
+
+@override_settings(FEED_CACHE_SHARED=True)
+class FeedCacheTests(TestCase):
+    '''Класс для тестирования кэша страниц лент'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='cache_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='cache-slug',
+            description='Тестовое описание',
+        )
+        cls.another_group = Group.objects.create(
+            title='Другая группа',
+            slug='another-cache-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Закэшированный пост', group=cls.group
+        )
+        cls.index_url = reverse('posts:index')
+        cls.group_url = reverse(
+            'posts:group_list', kwargs={'slug': cls.group.slug}
+        )
+        cls.another_group_url = reverse(
+            'posts:group_list', kwargs={'slug': cls.another_group.slug}
+        )
+        cls.profile_url = reverse(
+            'posts:profile', kwargs={'username': cls.user.username}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def assertCached(self, address):
+        with self.assertNumQueries(0):
+            response = self.client.get(address)
+        return response
+
+    def test_anonymous_pages_are_cached(self):
+        '''повторный запрос гостя отдаётся из кэша без запросов в базу'''
+        for address in (self.index_url, self.group_url, self.profile_url):
+            with self.subTest(address=address):
+                first = self.client.get(address)
+                second = self.assertCached(address)
+                self.assertEqual(first.content, second.content)
+
+    def test_pages_of_different_cursors_are_cached_apart(self):
+        '''страницы с разными параметрами кэшируются отдельно'''
+        self.client.get(self.index_url)
+        response = self.client.get(self.index_url + '?page=2')
+        self.assertIsNotNone(response.context)
+
+    def test_new_post_purges_only_its_feeds(self):
+        '''новый пост сбрасывает только ленты, в которые он попал'''
+        for address in (
+            self.index_url, self.group_url,
+            self.another_group_url, self.profile_url,
+        ):
+            self.client.get(address)
+        self.author_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Свежий пост', 'group': self.group.id},
+        )
+        for address in (self.index_url, self.group_url, self.profile_url):
+            with self.subTest(address=address):
+                self.assertContains(self.client.get(address), 'Свежий пост')
+        self.assertCached(self.another_group_url)
+
+    def test_edit_purges_previous_group(self):
+        '''перенос поста в другое сообщество сбрасывает обе ленты'''
+        self.client.get(self.group_url)
+        self.client.get(self.another_group_url)
+        self.author_client.post(
+            reverse('posts:edit', kwargs={'post_id': self.post.id}),
+            data={'text': self.post.text, 'group': self.another_group.id},
+        )
+        self.assertNotContains(
+            self.client.get(self.group_url), self.post.text
+        )
+        self.assertContains(
+            self.client.get(self.another_group_url), self.post.text
+        )
+
+    def test_author_rename_purges_feeds(self):
+        '''смена имени автора сбрасывает ленты с его постами'''
+        addresses = (self.index_url, self.group_url, self.profile_url)
+        for address in addresses:
+            self.client.get(address)
+        self.user.first_name = 'Переименованный'
+        self.user.save()
+        for address in addresses:
+            with self.subTest(address=address):
+                self.assertContains(
+                    self.client.get(address), 'Переименованный'
+                )
+
+    def test_unicode_username_makes_portable_keys(self):
+        '''логин в любом алфавите даёт ключи из ASCII, которые
+        примет и memcached'''
+        feed = profile_feed('пользователь')
+        request = RequestFactory().get(
+            reverse('posts:profile', kwargs={'username': 'пользователь'})
+        )
+        for key in (feed_version_key(feed), feed_page_key(feed, request)):
+            with self.subTest(key=key):
+                self.assertTrue(key.isascii())
+
+    @override_settings(FEED_CACHE_SHARED=False)
+    def test_process_cache_keeps_no_pages(self):
+        '''с кэшем в памяти процесса ленты не кэшируются и отдаются
+        без ETag: сброс из другого процесса до них не дошёл бы'''
+        for address in (self.index_url, self.group_url, self.profile_url):
+            with self.subTest(address=address):
+                self.client.get(address)
+                response = self.client.get(address)
+                self.assertIsNotNone(response.context)
+                self.assertFalse(response.has_header('ETag'))
+
+    def test_authorized_pages_are_not_cached(self):
+        '''страницы авторизованного пользователя не кэшируются'''
+        self.author_client.get(self.index_url)
+        response = self.author_client.get(self.index_url)
+        self.assertIsNotNone(response.context)
+
+
+class PostCardCacheTests(TestCase):
+    '''Класс для тестирования кэша карточек постов'''
+
+    card_template = 'posts/includes/detailed_information.html'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='card_author')
+        cls.post = Post.objects.create(author=cls.user, text='Карточка')
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def test_card_is_shared_between_feeds(self):
+        '''карточка, отрендеренная на главной, берётся из кэша в профиле'''
+        response = self.author_client.get(reverse('posts:index'))
+        self.assertTemplateUsed(response, self.card_template)
+        response = self.author_client.get(
+            reverse('posts:profile', kwargs={'username': self.user})
+        )
+        self.assertTemplateNotUsed(response, self.card_template)
+        self.assertContains(response, self.post.text)
+
+    def test_edit_renders_new_card(self):
+        '''после изменения поста карточка рендерится заново'''
+        self.author_client.get(reverse('posts:index'))
+        self.author_client.post(
+            reverse('posts:edit', kwargs={'post_id': self.post.id}),
+            data={'text': 'Новая карточка'},
+        )
+        response = self.author_client.get(reverse('posts:index'))
+        self.assertTemplateUsed(response, self.card_template)
+        self.assertContains(response, 'Новая карточка')
@@ -0,0 +1,148 @@
+import os
+import tempfile
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.release import templates_release
+
+from ..models import Group, Post, User
+
+
+@override_settings(FEED_CACHE_SHARED=True)
+class ConditionalGetTests(TestCase):
+    '''Класс для тестирования ответов 304 Not Modified'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='etag_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='etag-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый пост', group=cls.group
+        )
+        cls.post_url = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.pk}
+        )
+        cls.group_url = reverse(
+            'posts:group_list', kwargs={'slug': cls.group.slug}
+        )
+        cls.profile_url = reverse(
+            'posts:profile', kwargs={'username': cls.user.username}
+        )
+        cls.addresses = (cls.post_url, cls.group_url, cls.profile_url)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def revalidate(self, client, address):
+        etag = client.get(address)['ETag']
+        return etag, client.get(address, HTTP_IF_NONE_MATCH=etag)
+
+    def test_not_modified(self):
+        '''неизменная страница отвечает 304'''
+        for client in (self.client, self.authorized_client):
+            for address in self.addresses:
+                with self.subTest(address=address):
+                    _, response = self.revalidate(client, address)
+                    self.assertEqual(
+                        response.status_code, HTTPStatus.NOT_MODIFIED
+                    )
+
+    def test_cached_page_not_modified_without_queries(self):
+        '''закэшированная лента отвечает 304 без запросов в базу'''
+        for address in (self.group_url, self.profile_url):
+            with self.subTest(address=address):
+                etag = self.client.get(address)['ETag']
+                with self.assertNumQueries(0):
+                    response = self.client.get(
+                        address, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+
+    def test_edit_changes_etag(self):
+        '''правка поста меняет ETag страниц'''
+        etags = {
+            address: self.client.get(address)['ETag']
+            for address in self.addresses
+        }
+        self.authorized_client.post(
+            reverse('posts:edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Изменённый пост', 'group': self.group.pk},
+        )
+        for address, etag in etags.items():
+            with self.subTest(address=address):
+                response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertContains(response, 'Изменённый пост')
+
+    def test_delete_changes_etag(self):
+        '''удаление поста меняет ETag лент'''
+        old_post = Post.objects.create(
+            author=self.user, text='Старый пост', group=self.group
+        )
+        Post.objects.filter(pk=old_post.pk).update(
+            updated=self.post.updated
+        )
+        for address in (self.group_url, self.profile_url):
+            with self.subTest(address=address):
+                etag = self.client.get(address)['ETag']
+                Post.objects.get(pk=old_post.pk).delete()
+                response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                old_post.save()
+
+    def test_user_changes_etag(self):
+        '''ETag страницы зависит от пользователя'''
+        for address in self.addresses:
+            with self.subTest(address=address):
+                etag = self.client.get(address)['ETag']
+                response = self.authorized_client.get(
+                    address, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_missing_page(self):
+        '''несуществующая страница отвечает 404 без ETag'''
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_release_from_templates(self):
+        '''версия выкладки без YATUBE_RELEASE одинакова при каждом
+        запуске и меняется вместе с шаблонами'''
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'page.html')
+            with open(path, 'w') as template:
+                template.write('старая вёрстка')
+            release = templates_release(directory)
+            self.assertEqual(templates_release(directory), release)
+            with open(path, 'w') as template:
+                template.write('новая вёрстка')
+            self.assertNotEqual(templates_release(directory), release)
+
+    def test_author_rename_changes_etag(self):
+        '''смена имени автора меняет ETag лент с его постами'''
+        etags = {
+            address: self.client.get(address)['ETag']
+            for address in (self.group_url, self.profile_url)
+        }
+        self.user.first_name = 'Переименованный'
+        self.user.save()
+        for address, etag in etags.items():
+            with self.subTest(address=address):
+                response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertContains(response, 'Переименованный')
@@ -0,0 +1,74 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import AuthorPostsCounter, Group, Post, User
+
+
+class PostsCountersTests(TestCase):
+    '''Класс для тестирования счётчиков постов'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='counter_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='counter-slug',
+            description='Тестовое описание',
+        )
+        cls.another_group = Group.objects.create(
+            title='Другая группа',
+            slug='another-counter-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def assertCounts(self, author_count, group_count, another_group_count):
+        self.assertEqual(
+            AuthorPostsCounter.objects.get(author=self.user).posts_count,
+            author_count,
+        )
+        self.group.refresh_from_db()
+        self.another_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, group_count)
+        self.assertEqual(self.another_group.posts_count, another_group_count)
+
+    def test_counters_follow_create_edit_and_delete(self):
+        '''счётчики меняются при создании, изменении и удалении поста'''
+        self.author_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Новый пост', 'group': self.group.id},
+        )
+        self.assertCounts(1, 1, 0)
+        post = Post.objects.get(author=self.user)
+        self.author_client.post(
+            reverse('posts:edit', kwargs={'post_id': post.id}),
+            data={'text': 'Изменённый пост', 'group': self.another_group.id},
+        )
+        self.assertCounts(1, 0, 1)
+        post.refresh_from_db()
+        post.delete()
+        self.assertCounts(0, 0, 0)
+
+    def test_recount_command_restores_counters(self):
+        '''команда recount_posts пересчитывает счётчики по таблице постов'''
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Пост {i}', group=self.group)
+            for i in range(3)
+        )
+        call_command('recount_posts', stdout=StringIO())
+        self.assertCounts(3, 3, 0)
+
+    def test_profile_shows_counter(self):
+        '''страница профиля берёт количество постов из счётчика'''
+        Post.objects.create(author=self.user, text='Пост', group=self.group)
+        response = self.author_client.get(
+            reverse('posts:profile', kwargs={'username': self.user})
+        )
+        self.assertEqual(response.context['posts_count'], 1)
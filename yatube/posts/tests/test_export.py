@@ -0,0 +1,92 @@
+import csv
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+class ExportPostsTests(TestCase):
+    '''Класс для тестирования выгрузки постов'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='exporter')
+        cls.another_user = User.objects.create_user(username='another')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='export-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Пост в группе', group=cls.group
+        )
+        Post.objects.create(author=cls.another_user, text='Пост без группы')
+        cls.export_url = reverse('posts:export')
+
+    def export(self, **options):
+        stdout = StringIO()
+        call_command('export_posts', stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_jsonl_matches_import_format(self):
+        '''JSONL-выгрузка постов содержит поля команды import_posts'''
+        lines = self.export().splitlines()
+        self.assertEqual(len(lines), Post.objects.count())
+        self.assertIn(
+            {
+                'text': self.post.text,
+                'author': self.user.username,
+                'group': self.group.slug,
+                'pub_date': self.post.pub_date.isoformat(),
+            },
+            [json.loads(line) for line in lines],
+        )
+
+    def test_filters(self):
+        '''выгрузку постов можно ограничить сообществом, автором и датой'''
+        filters = (
+            ({'group': self.group.slug}, 1),
+            ({'author': self.another_user.username}, 1),
+            ({'since': '2000-01-01'}, 2),
+            ({'until': '2000-01-01'}, 0),
+        )
+        for options, count in filters:
+            with self.subTest(options=options):
+                self.assertEqual(
+                    len(self.export(**options).splitlines()), count
+                )
+
+    def test_csv_groups(self):
+        '''сообщества выгружаются в CSV с заголовком'''
+        rows = list(csv.reader(StringIO(
+            self.export(kind='groups', format='csv')
+        )))
+        self.assertEqual(rows[0], ['title', 'slug', 'description'])
+        self.assertEqual(rows[1][1], self.group.slug)
+
+    def test_endpoint_is_staff_only(self):
+        '''выгрузка по HTTP доступна только персоналу'''
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(self.export_url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_endpoint_streams_export(self):
+        '''выгрузка по HTTP отдаётся потоком'''
+        client = Client()
+        client.force_login(self.staff)
+        response = client.get(
+            self.export_url, {'format': 'csv', 'group': self.group.slug}
+        )
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn(self.post.text, content)
+        self.assertNotIn('Пост без группы', content)
+        response = client.get(self.export_url, {'since': 'вчера'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,181 @@
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import AuthorPostsCounter, Follow, Post, TimelineEntry, User
+from ..timeline import fan_out_posts
+
+
+class FollowTests(TestCase):
+    '''Класс для тестирования подписок и ленты подписок'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='followed_author')
+        cls.other_author = User.objects.create_user(username='other_author')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.old_post = Post.objects.create(
+            author=cls.author, text='Пост до подписки'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def follow(self, client, author):
+        return client.post(reverse(
+            'posts:profile_follow', kwargs={'username': author.username}
+        ))
+
+    def unfollow(self, client, author):
+        return client.post(reverse(
+            'posts:profile_unfollow', kwargs={'username': author.username}
+        ))
+
+    def feed(self, client):
+        response = client.get(reverse('posts:follow_index'))
+        return [post.text for post in response.context['page_obj']]
+
+    def followers_count(self, author):
+        return AuthorPostsCounter.objects.get(author=author).followers_count
+
+    def test_follow_and_unfollow(self):
+        '''подписка заполняет ленту постами автора, отписка очищает'''
+        response = self.follow(self.follower_client, self.author)
+        self.assertRedirects(response, reverse(
+            'posts:profile', kwargs={'username': self.author.username}
+        ))
+        self.follow(self.follower_client, self.author)
+        self.assertEqual(Follow.objects.filter(user=self.follower).count(), 1)
+        self.assertEqual(self.followers_count(self.author), 1)
+        self.assertEqual(self.feed(self.follower_client), ['Пост до подписки'])
+        self.unfollow(self.follower_client, self.author)
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(self.followers_count(self.author), 0)
+        self.assertEqual(self.feed(self.follower_client), [])
+
+    def test_follow_requires_post(self):
+        '''ссылка или картинка на чужой странице не подписывает
+        и не отписывает пользователя'''
+        self.follow(self.follower_client, self.author)
+        for name in ('posts:profile_follow', 'posts:profile_unfollow'):
+            with self.subTest(name=name):
+                response = self.follower_client.get(reverse(
+                    name, kwargs={'username': self.other_author.username}
+                ))
+                self.assertEqual(
+                    response.status_code, HTTPStatus.METHOD_NOT_ALLOWED
+                )
+        self.follower_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.author.username},
+        ))
+        self.assertTrue(Follow.objects.filter(
+            user=self.follower, author=self.author
+        ).exists())
+        self.assertFalse(Follow.objects.filter(
+            author=self.other_author
+        ).exists())
+
+    def test_cannot_follow_self(self):
+        '''на себя подписаться нельзя'''
+        self.follow(self.follower_client, self.follower)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_new_post_fanned_out_to_followers(self):
+        '''новый пост попадает в ленты подписчиков и только в них'''
+        self.follow(self.follower_client, self.author)
+        Post.objects.create(author=self.author, text='Новый пост')
+        Post.objects.create(author=self.other_author, text='Чужой пост')
+        self.assertEqual(
+            self.feed(self.follower_client),
+            ['Новый пост', 'Пост до подписки'],
+        )
+        self.assertEqual(self.feed(self.reader_client), [])
+
+    def test_feed_queries(self):
+        '''страница ленты не зависит от числа подписок'''
+        self.follow(self.follower_client, self.author)
+        self.follow(self.follower_client, self.other_author)
+        Post.objects.create(author=self.other_author, text='Пост')
+        # Сессия, пользователь, авторы с подмешиванием при чтении,
+        # число записей ленты, страница записей и посты страницы
+        with self.assertNumQueries(6):
+            self.follower_client.get(reverse('posts:follow_index'))
+
+    @override_settings(FANOUT_FOLLOWERS_LIMIT=1)
+    def test_fan_out_on_read(self):
+        '''посты автора с множеством подписчиков подмешиваются
+        в ленту при чтении'''
+        self.follow(self.follower_client, self.author)
+        self.follow(self.reader_client, self.author)
+        self.follow(self.follower_client, self.other_author)
+        Post.objects.create(author=self.other_author, text='Обычный пост')
+        post = Post.objects.create(author=self.author, text='Звёздный пост')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertTrue(AuthorPostsCounter.objects.get(
+            author=self.author
+        ).fan_out_on_read)
+        self.assertEqual(self.feed(self.follower_client), [
+            'Звёздный пост', 'Обычный пост', 'Пост до подписки',
+        ])
+        self.assertEqual(
+            self.feed(self.reader_client),
+            ['Звёздный пост', 'Пост до подписки'],
+        )
+
+    def test_imported_posts_fanned_out(self):
+        '''посты, созданные без сигналов, раскладываются по id'''
+        self.follow(self.follower_client, self.author)
+        last_id = Post.objects.latest('pk').pk
+        Post.objects.bulk_create([
+            Post(author=self.author, text='Импортированный пост'),
+        ])
+        fan_out_posts(
+            Post.objects.filter(pk__gt=last_id).values_list('pk', flat=True)
+        )
+        self.assertIn(
+            'Импортированный пост', self.feed(self.follower_client)
+        )
+
+    @override_settings(FEED_CACHE_SHARED=True)
+    def test_profile_etag_depends_on_following(self):
+        '''подписка меняет ETag профиля автора'''
+        address = reverse(
+            'posts:profile', kwargs={'username': self.author.username}
+        )
+        etag = self.follower_client.get(address)['ETag']
+        self.follow(self.follower_client, self.author)
+        response = self.follower_client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Отписаться')
+
+    @override_settings(FEED_CACHE_SHARED=True)
+    def test_profile_etag_changes_after_login(self):
+        '''после нового входа профиль отдаётся заново: в форме
+        подписки нужен новый CSRF-токен'''
+        address = reverse(
+            'posts:profile', kwargs={'username': self.author.username}
+        )
+        self.follower_client.get(address)
+        response = self.follower_client.get(address)
+        self.assertIn(settings.CSRF_COOKIE_NAME, self.follower_client.cookies)
+        etag = response['ETag']
+        self.follower_client.logout()
+        self.follower_client.force_login(self.follower)
+        response = self.follower_client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'csrfmiddlewaretoken')
+
+    def test_follow_index_requires_login(self):
+        '''гость отправляется на страницу входа'''
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('users:login'), response.url)
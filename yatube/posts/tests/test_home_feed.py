@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..constants import HOME_FEED_SIZE, LIMIT_COUNTS_POSTS
+from ..home_feed import HOME_FEED_GENERATION_KEY, HOME_FEED_KEY, home_feed
+from ..models import Post, User
+
+
+@override_settings(HOME_FEED_WINDOW=True)
+class HomeFeedTests(TestCase):
+    '''Класс для тестирования материализованной главной ленты'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='home_author')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {number}')
+            for number in range(HOME_FEED_SIZE + LIMIT_COUNTS_POSTS)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def test_window_pages_are_served_from_memory(self):
+        '''страницы внутри окна отдаются без запросов постов в базу'''
+        home_feed.snapshot()
+        with self.assertNumQueries(2):
+            response = self.author_client.get(reverse('posts:index'))
+        self.assertEqual(
+            len(response.context['page_obj']), LIMIT_COUNTS_POSTS
+        )
+
+    def test_pages_beyond_window_fall_back_to_database(self):
+        '''страница за пределами окна берётся из базы'''
+        last_page = (
+            HOME_FEED_SIZE + LIMIT_COUNTS_POSTS
+        ) // LIMIT_COUNTS_POSTS
+        response = self.author_client.get(
+            reverse('posts:index') + f'?page={last_page}'
+        )
+        self.assertEqual(
+            len(response.context['page_obj']), LIMIT_COUNTS_POSTS
+        )
+
+    def test_new_post_is_pushed_to_window(self):
+        '''новый пост попадает в начало окна'''
+        home_feed.snapshot()
+        post = Post.objects.create(author=self.user, text='Новый пост')
+        window, total = home_feed.snapshot()
+        self.assertEqual(window[0].pk, post.pk)
+        self.assertEqual(total, Post.objects.count())
+
+    def test_deleted_post_is_removed_from_window(self):
+        '''удалённый пост пропадает из окна'''
+        window, _ = home_feed.snapshot()
+        post_id = window[0].pk
+        Post.objects.filter(pk=post_id).first().delete()
+        window, _ = home_feed.snapshot()
+        self.assertNotIn(post_id, [post.pk for post in window])
+
+    def test_concurrent_write_does_not_lose_posts(self):
+        '''запись, которая прочла окно до чужой записи, его не
+        сохраняет, и окно собирается заново со всеми постами'''
+        home_feed.snapshot()
+        generation = cache.get(HOME_FEED_GENERATION_KEY)
+        _, posts, total = cache.get(HOME_FEED_KEY)
+        post = Post.objects.create(author=self.user, text='Новый пост')
+        self.assertIsNone(home_feed._store(generation, posts, total))
+        window, total = home_feed.snapshot()
+        self.assertEqual(window[0].pk, post.pk)
+        self.assertEqual(total, Post.objects.count())
+
+    @override_settings(HOME_FEED_WINDOW=False)
+    def test_without_shared_cache_reads_database(self):
+        '''без общего кэша главная лента читается из базы'''
+        Post.objects.create(author=self.user, text='Новый пост')
+        response = self.author_client.get(reverse('posts:index'))
+        self.assertEqual(
+            response.context['page_obj'][0].text, 'Новый пост'
+        )
+        self.assertIsNone(cache.get(HOME_FEED_KEY))
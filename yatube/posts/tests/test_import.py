@@ -0,0 +1,170 @@
+import json
+import os
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import AuthorPostsCounter, Group, Post, User
+from ..search import search_posts
+
+
+class ImportPostsTests(TestCase):
+    '''Класс для тестирования команды import_posts'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='importer')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='import-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def write_file(self, suffix, content):
+        file = tempfile.NamedTemporaryFile(
+            'w', suffix=suffix, encoding='utf-8', delete=False
+        )
+        with file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def import_posts(self, path, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            'import_posts', path, stdout=stdout, stderr=stderr, **options
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_jsonl(self):
+        '''посты из JSONL сохраняются пачками с исходными датами'''
+        records = [
+            {
+                'text': f'Импортированный пост {number}',
+                'author': self.user.username,
+                'group': self.group.slug,
+                'pub_date': f'2020-01-0{number + 1}T10:00:00',
+            }
+            for number in range(5)
+        ]
+        path = self.write_file(
+            '.jsonl', '\n'.join(json.dumps(record) for record in records)
+        )
+        self.import_posts(path, batch_size=2, batches_per_transaction=1)
+        self.assertEqual(Post.objects.count(), len(records))
+        self.assertEqual(
+            Post.objects.earliest('pub_date').pub_date,
+            timezone.make_aware(datetime(2020, 1, 1, 10), timezone.utc),
+        )
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, len(records))
+        self.assertEqual(
+            AuthorPostsCounter.objects.get(author=self.user).posts_count,
+            len(records),
+        )
+        self.assertEqual(len(search_posts('импортированный')), len(records))
+
+    def test_post_created_during_import(self):
+        '''пост сайта, созданный во время импорта, не индексируется
+        повторно и получает текущую дату'''
+        created = []
+
+        def create_site_post(execute, sql, params, many, context):
+            if not created and sql.startswith('INSERT INTO "posts_post"'):
+                created.append(None)
+                created[0] = Post.objects.create(
+                    author=self.user, text='Пост сайта'
+                )
+            return execute(sql, params, many, context)
+
+        path = self.write_file('.jsonl', json.dumps({
+            'text': 'Импортированный пост',
+            'author': self.user.username,
+            'pub_date': '2020-01-01T10:00:00',
+        }))
+        with connection.execute_wrapper(create_site_post):
+            self.import_posts(path)
+        site_post = Post.objects.get(pk=created[0].pk)
+        self.assertGreater(site_post.pub_date.year, 2020)
+        self.assertEqual(
+            Post.objects.get(text='Импортированный пост').pub_date,
+            timezone.make_aware(datetime(2020, 1, 1, 10), timezone.utc),
+        )
+        self.assertCountEqual(
+            search_posts('пост'), Post.objects.values_list('pk', flat=True)
+        )
+
+    def test_import_csv(self):
+        '''посты из CSV сохраняются, сообщество необязательно'''
+        path = self.write_file(
+            '.csv',
+            'text,author,group,pub_date\n'
+            f'Пост из CSV,{self.user.username},,\n'
+            f'Пост в группе,{self.user.username},{self.group.slug},\n',
+        )
+        self.import_posts(path)
+        self.assertTrue(
+            Post.objects.filter(text='Пост из CSV', group=None).exists()
+        )
+        self.assertTrue(Post.objects.filter(
+            text='Пост в группе', group=self.group
+        ).exists())
+
+    def test_invalid_rows_are_skipped(self):
+        '''строки с ошибками пропускаются с указанием номера строки'''
+        path = self.write_file(
+            '.jsonl',
+            json.dumps({'text': 'Пост', 'author': self.user.username}) + '\n'
+            + json.dumps({'text': 'Пост', 'author': 'nobody'}) + '\n'
+            + '{не json\n'
+            + json.dumps({
+                'text': 'Пост', 'author': self.user.username,
+                'group': 'missing',
+            }) + '\n',
+        )
+        stdout, stderr = self.import_posts(path)
+        self.assertEqual(Post.objects.count(), 1)
+        for line_number in (2, 3, 4):
+            self.assertIn(f'Строка {line_number}', stderr)
+        self.assertIn('пропущено строк: 3', stdout)
+
+    def test_rows_with_wrong_types_are_skipped(self):
+        '''поля не того типа пропускают строку, а не весь импорт'''
+        base = {'text': 'Пост', 'author': self.user.username}
+        rows = [
+            base,
+            {**base, 'pub_date': 123},
+            {**base, 'author': []},
+            {**base, 'group': {}},
+            {**base, 'text': ['Пост']},
+        ]
+        path = self.write_file(
+            '.jsonl', '\n'.join(json.dumps(row) for row in rows)
+        )
+        stdout, stderr = self.import_posts(path)
+        self.assertEqual(Post.objects.count(), 1)
+        for line_number in range(2, len(rows) + 1):
+            self.assertIn(f'Строка {line_number}', stderr)
+        self.assertIn(f'пропущено строк: {len(rows) - 1}', stdout)
+
+    def test_import_purges_feed_cache(self):
+        '''после импорта гость видит новые посты'''
+        index_url = reverse('posts:index')
+        self.client.get(index_url)
+        path = self.write_file(
+            '.jsonl',
+            json.dumps({'text': 'Свежий импорт', 'author': 'importer'}),
+        )
+        self.import_posts(path)
+        self.assertContains(self.client.get(index_url), 'Свежий импорт')
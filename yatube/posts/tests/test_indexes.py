@@ -0,0 +1,75 @@
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN есть в SQLite')
+class FeedIndexesTests(TestCase):
+    '''Ленты постов читаются по индексам, без полного просмотра таблицы
+    и без сортировки во временном B-дереве'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='index_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='index-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}', group=cls.group)
+            for i in range(15)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_query_plans(self, address):
+        '''План каждого запроса к таблице постов, выполненного страницей'''
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(address)
+        plans = {}
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT') or 'posts_post' not in sql:
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plans[sql] = [row[-1] for row in cursor.fetchall()]
+        return response, plans
+
+    def assertUsesIndexes(self, address):
+        response, plans = self.get_query_plans(address)
+        for sql, plan in plans.items():
+            with self.subTest(address=address, sql=sql):
+                for step in plan:
+                    self.assertNotIn('TEMP B-TREE', step)
+                    if step.startswith('SCAN') and 'posts_post' in step:
+                        self.assertIn('INDEX', step)
+        return response, plans
+
+    def test_feed_queries_use_indexes(self):
+        '''запросы лент по страницам используют индексы'''
+        addresses = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        ]
+        for address in addresses:
+            response, plans = self.assertUsesIndexes(address)
+            self.assertTrue(plans)
+            next_cursor = response.context['page_obj'].next_cursor
+            response, _ = self.assertUsesIndexes(
+                f'{address}?cursor={next_cursor}'
+            )
+            self.assertUsesIndexes(
+                f'{address}?cursor='
+                f'{response.context["page_obj"].previous_cursor}'
+            )
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db.models import F
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.models import Task
+from core.storage import UPLOAD_CHUNK_SIZE, is_content_addressed
+from core.tasks import run_pending
+from ..media import acquire_media
+from ..models import MediaBlob, Post, User
+from ..thumbnails import stored_thumbnail
+from .test_thumbnails import SMALL_GIF, uploaded_image
+
+
+class MediaStorageTests(TransactionTestCase):
+    '''Класс для тестирования хранения картинок по хэшу содержимого
+    и подсчёта ссылок на них'''
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        cache.clear()
+        self.storage = Post._meta.get_field('image').storage
+        self.user = User.objects.create_user(username='media_author')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post(self, text):
+        self.authorized_client.post(reverse('posts:post_create'), data={
+            'text': text, 'image': uploaded_image(),
+        })
+        return Post.objects.get(text=text)
+
+    def test_name_is_content_hash(self):
+        '''файл называется хэшем содержимого и пишется кусками'''
+        content = os.urandom(UPLOAD_CHUNK_SIZE * 3 + 1)
+        digest = hashlib.sha256(content).hexdigest()
+        name = self.storage.save('posts/photo.JPG', ContentFile(content))
+        self.assertEqual(name, f'posts/{digest[:2]}/{digest}.jpg')
+        self.assertTrue(is_content_addressed(name))
+        with self.storage.open(name) as file:
+            self.assertEqual(file.read(), content)
+        self.assertEqual(
+            os.listdir(settings.MEDIA_ROOT), ['posts'],
+            'временный файл загрузки не удалён',
+        )
+
+    def test_identical_uploads_share_file(self):
+        '''одинаковые картинки хранятся одним файлом с двумя ссылками'''
+        first = self.create_post('Первый пост')
+        second = self.create_post('Второй пост')
+        self.assertEqual(first.image.name, second.image.name)
+        digest = hashlib.sha256(SMALL_GIF).hexdigest()
+        self.assertEqual(first.image.name, f'posts/{digest[:2]}/{digest}.gif')
+        self.assertEqual(
+            os.listdir(os.path.dirname(first.image.path)),
+            [os.path.basename(first.image.path)],
+        )
+        blob = MediaBlob.objects.get()
+        self.assertEqual(blob.refs_count, 2)
+        self.assertEqual(blob.size, len(SMALL_GIF))
+
+    def test_file_freed_with_last_reference(self):
+        '''файл и миниатюры удаляются, когда пропадает последняя
+        ссылка: картинку убрали при правке, а второй пост удалён'''
+        first = self.create_post('Первый пост')
+        second = self.create_post('Второй пост')
+        self.authorized_client.post(
+            reverse('posts:edit', kwargs={'post_id': first.pk}),
+            data={'text': 'Первый пост', 'image-clear': 'on'},
+        )
+        first.refresh_from_db()
+        self.assertFalse(first.image)
+        self.assertEqual(MediaBlob.objects.get().refs_count, 1)
+        self.assertTrue(os.path.isfile(second.image.path))
+        self.assertIsNotNone(stored_thumbnail(second.image, 'card'))
+        second.delete()
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertFalse(os.path.exists(second.image.path))
+        self.assertIsNone(stored_thumbnail(second.image, 'card'))
+
+    def test_cascade_delete_frees_file(self):
+        '''удаление автора освобождает картинки его постов'''
+        post = self.create_post('Пост')
+        self.user.delete()
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertFalse(os.path.exists(post.image.path))
+
+    def test_media_cache_headers(self):
+        '''картинки с хэшем в имени отдаются как неизменяемые'''
+        post = self.create_post('Пост')
+        legacy = os.path.join(settings.MEDIA_ROOT, 'posts', 'legacy.gif')
+        with open(legacy, 'wb') as file:
+            file.write(SMALL_GIF)
+        cases = {
+            post.image.name: 'immutable',
+            'posts/legacy.gif': (
+                f'max-age={settings.STATIC_FALLBACK_MAX_AGE}'
+            ),
+        }
+        for name, cache_control in cases.items():
+            with self.subTest(name=name):
+                response = self.client.get(settings.MEDIA_URL + name)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(cache_control, response['Cache-Control'])
+                response.close()
+        response = self.client.get(settings.MEDIA_URL + 'posts/missing.gif')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(TASK_QUEUE_EAGER=False)
+    def test_reupload_keeps_retired_file(self):
+        '''загрузка, которая нашла файл на месте до того, как его
+        отложили на удаление, получает его обратно'''
+        post = self.create_post('Пост')
+        name = post.image.name
+        # Загрузка того же содержимого уже сохранила файл, но ещё
+        # не добавила ссылку, а последний пост с ним удалён
+        self.assertEqual(
+            self.storage.save('posts/photo.gif', ContentFile(SMALL_GIF)),
+            name,
+        )
+        post.delete()
+        self.assertFalse(os.path.exists(post.image.path))
+        acquire_media(name)
+        self.assertTrue(os.path.isfile(post.image.path))
+        Task.objects.update(run_after=F('created'))
+        run_pending()
+        self.assertTrue(os.path.isfile(post.image.path))
+        self.assertEqual(
+            os.listdir(os.path.dirname(post.image.path)),
+            [os.path.basename(post.image.path)],
+        )
+        self.assertEqual(MediaBlob.objects.get(name=name).refs_count, 1)
@@ -0,0 +1,93 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..constants import LIMIT_COUNTS_POSTS, PAGE_WINDOW
+from ..models import Group, Post, User
+from ..utils import page_window
+
+PAGES = 40
+
+
+class PageWindowTests(TestCase):
+    '''Класс для тестирования окна номеров страниц'''
+
+    def test_page_window(self):
+        '''первая, последняя, окно вокруг текущей и пропуски'''
+        cases = {
+            (1, 1): [1],
+            (1, 5): [1, 2, 3, 4, 5],
+            (1, 40): [1, 2, 3, None, 40],
+            (20, 40): [1, None, 18, 19, 20, 21, 22, None, 40],
+            (40, 40): [1, None, 38, 39, 40],
+            # Одиночный пропуск заменяется номером страницы
+            (5, 40): [1, 2, 3, 4, 5, 6, 7, None, 40],
+        }
+        for (number, num_pages), links in cases.items():
+            with self.subTest(number=number, num_pages=num_pages):
+                self.assertEqual(
+                    page_window(number, num_pages, PAGE_WINDOW), links
+                )
+
+
+class WindowedPaginationTests(TestCase):
+    '''Класс для тестирования вывода страниц длинной ленты'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='paginator_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='paginator-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}', group=cls.group)
+            for i in range(LIMIT_COUNTS_POSTS * PAGES)
+        )
+        cls.group_url = reverse(
+            'posts:group_list', kwargs={'slug': cls.group.slug}
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_page_links_are_windowed(self):
+        '''страница выводит окно номеров, а не все номера'''
+        response = self.client.get(self.group_url, {'page': 20})
+        self.assertEqual(
+            response.context['page_obj'].page_links,
+            [1, None, 18, 19, 20, 21, 22, None, PAGES],
+        )
+        self.assertContains(response, f'page={PAGES}"')
+        self.assertNotContains(response, 'page=10"')
+        self.assertContains(response, '&hellip;', count=2)
+
+    @override_settings(FEED_EXACT_COUNT=False, FEED_CACHE_SHARED=True)
+    def test_uncounted_pages(self):
+        '''без точного подсчёта страница обходится без COUNT(*)
+        и выводит только соседние страницы'''
+        # Сообщество и страница постов, ETag считается отдельно
+        with self.assertNumQueries(3):
+            response = self.client.get(self.group_url, {'page': 3})
+        page_obj = response.context['page_obj']
+        self.assertTrue(page_obj.cursor_mode)
+        self.assertTrue(page_obj.has_previous())
+        self.assertTrue(page_obj.has_next())
+        self.assertEqual(
+            page_obj[0].text,
+            f'Пост {LIMIT_COUNTS_POSTS * (PAGES - 2) - 1}',
+        )
+        self.assertNotContains(response, 'page=4"')
+        self.assertContains(response, 'cursor=')
+
+    @override_settings(FEED_EXACT_COUNT=False)
+    def test_uncounted_last_page(self):
+        '''последняя страница без подсчёта и номер вне ленты'''
+        response = self.client.get(self.group_url, {'page': PAGES})
+        self.assertFalse(response.context['page_obj'].has_next())
+        response = self.client.get(self.group_url, {'page': PAGES + 1})
+        page_obj = response.context['page_obj']
+        self.assertFalse(page_obj.has_previous())
+        self.assertEqual(len(page_obj), LIMIT_COUNTS_POSTS)
@@ -0,0 +1,80 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..constants import COUNT_POSTS_LIMIT_1, COUNT_POSTS_LIMIT_2
+from ..models import Group, Post, User
+
+
+@override_settings(HOME_FEED_WINDOW=True, FEED_CACHE_SHARED=True)
+class FeedQueriesTests(TestCase):
+    '''Количество запросов ленты не зависит от числа постов на странице'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='queries_author', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='queries-slug',
+            description='Тестовое описание',
+        )
+        # Адрес: запросов на странице по номеру и на странице по курсору.
+        # Главная лента собирает окно последних постов при первом запросе,
+        # а страницы внутри окна отдаёт без запросов в базу.
+        # Страницы сообщества и профиля делают ещё запрос для ETag.
+        cls.addresses = {
+            reverse('posts:index'): (2, 0),
+            reverse(
+                'posts:group_list', kwargs={'slug': cls.group.slug}
+            ): (4, 3),
+            reverse(
+                'posts:profile', kwargs={'username': cls.user.username}
+            ): (4, 3),
+        }
+
+    def setUp(self):
+        cache.clear()
+
+    def create_posts(self, count):
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Пост {i}', group=self.group)
+            for i in range(count)
+        )
+
+    def assertFeedQueries(self, posts_on_page):
+        for address, (queries, _) in self.addresses.items():
+            with self.subTest(address=address):
+                with self.assertNumQueries(queries):
+                    response = self.client.get(address)
+                self.assertEqual(
+                    len(response.context['page_obj']), posts_on_page
+                )
+
+    def test_single_post_page(self):
+        '''страница с одним постом'''
+        self.create_posts(1)
+        self.assertFeedQueries(1)
+
+    def test_full_page(self):
+        '''полная страница делает столько же запросов'''
+        self.create_posts(COUNT_POSTS_LIMIT_1 + COUNT_POSTS_LIMIT_2)
+        self.assertFeedQueries(COUNT_POSTS_LIMIT_1)
+
+    def test_cursor_page(self):
+        '''страница по курсору обходится без COUNT(*)'''
+        self.create_posts(COUNT_POSTS_LIMIT_1 + COUNT_POSTS_LIMIT_2)
+        for address, (_, queries) in self.addresses.items():
+            with self.subTest(address=address):
+                next_cursor = self.client.get(address).context[
+                    'page_obj'
+                ].next_cursor
+                with self.assertNumQueries(queries):
+                    response = self.client.get(
+                        f'{address}?cursor={next_cursor}'
+                    )
+                self.assertEqual(
+                    len(response.context['page_obj']), COUNT_POSTS_LIMIT_2
+                )
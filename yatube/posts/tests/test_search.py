@@ -0,0 +1,126 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..constants import (
+    COUNT_POSTS_LIMIT_1, COUNT_POSTS_LIMIT_2, SEARCH_RESULTS_LIMIT,
+)
+from ..models import Post, User
+from ..search import InvertedIndexSearch, get_search_backend, search_posts
+
+
+class SearchTests(TestCase):
+    '''Класс для тестирования поиска по постам'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='search_author')
+        cls.pushkin = Post.objects.create(
+            author=cls.user, text='Пушкин писал стихи о Пушкине'
+        )
+        cls.pushkin_poems = Post.objects.create(
+            author=cls.user, text='Стихи: Пушкин, Пушкин и ещё раз Пушкин'
+        )
+        cls.lermontov = Post.objects.create(
+            author=cls.user, text='Лермонтов тоже писал стихи'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_search_matches_all_words(self):
+        '''находятся посты, где есть все слова запроса, без учёта регистра'''
+        self.assertEqual(
+            set(search_posts('СТИХИ пушкин')),
+            {self.pushkin.pk, self.pushkin_poems.pk},
+        )
+        self.assertEqual(search_posts('писал Лермонтов'), [self.lermontov.pk])
+        self.assertEqual(search_posts('Гоголь'), [])
+        self.assertEqual(search_posts('!!!'), [])
+
+    def test_search_ranks_by_relevance(self):
+        '''пост с большим числом вхождений слова выше в выдаче'''
+        self.assertEqual(
+            search_posts('пушкин'), [self.pushkin_poems.pk, self.pushkin.pk]
+        )
+
+    def test_index_follows_edit_and_delete(self):
+        '''индекс обновляется при изменении и удалении поста'''
+        post = Post.objects.get(pk=self.lermontov.pk)
+        post.text = 'Гоголь писал прозу'
+        post.save()
+        self.assertEqual(search_posts('гоголь'), [post.pk])
+        self.assertEqual(search_posts('лермонтов'), [])
+        post.delete()
+        self.assertEqual(search_posts('гоголь'), [])
+
+    def test_inverted_index_fallback(self):
+        '''обратный индекс находит и ранжирует посты так же'''
+        backend = InvertedIndexSearch()
+        backend.rebuild()
+        self.assertEqual(
+            backend.search(['пушкин'], 10),
+            [self.pushkin_poems.pk, self.pushkin.pk],
+        )
+        self.assertEqual(backend.search(['лермонтов', 'стихи'], 10), [
+            self.lermontov.pk
+        ])
+        self.assertEqual(
+            set(backend.filter(Post.objects.all(), ['пушкин', 'стихи'])),
+            {self.pushkin, self.pushkin_poems},
+        )
+        backend.remove(self.lermontov.pk)
+        self.assertEqual(backend.search(['лермонтов'], 10), [])
+
+    def test_search_page_is_paginated(self):
+        '''страница поиска делится на страницы и сохраняет запрос в ссылках'''
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Пагинация {i}')
+            for i in range(COUNT_POSTS_LIMIT_1 + COUNT_POSTS_LIMIT_2)
+        )
+        get_search_backend().rebuild()
+        address = reverse('posts:search')
+        response = self.client.get(address, {'q': 'пагинация'})
+        self.assertEqual(
+            len(response.context['page_obj']), COUNT_POSTS_LIMIT_1
+        )
+        self.assertContains(response, '?q=%D0%BF')
+        response = self.client.get(address, {'q': 'пагинация', 'page': 2})
+        self.assertEqual(
+            len(response.context['page_obj']), COUNT_POSTS_LIMIT_2
+        )
+
+    def test_admin_search_uses_index(self):
+        '''поиск в админке идёт через поисковый индекс'''
+        admin = User.objects.create_superuser(
+            username='search_admin', email='admin@yatube.ru', password='pass'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'лермонтов'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.lermontov]
+        )
+
+    def test_admin_search_is_not_capped(self):
+        '''поиск в админке находит все подходящие посты,
+        а не первые SEARCH_RESULTS_LIMIT'''
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Частое слово {number}')
+            for number in range(SEARCH_RESULTS_LIMIT + 1)
+        )
+        get_search_backend().rebuild()
+        admin = User.objects.create_superuser(
+            username='search_admin', email='admin@yatube.ru', password='pass'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'частое слово'}
+        )
+        self.assertEqual(
+            response.context['cl'].result_count, SEARCH_RESULTS_LIMIT + 1
+        )
@@ -0,0 +1,124 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.models import KVStore
+
+from core.tasks import run_pending
+from ..models import Post, User
+from ..thumbnails import stored_thumbnail
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def uploaded_image(name='small.gif'):
+    return SimpleUploadedFile(name, SMALL_GIF, content_type='image/gif')
+
+
+@override_settings(TASK_QUEUE_EAGER=False)
+class ThumbnailTests(TestCase):
+    '''Класс для тестирования картинок постов и их миниатюр'''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='image_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_create_post_with_image(self):
+        '''картинка из формы сохраняется, миниатюры из очереди
+        попадают в хранилище и выводятся в ленте и на странице поста'''
+        self.authorized_client.post(reverse('posts:post_create'), data={
+            'text': 'Пост с картинкой', 'image': uploaded_image(),
+        })
+        run_pending()
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertTrue(post.image.name.startswith('posts/'))
+        for size, address in (
+            ('card', reverse('posts:index')),
+            ('detail', reverse(
+                'posts:post_detail', kwargs={'post_id': post.pk}
+            )),
+        ):
+            with self.subTest(size=size):
+                thumbnail = stored_thumbnail(post.image, size)
+                self.assertIsNotNone(thumbnail)
+                self.assertContains(
+                    self.client.get(address), f'src="{thumbnail.url}"'
+                )
+
+    def test_render_does_not_make_thumbnails(self):
+        '''пока задача в очереди, страница выводится без миниатюр'''
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=uploaded_image()
+        )
+        response = self.client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': post.pk}
+        ))
+        self.assertContains(response, 'Пост')
+        self.assertNotContains(response, '<img class="card-img')
+        self.assertIsNone(stored_thumbnail(post.image, 'detail'))
+
+    def test_ready_thumbnails_refresh_pages(self):
+        '''готовые миниатюры меняют версию поста и ETag его страницы'''
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=uploaded_image()
+        )
+        address = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        etag = self.client.get(address)['ETag']
+        index = self.client.get(reverse('posts:index'))
+        self.assertNotContains(index, '<img class="card-img')
+        run_pending()
+        post.refresh_from_db()
+        self.assertEqual(post.version, 2)
+        response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            self.client.get(reverse('posts:index')), '<img class="card-img'
+        )
+
+    def test_miss_is_not_cached(self):
+        '''миниатюра, которую создал другой процесс, видна странице,
+        открытой до её создания'''
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=uploaded_image()
+        )
+        self.assertIsNone(stored_thumbnail(post.image, 'card'))
+        run_pending()
+        # Кэш этого процесса не знает о записях воркера, а стандартное
+        # хранилище sorl помнило бы в нём промах
+        cache.set_many(dict.fromkeys(
+            KVStore.objects.values_list('key', flat=True), EMPTY_VALUE
+        ))
+        self.assertIsNotNone(stored_thumbnail(post.image, 'card'))
+
+    def test_post_without_image(self):
+        '''у поста без картинки миниатюр нет'''
+        post = Post.objects.create(author=self.user, text='Без картинки')
+        self.assertIsNone(stored_thumbnail(post.image, 'card'))
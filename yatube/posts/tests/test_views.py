@@ -1,4 +1,8 @@
-from django.test import TestCase, Client
+import base64
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django import forms
 
@@ -30,6 +34,7 @@ class StaticURLTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.guest = User.objects.create_user(username='HasNoName')
         self.authorized_client = Client()
         self.authorized_client.force_login(self.guest)
@@ -199,6 +204,7 @@ class PaginatorViewsTest(TestCase):
         Post.objects.bulk_create(heap_of_posts)
 
     def setUp(self):
+        cache.clear()
         self.guest = User.objects.create_user(username='NoName')
         self.authorized_client = Client()
         self.authorized_client.force_login(self.guest)
@@ -287,3 +293,65 @@ class PaginatorViewsTest(TestCase):
             ),
             COUNT_POSTS_LIMIT_2
         )
+
+    def test_cursor_pages_follow_the_feed(self):
+        '''переход по курсорам следующей и предыдущей страниц
+        выдаёт те же посты, что и постраничная навигация'''
+        first_page = self.client.get(reverse('posts:index')).context[
+            'page_obj'
+        ]
+        response = self.client.get(
+            reverse('posts:index') + f'?cursor={first_page.next_cursor}'
+        )
+        next_page = response.context['page_obj']
+        self.assertTrue(next_page.cursor_mode)
+        self.assertEqual(len(next_page), COUNT_POSTS_LIMIT_2)
+        self.assertFalse(next_page.has_next())
+        self.assertTrue(next_page.has_previous())
+        response = self.client.get(
+            reverse('posts:index') + f'?cursor={next_page.previous_cursor}'
+        )
+        self.assertEqual(
+            list(response.context['page_obj']), list(first_page)
+        )
+
+    def test_broken_cursor_returns_first_page(self):
+        '''битый курсор открывает первую страницу ленты'''
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': self.user})
+            + '?cursor=broken'
+        )
+        self.assertEqual(
+            len(response.context['page_obj']), COUNT_POSTS_LIMIT_1
+        )
+
+    def test_cursor_past_feed_end_returns_first_page(self):
+        '''курсор за краем ленты открывает первую страницу,
+        а не пустую страницу без ссылок'''
+        cursors = (
+            ['n', '2000-01-01T00:00:00+00:00', 1],
+            ['p', '2100-01-01T00:00:00+00:00', 1],
+        )
+        addresses = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for window in (False, True):
+            for address in addresses:
+                for cursor in cursors:
+                    token = base64.urlsafe_b64encode(
+                        json.dumps(cursor).encode()
+                    ).decode()
+                    with self.subTest(
+                        window=window, address=address, cursor=cursor
+                    ), override_settings(HOME_FEED_WINDOW=window):
+                        cache.clear()
+                        response = self.client.get(
+                            address + f'?cursor={token}'
+                        )
+                        self.assertEqual(response.status_code, 200)
+                        self.assertEqual(
+                            len(response.context['page_obj']),
+                            COUNT_POSTS_LIMIT_1,
+                        )
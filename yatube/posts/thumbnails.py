@@ -0,0 +1,40 @@
+from django.db.models import F
+from django.utils import timezone
+from sorl.thumbnail import default, get_thumbnail
+
+from .cache import bump_feeds, group_feed, index_feed, profile_feed
+from .constants import THUMBNAIL_SIZES
+from .home_feed import home_feed
+from .models import Post
+
+
+def stored_thumbnail(image, size):
+    '''Готовая миниатюра картинки поста размера из THUMBNAIL_SIZES
+    или None, пока задача очереди её не создала. Страница никогда
+    не ждёт создания миниатюры.'''
+    if not image:
+        return None
+    geometry, options = THUMBNAIL_SIZES[size]
+    return default.backend.get_stored_thumbnail(image, geometry, **options)
+
+
+def make_thumbnails(post_id):
+    '''Создаёт миниатюры картинки поста всех размеров и сбрасывает
+    закэшированные карточку, ленты и ETag страниц с этим постом'''
+    post = Post.objects.select_related('author', 'group').filter(
+        pk=post_id
+    ).first()
+    if post is None or not post.image:
+        return
+    for geometry, options in THUMBNAIL_SIZES.values():
+        get_thumbnail(post.image, geometry, **options)
+    # update не вызывает сигналов сохранения, поэтому версия
+    # и время изменения поста меняются здесь
+    Post.objects.filter(pk=post_id).update(
+        version=F('version') + 1, updated=timezone.now()
+    )
+    feeds = [index_feed(), profile_feed(post.author.username)]
+    if post.group is not None:
+        feeds.append(group_feed(post.group.slug))
+    bump_feeds(*feeds)
+    home_feed.replace(post_id)
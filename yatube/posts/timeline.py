@@ -0,0 +1,102 @@
+from django.conf import settings
+
+from .constants import FOLLOW_BACKFILL_LIMIT
+from .models import AuthorPostsCounter, Follow, Post, TimelineEntry
+
+
+def make_entries(posts, user_ids):
+    return [
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+        for post in posts
+        for user_id in user_ids
+    ]
+
+
+def fan_out(post):
+    '''Раскладывает новый пост по лентам подписчиков автора.
+    Посты автора, у которого подписчиков больше FANOUT_FOLLOWERS_LIMIT,
+    не раскладываются: с этого момента ленты его подписчиков
+    подмешивают все его посты при чтении.'''
+    counters = AuthorPostsCounter.objects.filter(author_id=post.author_id)
+    followers, on_read = counters.values_list(
+        'followers_count', 'fan_out_on_read'
+    ).first() or (0, False)
+    if not followers or on_read:
+        return
+    if followers > settings.FANOUT_FOLLOWERS_LIMIT:
+        counters.update(fan_out_on_read=True)
+        return
+    TimelineEntry.objects.bulk_create(
+        make_entries([post], Follow.objects.filter(
+            author_id=post.author_id
+        ).values_list('user_id', flat=True)),
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_posts(post_ids):
+    '''Раскладывает посты по id, например после импорта,
+    который создаёт посты без сигналов'''
+    posts = Post.objects.filter(
+        pk__in=post_ids, author__posts_counter__followers_count__gt=0
+    ).only('author_id', 'pub_date')
+    for post in posts.iterator():
+        fan_out(post)
+
+
+def backfill(follow):
+    '''Добавляет в ленту нового подписчика последние
+    FOLLOW_BACKFILL_LIMIT постов автора'''
+    if AuthorPostsCounter.objects.filter(
+        author_id=follow.author_id, fan_out_on_read=True
+    ).exists():
+        return
+    posts = Post.objects.filter(author_id=follow.author_id).order_by(
+        '-pub_date', '-pk'
+    ).only('author_id', 'pub_date')[:FOLLOW_BACKFILL_LIMIT]
+    TimelineEntry.objects.bulk_create(
+        make_entries(posts, [follow.user_id]), ignore_conflicts=True
+    )
+
+
+def remove_author(follow):
+    '''Убирает посты автора из ленты отписавшегося пользователя'''
+    TimelineEntry.objects.filter(
+        user_id=follow.user_id, author_id=follow.author_id
+    ).delete()
+
+
+class PostIds:
+    '''Id постов поверх запроса пар (pub_date, post_id). Пагинатор
+    считает и режет запрос, а страница получает только id.'''
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def count(self):
+        return self.rows.count()
+
+    def __getitem__(self, index):
+        return [post_id for _, post_id in self.rows[index]]
+
+
+def timeline_post_ids(user):
+    '''Id постов ленты подписок в порядке ленты. Обычно это проход
+    по индексу записей ленты пользователя, посты авторов
+    с подмешиванием при чтении добавляются через UNION.'''
+    rows = TimelineEntry.objects.filter(user=user).values_list(
+        'pub_date', 'post_id'
+    )
+    merged = list(Follow.objects.filter(
+        user=user, author__posts_counter__fan_out_on_read=True
+    ).values_list('author_id', flat=True))
+    if merged:
+        rows = rows.union(Post.objects.filter(
+            author_id__in=merged
+        ).order_by().values_list('pub_date', 'pk'))
+    return PostIds(rows.order_by('-pub_date', '-post_id'))
@@ -20,6 +20,31 @@ urlpatterns = [
         views.profile,
         name='profile',
     ),
+    path(
+        'profile/<str:username>/follow/',
+        views.profile_follow,
+        name='profile_follow',
+    ),
+    path(
+        'profile/<str:username>/unfollow/',
+        views.profile_unfollow,
+        name='profile_unfollow',
+    ),
+    path(
+        'follow/',
+        views.follow_index,
+        name='follow_index',
+    ),
+    path(
+        'search/',
+        views.search,
+        name='search',
+    ),
+    path(
+        'export/',
+        views.export,
+        name='export',
+    ),
     path(
         'posts/<int:post_id>/',
         views.post_detail,
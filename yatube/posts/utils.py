@@ -1,11 +1,219 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import json
 
-from .constants import LIMIT_COUNTS_POSTS
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 
+from .constants import (
+    FEED_FIELDS, FEED_ORDERING, LIMIT_COUNTS_POSTS, PAGE_WINDOW,
+)
+from .models import Post
 
-def pagination(posts, request):
-    paginator = Paginator(posts, LIMIT_COUNTS_POSTS)
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+
+
+def encode_cursor(post, direction):
+    '''Упаковывает ключ поста (pub_date, id) в непрозрачный токен'''
+    raw = json.dumps([direction, post.pub_date.isoformat(), post.pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    '''Распаковывает токен курсора, для битого токена возвращает None'''
+    try:
+        padding = '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode((token + padding).encode())
+        direction, pub_date, pk = json.loads(raw.decode())
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, TypeError, ValueError):
+        return None
+    if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS) or pub_date is None:
+        return None
+    return direction, pub_date, pk
+
+
+def page_window(number, num_pages, window):
+    '''Номера страниц для ссылок: первая, последняя и window страниц
+    по обе стороны от текущей. На месте пропущенных номеров стоит
+    None, одиночный пропуск заменяется самим номером.'''
+    pages = sorted({1, num_pages} | set(range(
+        max(number - window, 1), min(number + window, num_pages) + 1
+    )))
+    links = []
+    previous = 0
+    for page in pages:
+        if page - previous == 2:
+            links.append(previous + 1)
+        elif page - previous > 2:
+            links.append(None)
+        links.append(page)
+        previous = page
+    return links
+
+
+class WindowedPage(Page):
+    '''Страница с окном номеров соседних страниц для шаблона'''
+
+    cursor_mode = False
+
+    @property
+    def page_links(self):
+        return page_window(
+            self.number, self.paginator.num_pages, self.paginator.page_window
+        )
+
+
+class WindowedPaginator(Paginator):
+    '''Пагинатор, страницы которого выводят не все номера страниц,
+    а только окно вокруг текущей'''
+
+    def __init__(self, object_list, per_page, page_window=PAGE_WINDOW,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.page_window = page_window
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
+
+
+class FeedPage(WindowedPage):
+    '''Страница ленты, которая умеет выдавать курсоры соседних страниц.
+    Курсоры строятся по крайним постам страницы, поэтому переход
+    по ним стоит столько же, сколько открытие первой страницы.'''
+
+    @property
+    def next_cursor(self):
+        if not self.has_next() or not len(self):
+            return None
+        return encode_cursor(self[len(self) - 1], CURSOR_NEXT)
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous() or not len(self):
+            return None
+        return encode_cursor(self[0], CURSOR_PREVIOUS)
+
+
+class KeysetPage(FeedPage):
+    '''Страница, полученная по курсору или без точного подсчёта
+    постов: номер страницы и общее количество постов для неё
+    не вычисляются, шаблон выводит только соседние страницы.'''
+
+    cursor_mode = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Keyset page>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+
+class FeedPaginator(WindowedPaginator):
+    '''Пагинатор ленты постов с поддержкой курсоров по (pub_date, id)'''
+
+    def _get_page(self, *args, **kwargs):
+        return FeedPage(*args, **kwargs)
+
+    def keyset_posts(self, direction, pub_date, pk, limit):
+        '''До limit постов за ключом (pub_date, pk) в сторону direction,
+        начиная с ближайшего к ключу'''
+        if direction == CURSOR_NEXT:
+            posts = self.object_list.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            ).order_by(*FEED_ORDERING)
+        else:
+            posts = self.object_list.filter(
+                Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+            ).order_by('pub_date', 'pk')
+        return list(posts[:limit])
+
+    def get_cursor_page(self, token):
+        '''Страница после (или перед) постом, закодированным в курсоре.
+        Вместо OFFSET используется условие по ключу сортировки,
+        COUNT(*) не выполняется.'''
+        cursor = decode_cursor(token)
+        if cursor is None:
+            return self.get_page(1)
+        direction, pub_date, pk = cursor
+        posts = self.keyset_posts(direction, pub_date, pk, self.per_page + 1)
+        if not posts:
+            # Курсор за краем ленты: устаревший или подделанный.
+            # Пустой странице не из чего строить курсоры соседних.
+            return self.get_page(1)
+        has_more = len(posts) > self.per_page
+        posts = posts[:self.per_page]
+        if direction == CURSOR_NEXT:
+            return KeysetPage(posts, self, has_more, True)
+        posts.reverse()
+        return KeysetPage(posts, self, True, has_more)
+
+    def get_uncounted_page(self, number):
+        '''Страница по номеру без COUNT(*): читается на пост больше
+        страницы, чтобы узнать, есть ли следующая. Номер вне ленты
+        даёт первую страницу.'''
+        try:
+            number = max(int(number), 1)
+        except (TypeError, ValueError):
+            number = 1
+        bottom = (number - 1) * self.per_page
+        posts = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not posts and number > 1:
+            return self.get_uncounted_page(1)
+        return KeysetPage(
+            posts[:self.per_page], self, len(posts) > self.per_page,
+            number > 1,
+        )
+
+
+def feed_posts(**filters):
+    '''Общий запрос для лент постов: автор и сообщество подгружаются
+    одним JOIN, из базы читаются только поля, нужные шаблонам ленты'''
+    return Post.objects.filter(**filters).select_related(
+        'author', 'group'
+    ).only(*FEED_FIELDS)
+
+
+def pagination(posts, request, paginator_class=FeedPaginator,
+               exact_count=None, **kwargs):
+    '''Страница ленты по курсору или номеру из запроса.
+    С exact_count=False (по умолчанию FEED_EXACT_COUNT) постов
+    не считают, и страница выводит только ссылки на соседние.'''
+    if exact_count is None:
+        exact_count = settings.FEED_EXACT_COUNT
+    posts = posts.order_by(*FEED_ORDERING)
+    paginator = paginator_class(posts, LIMIT_COUNTS_POSTS, **kwargs)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        return paginator.get_cursor_page(cursor)
     page_number = request.GET.get('page')
+    if not exact_count:
+        return paginator.get_uncounted_page(page_number)
     page_obj = paginator.get_page(page_number)
 
     return page_obj
+
+
+def pagination_by_ids(post_ids, request):
+    '''Постраничный вывод заранее упорядоченного списка id постов,
+    например результатов поиска. Из базы читается только текущая страница.'''
+    paginator = WindowedPaginator(post_ids, LIMIT_COUNTS_POSTS)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    posts = feed_posts().in_bulk(page_obj.object_list)
+    page_obj.object_list = [
+        posts[pk] for pk in page_obj.object_list if pk in posts
+    ]
+
+    return page_obj
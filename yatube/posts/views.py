@@ -1,16 +1,38 @@
 from django.shortcuts import get_object_or_404, redirect, render
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-
-from .models import Post, Group, User
-from .utils import pagination
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.views.decorators.http import etag, require_POST
+
+from .cache import cache_feed, group_feed, index_feed, profile_feed
+from .conditional import group_etag, post_etag, profile_etag
+from .counters import get_author_posts_count
+from .export import (
+    EXPORT_FORMATS, EXPORT_KINDS, export_lines, export_queryset,
+    parse_export_date,
+)
+from .home_feed import HomeFeedPaginator, home_feed
+from .models import Follow, Post, Group, User
+from .search import search_posts
+from .timeline import timeline_post_ids
+from .utils import feed_posts, pagination, pagination_by_ids
 from posts.forms import PostForm
 
 
+@cache_feed(index_feed)
 def index(request):
     '''view-функция для главной страницы'''
     template = 'posts/index.html'
-    post_list = Post.objects.select_related('author', 'group')
-    page_obj = pagination(post_list, request)
+    post_list = feed_posts()
+    if home_feed.enabled:
+        window, total = home_feed.snapshot()
+        # Число постов главной ленты известно из окна без COUNT(*)
+        page_obj = pagination(
+            post_list, request, HomeFeedPaginator, exact_count=True,
+            window=window, total=total,
+        )
+    else:
+        page_obj = pagination(post_list, request)
     context = {
         'page_obj': page_obj,
     }
@@ -18,11 +40,13 @@ def index(request):
     return render(request, template, context)
 
 
+@cache_feed(group_feed)
+@etag(group_etag)
 def groups_posts(request, slug):
     '''view-функция для страницы на которой будут посты'''
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
+    posts = feed_posts(group=group)
     page_obj = pagination(posts, request)
     context = {
         'group': group,
@@ -32,27 +56,124 @@ def groups_posts(request, slug):
     return render(request, template, context)
 
 
+@cache_feed(profile_feed)
+@etag(profile_etag)
 def profile(request, username):
     '''Страница профайла пользователя:
     на ней будет отображаться информация об авторе и его посты.'''
     temmplate = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
-    posts_list = author.posts.all()
+    author = get_object_or_404(
+        User.objects.select_related('posts_counter'), username=username
+    )
+    posts_list = feed_posts(author=author)
     page_obj = pagination(posts_list, request)
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author=author
+    ).exists()
     context = {
         'author': author,
+        'posts_count': get_author_posts_count(author),
         'page_obj': page_obj,
+        'following': following,
     }
 
     return render(request, temmplate, context)
 
 
+@login_required
+def follow_index(request):
+    '''Лента постов авторов, на которых подписан пользователь'''
+    template = 'posts/follow.html'
+    page_obj = pagination_by_ids(timeline_post_ids(request.user), request)
+    context = {
+        'page_obj': page_obj,
+    }
+
+    return render(request, template, context)
+
+
+@login_required
+@require_POST
+def profile_follow(request, username):
+    '''Подписка на автора'''
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+@require_POST
+def profile_unfollow(request, username):
+    '''Отписка от автора'''
+    Follow.objects.filter(
+        user=request.user, author__username=username
+    ).delete()
+
+    return redirect('posts:profile', username=username)
+
+
+def search(request):
+    '''Страница поиска по текстам постов'''
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    page_obj = pagination_by_ids(search_posts(query), request)
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+
+    return render(request, template, context)
+
+
+@staff_member_required
+def export(request):
+    '''Потоковая выгрузка постов, сообществ или пользователей.
+    Параметры те же, что у команды export_posts.'''
+    kind = request.GET.get('kind', 'posts')
+    file_format = request.GET.get('format', 'jsonl')
+    if kind not in EXPORT_KINDS or file_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest('Неизвестный вид или формат выгрузки')
+    try:
+        rows = export_queryset(
+            kind,
+            group=request.GET.get('group'),
+            author=request.GET.get('author'),
+            since=request.GET.get('since') and parse_export_date(
+                request.GET['since']
+            ),
+            until=request.GET.get('until') and parse_export_date(
+                request.GET['until']
+            ),
+        )
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    response = StreamingHttpResponse(
+        export_lines(kind, rows, file_format),
+        content_type='text/csv' if file_format == 'csv' else (
+            'application/x-ndjson'
+        ),
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{kind}.{file_format}"'
+    )
+
+    return response
+
+
+@etag(post_etag)
 def post_detail(request, post_id):
     '''Страница для просмотра отдельного поста.'''
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__posts_counter', 'group'),
+        pk=post_id,
+    )
     context = {
         'post': post,
+        'author': post.author,
+        'posts_count': get_author_posts_count(post.author),
     }
 
     return render(request, template, context)
@@ -62,7 +183,7 @@ def post_detail(request, post_id):
 def post_create(request):
     '''Страница для публикации постов'''
     template = 'posts/post_create.html'
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if request.method == 'POST' and form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
@@ -81,7 +202,9 @@ def edit(request, post_id):
     if post.author != request.user:
         return redirect(template, post_id=post_id)
 
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(
+        request.POST or None, files=request.FILES or None, instance=post
+    )
     if request.method == 'POST' and form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
@@ -0,0 +1,22 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``,
+for example ``uvicorn yatube.asgi:application``.
+
+Django 2.2 has no ASGI support and no async views, so core.asgi bridges the
+WSGI application. Only reading the request body and sending the response run
+on the event loop. Every request still holds one thread of a pool of
+YATUBE_ASGI_THREADS threads for as long as the view runs: a server started
+this way handles no more concurrent requests than a WSGI server with the same
+number of threads. The bridge only stops slow clients from pinning threads
+while the body is uploaded or the response is sent.
+"""
+
+import os
+
+from core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = get_asgi_application()
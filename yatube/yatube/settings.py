@@ -1,5 +1,7 @@
 import os
 
+from core.release import templates_release
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -11,7 +13,8 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = 'y65rg(8@9jxe-sx(nkulwnmbb1l*pmxv*xm^l*)rnh$c4_4wa7'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# YATUBE_DEBUG=0 выключает отладку на боевом сервере
+DEBUG = os.getenv('YATUBE_DEBUG', '1') == '1'
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -30,6 +33,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'sorl.thumbnail',
     'core.apps.CoreConfig',
     'posts.apps.PostsConfig',
     'about.apps.AboutConfig',
@@ -37,11 +41,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.TextGZipMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -49,12 +57,21 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.InstrumentedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Без отладки шаблоны читаются и разбираются один раз
+            # на процесс, а WSGI и ASGI приложения разбирают их
+            # при запуске, см. WARM_ON_STARTUP
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -67,19 +84,195 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# Разбирать шаблоны и строить таблицы адресов при запуске процесса,
+# а не на первом запросе, см. core.startup
+WARM_ON_STARTUP = not DEBUG
+# Потоки yatube.asgi. В Django 2.2 нет ни ASGI, ни асинхронных view:
+# мост core.asgi держит поток пула на каждый запрос, пока работает
+# view, поэтому одновременно обрабатывается не больше ASGI_THREADS
+# запросов, как и у WSGI-сервера с тем же числом потоков. Цикл событий
+# только принимает тело запроса и отдаёт ответ медленным клиентам.
+ASGI_THREADS = int(os.getenv('YATUBE_ASGI_THREADS', '32'))
 
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# YATUBE_DB_NAME позволяет держать отдельную базу, например для бенчмарков
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'NAME': os.getenv(
+            'YATUBE_DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')
+        ),
     }
 }
 
 
+# Профили настройки SQLite, выбираются YATUBE_SQLITE_PROFILE.
+# production: WAL, чтобы читатели не ждали писателя, отображение файла
+# в память, synchronous=NORMAL (в режиме WAL безопасно при сбое
+# процесса), ожидание блокировки вместо ошибки и постоянные соединения.
+# PRAGMA применяются к каждому соединению в core.signals.
+SQLITE_PROFILES = {
+    'default': {
+        'pragmas': {},
+        'conn_max_age': 0,
+    },
+    'production': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': 256 * 1024 * 1024,
+            'busy_timeout': 5000,
+            'temp_store': 'MEMORY',
+            'cache_size': -20000,
+        },
+        'conn_max_age': 60,
+    },
+}
+SQLITE_PROFILE = os.getenv('YATUBE_SQLITE_PROFILE', 'default')
+SQLITE_PRAGMAS = SQLITE_PROFILES[SQLITE_PROFILE]['pragmas']
+DATABASES['default']['CONN_MAX_AGE'] = (
+    SQLITE_PROFILES[SQLITE_PROFILE]['conn_max_age']
+)
+
+
+# YATUBE_REPLICAS - пути к файлам SQLite реплик только для чтения через
+# запятую. Реплики наполняет manage.py sync_replicas, в тестах они
+# зеркалят основную базу. Чтения в REPLICA_READ_VIEWS идут в реплики,
+# после записи пользователь REPLICA_STICKY_SECONDS секунд читает
+# из основной базы.
+READ_REPLICAS = []
+for number, name in enumerate(
+    filter(None, os.getenv('YATUBE_REPLICAS', '').split(',')), start=1
+):
+    READ_REPLICAS.append(f'replica_{number}')
+    DATABASES[READ_REPLICAS[-1]] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name.strip(),
+        'TEST': {'MIRROR': 'default'},
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+    }
+DATABASE_ROUTERS = ['core.db_routers.ReplicaRouter']
+REPLICA_READ_VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:follow_index',
+    'about:author',
+    'about:tech',
+)
+REPLICA_STICKY_SECONDS = 5
+REPLICA_STICKY_COOKIE = 'primary_until'
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+# По умолчанию кэш живёт в памяти процесса. YATUBE_CACHE=file включает
+# файловый кэш, YATUBE_CACHE=redis - Redis (нужен пакет django-redis).
+# Бэкенды из core считают попадания и промахи для замеров запросов.
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'core.cache_backends.InstrumentedLocMemCache',
+    },
+    'file': {
+        'BACKEND': 'core.cache_backends.InstrumentedFileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+    },
+    'redis': {
+        'BACKEND': 'core.cache_backends.InstrumentedRedisCache',
+        'LOCATION': os.getenv('YATUBE_REDIS_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+CACHE_NAME = os.getenv('YATUBE_CACHE', 'locmem')
+CACHES = {
+    'default': CACHE_BACKENDS[CACHE_NAME],
+}
+# Окно последних постов главной ленты, см. posts.home_feed. Процессы
+# делят его через кэш и меняют атомарным incr, поэтому окну нужен
+# общий кэш с атомарными счётчиками - Redis. С кэшем в памяти процесса
+# другие процессы не видели бы новых постов, и главная лента без
+# Redis читается из базы, как остальные.
+HOME_FEED_WINDOW = CACHE_NAME == 'redis'
+# Кэш страниц лент и ETag страниц сообществ и профилей держатся
+# на версиях лент в кэше: запись поста в одном процессе меняет версию,
+# и страницы сбрасываются во всех. Кэш в памяти процесса сбросил бы
+# только свои страницы, поэтому без общего кэша (файлового или Redis)
+# ленты не кэшируются и отдаются без ETag.
+FEED_CACHE_SHARED = CACHE_NAME in ('file', 'redis')
+# False - ленты не считают посты: без COUNT(*) страницы выводят только
+# ссылки на соседние, а не номера страниц
+FEED_EXACT_COUNT = True
+# Посты автора, у которого подписчиков больше, не раскладываются
+# по лентам подписок при публикации, а подмешиваются при чтении
+FANOUT_FOLLOWERS_LIMIT = 1000
+# Время жизни закэшированных страниц лент, сброс идёт по сигналам
+FEED_CACHE_TIMEOUT = 60 * 60
+# Карточки постов меняют ключ при изменении поста, поэтому живут долго
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+# Фоновая очередь задач core.tasks в основной базе: индексация
+# поиска, миниатюры и раскладка постов по лентам подписок.
+# YATUBE_TASKS=queue - боевой режим: view ставят задачи и сразу
+# отвечают, выполняет их manage.py run_workers. YATUBE_TASKS=eager
+# выполняет задачи сразу при постановке, без воркеров, - так по
+# умолчанию при отладке.
+TASK_QUEUE_EAGER = os.getenv(
+    'YATUBE_TASKS', 'eager' if DEBUG else 'queue'
+) == 'eager'
+TASK_MAX_ATTEMPTS = 5
+# Пауза перед повтором: TASK_RETRY_BACKOFF * 2 ** (попытка - 1) секунд,
+# но не больше TASK_RETRY_BACKOFF_MAX
+TASK_RETRY_BACKOFF = 5
+TASK_RETRY_BACKOFF_MAX = 60 * 30
+# Задачу, которую воркер не выполнил за это время, забирает другой
+TASK_LEASE_SECONDS = 60 * 5
+# Сколько задач воркер выбирает за один запрос к очереди
+TASK_CLAIM_BATCH = 10
+# Пауза воркера, когда готовых задач нет, секунды
+TASK_POLL_INTERVAL = 1
+# Версия выкладки входит в ETag страниц: после выкладки новых шаблонов
+# браузеры не получат 304 на старую вёрстку. Без YATUBE_RELEASE
+# версию считают по содержимому шаблонов: она одна у всех процессов
+# и не меняется при перезапуске.
+RELEASE = os.getenv('YATUBE_RELEASE') or templates_release(TEMPLATES_DIR)
+
+
+# Статистика запросов в базу по отпечаткам, см. core.query_log.
+# Каждый процесс сбрасывает её в свой файл, query_report сводит файлы.
+QUERY_STATS_DIR = os.path.join(BASE_DIR, 'query_stats')
+QUERY_STATS_FLUSH_INTERVAL = 10
+# Запросы дольше порога пишутся в лог yatube.slow_queries
+SLOW_QUERY_THRESHOLD_MS = 100
+
+# Профилирование запросов, см. core.middleware.ProfilingMiddleware.
+# Персонал включает его параметром ?profile=cprofile|sampling,
+# PROFILE_SAMPLE_RATE - доля профилируемых запросов всех пользователей.
+PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILE_SAMPLE_RATE = 0
+PROFILE_MODE = 'sampling'
+# Период снятия стека в режиме sampling, секунды
+PROFILE_SAMPLE_INTERVAL = 0.001
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'yatube.slow_queries': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -119,6 +312,38 @@ USE_TZ = True
 STATIC_URL = '/static/'
 # Директория со статикой
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+# Сюда collectstatic собирает статику, отсюда её отдаёт core.views.static
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+# YATUBE_STATIC=manifest - сборка для боевого сервера: collectstatic
+# добавляет к именам файлов хэш содержимого и кладёт рядом сжатые
+# копии .gz и .br (для .br нужен пакет brotli). Шаблоны тогда ссылаются
+# на файлы с хэшем, поэтому без collectstatic страницы не откроются.
+STATIC_STORAGES = {
+    'plain': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    'manifest': 'core.storage.CompressedManifestStaticFilesStorage',
+}
+STATICFILES_STORAGE = STATIC_STORAGES[os.getenv('YATUBE_STATIC', 'plain')]
+# Файлы с хэшем в имени не меняются, браузеры кэшируют их на год
+STATIC_MAX_AGE = 60 * 60 * 24 * 365
+# Файлы без хэша могут смениться при выкладке
+STATIC_FALLBACK_MAX_AGE = 60 * 5
+
+# Картинки постов. Их имена - хэши содержимого (одинаковые загрузки
+# хранятся одним файлом, см. posts.media), поэтому core.views.media
+# отдаёт их и миниатюры как неизменяемые на STATIC_MAX_AGE.
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Файл, на который не осталось ссылок, удаляется не сразу, а через
+# столько секунд: загрузка того же содержимого, которая уже нашла его
+# на месте, успеет добавить ссылку
+MEDIA_RETIRE_SECONDS = 60 * 10
+# Миниатюры создаёт задача фоновой очереди после сохранения поста,
+# а не первый рендер страницы. Готовые миниатюры записываются
+# в хранилище ключ-значение sorl-thumbnail: таблица в базе и кэш перед
+# ней, поэтому переживают перезапуск процессов и сброс кэша. Кэш
+# помнит только найденные миниатюры, промах всегда проверяется в базе.
+THUMBNAIL_BACKEND = 'core.thumbnail_backends.StoredThumbnailBackend'
+THUMBNAIL_KVSTORE = 'core.thumbnail_backends.HitCachingKVStore'
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'